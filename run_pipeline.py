@@ -4,30 +4,42 @@
 #   1. 배당 공시 증분 수집 (DART)
 #   2. ML 학습용 정제 → dividend_ml_ready.csv
 #   2-1. 주가 수집 + ±30일 윈도우 검증
-#   3. 공통 피처 생성 & 모듈별 분할 (classification / regression / clustering)
+#   3. 공통 피처 생성 & 모듈별 분할 (classification / regression / clustering, 증분 갱신)
 #   4. 문서 임베딩 & FAISS 인덱스 구축
 #   5. Notebook 기반 모델 학습 (04~06)  ⎯ papermill 실행
 #   6. 앙상블 & Master CSV 생성 (07_ensemble.ipynb or inline function)
 #   7. 추가 후처리 노트북(08_dividend.ipynb) – 선택적 실행
+#
+# 단계별 실행 (서브커맨드, 무거운 의존성·API 키 검사는 해당 단계에서만 로드)
+#   python run_pipeline.py                      # 전체 (기존 동작)
+#   python run_pipeline.py collect  --start 20250101
+#   python run_pipeline.py clean | prices | features | embed | train | ensemble
+#   python run_pipeline.py watch --interval 5   # 실시간 배당 공시 감시 + 스코어링
 # ──────────────────────────────────────────────────────────────────────────────
 
 from __future__ import annotations
 
 import os
 import sys
+import time
 import traceback
 from datetime import datetime
-from typing import List
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import pandas as pd
-import papermill as pm
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from utils.sharding import ShardSpec
 
-# ── 내부 유틸
-from utils.dart_api import collect_dividend_filings_incremental
-from utils.data_cleaning import clean_ml_data
-from utils.price_fetcher import run_price_fetching
-from utils import embed_utils
+# pandas · papermill · utils 하위 모듈은 각 단계 함수 안에서 import (cold start 최소화)
+
+# 피처 스토어(.fs)로 변환할 module_datasets CSV 목록
+MODULE_DATASETS = [
+    "features_common",
+    "classification",
+    "regression",
+    "clustering",
+    "classification_with_text",
+    "regression_enriched",
+]
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helper: 앙상블 & Master CSV 빌더
@@ -38,6 +50,8 @@ def _build_master_csv(
     data_dir: str,
     master_csv_path: str,
     n_clusters: int = 4,
+    refit_clusters: bool = False,
+    shard: Optional[ShardSpec] = None,
 ) -> None:
     """classificationㆍregression 결과를 통합하여 Master CSV 생성
 
@@ -47,14 +61,21 @@ def _build_master_csv(
     data_dir         : str  – 프로젝트 최상위 data 디렉토리
     master_csv_path  : str  – 최종 저장 경로
     n_clusters       : int  – K-Means 클러스터 개수 (default=4)
+    refit_clusters   : bool – True 면 저장된 클러스터 모델을 무시하고 재학습
+    shard            : ShardSpec – 지정 시 해당 종목만 스코어링, master_csv_path 에 _row(예측 파일
+                       행 순번)와 함께 저장 → _merge_master_shards 로 병합
     """
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.cluster import KMeans
     import joblib
+    from utils.cluster_model import (
+        assign_clusters,
+        is_compatible,
+        load_cluster_model,
+        load_or_fit_cluster_model,
+    )
+    from utils.feature_store import read_module_dataset
+    from utils.sharding import clear_done, mark_done, read_csv_shard
 
-    # ── 파일 경로
-    reg_data_fp  = os.path.join(module_dir, "regression_enriched.csv")
-    clf_data_fp  = os.path.join(module_dir, "classification_with_text.csv")
+    # ── 파일 경로 (모듈 데이터셋은 <name>.fs 피처 스토어 우선, 없으면 CSV)
     pred_fp      = os.path.join(
         data_dir,
         "results",
@@ -62,11 +83,25 @@ def _build_master_csv(
         "regression_predictions_for_ensemble.csv",
     )
     clf_model_fp = os.path.join(data_dir, "models", "lgbm_classifier.pkl")
-
-    # ── 데이터 로드
-    df_reg  = pd.read_csv(reg_data_fp, parse_dates=["rcept_dt"], dtype={"stock_code": str})
-    df_clf  = pd.read_csv(clf_data_fp, parse_dates=["rcept_dt"], dtype={"stock_code": str})
-    df_pred = pd.read_csv(pred_fp,   parse_dates=["rcept_dt"], dtype={"stock_code": str})
+    cluster_fp   = os.path.join(data_dir, "models", "kmeans_cluster.pkl")
+
+    # ── 데이터 로드 (shard 모드면 담당 종목 행만)
+    #    분류 모델·마스터 CSV 는 CSV dtype 기준 → 스토어에서 읽어도 원 dtype 으로 복원
+    #    (Categorical·float32 그대로 넣으면 전처리·예측이 학습 때와 달라질 수 있음)
+    df_reg  = read_module_dataset(module_dir, "regression_enriched", shard=shard, original_dtypes=True)
+    df_clf  = read_module_dataset(module_dir, "classification_with_text", shard=shard, original_dtypes=True)
+    df_pred = read_csv_shard(
+        pred_fp, shard, row_col="_row" if shard is not None else None,
+        parse_dates=["rcept_dt"], dtype={"stock_code": str},
+    )
+    if shard is not None:
+        # 클러스터 모델은 전체 예측으로 1회 학습된 것만 사용 (shard 별 학습 시 라벨 불일치)
+        if refit_clusters or not os.path.exists(cluster_fp):
+            raise RuntimeError(
+                f"shard 스코어링에는 학습된 클러스터 모델이 필요합니다: {cluster_fp} "
+                "(먼저 shard 없이 ensemble --refit 실행)"
+            )
+        clear_done(os.path.dirname(master_csv_path))
 
     # ── 분류 확률(p_up) 계산
     clf_model = joblib.load(clf_model_fp)
@@ -75,14 +110,19 @@ def _build_master_csv(
     )
     df_clf["p_up"] = clf_model.predict_proba(X_clf)[:, 1]
 
-    # ── 회귀 residual + y_pred 를 이용한 클러스터 라벨 생성
-    scaler        = StandardScaler()
-    scaled        = scaler.fit_transform(df_pred[["y_pred", "residual"]])
-    df_pred["cluster"] = (
-        KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        .fit_predict(scaled)
-        .astype("int8")
-    )
+    # ── 회귀 residual + y_pred 클러스터 라벨 (저장 모델 재사용, assign-only)
+    if shard is not None:
+        cluster_model = load_cluster_model(cluster_fp)
+        if not is_compatible(cluster_model, n_clusters):
+            raise RuntimeError(
+                f"저장된 클러스터 모델이 현재 설정(k={n_clusters}, 피처, 라벨 정렬 버전)과 다릅니다: "
+                f"{cluster_fp} (먼저 shard 없이 ensemble --refit 실행)"
+            )
+    else:
+        cluster_model = load_or_fit_cluster_model(
+            cluster_fp, df_pred, n_clusters=n_clusters, refit=refit_clusters
+        )
+    df_pred["cluster"] = assign_clusters(df_pred, cluster_model)
 
     # ── 마스터 병합
     df_master = (
@@ -103,53 +143,92 @@ def _build_master_csv(
     # ── 저장
     df_master.to_csv(master_csv_path, index=False, encoding="utf-8-sig")
     print(f"✅ Master CSV saved → {master_csv_path}  (rows: {len(df_master):,})")
+    if shard is not None:
+        mark_done(os.path.dirname(master_csv_path), rows=len(df_master))
+
+
+def _merge_master_shards(
+    data_dir: str,
+    count: int,
+    master_csv_path: str,
+    timeout: Optional[float] = None,
+) -> None:
+    """score shard 의 Master CSV 병합 — _row(예측 파일 행 순번) 순 정렬 후 제거 → 비분할 결과와 동일"""
+    from utils.sharding import completed_shard_dirs, read_shard_csvs, write_csv_atomic
+
+    dirs = completed_shard_dirs(data_dir, "score", count, timeout=timeout)
+    name = os.path.basename(master_csv_path)
+    df = read_shard_csvs([os.path.join(d, name) for d in dirs], dtype={"stock_code": str})
+    df = df.sort_values("_row", kind="mergesort").drop(columns="_row")
+    write_csv_atomic(df, master_csv_path)
+    print(f"✅ Master CSV shard {count}개 병합 → {master_csv_path}  (rows: {len(df):,})")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Main pipeline function
+# 공통 경로 & papermill 헬퍼
 # ──────────────────────────────────────────────────────────────────────────────
 
-def run_pipeline(
-    start_date: str = "20130101",
-    end_date:   str = datetime.today().strftime("%Y%m%d"),
-    data_dir:   str = "data",
-    max_workers: int = 10,
-    skip_notebooks: List[str] | None = None,
-) -> None:
-    """배당 공시 Agent 전체 파이프라인
+def _paths(data_dir: str) -> Dict[str, str]:
+    """단계 간 공유하는 파일 경로 (디렉토리 생성 포함)"""
+    paths = {
+        "csv":       os.path.join(data_dir, "dividend_with_text.csv"),
+        "jsonl":     os.path.join(data_dir, "dividend_with_text.jsonl"),
+        "ml_ready":  os.path.join(data_dir, "dividend_ml_ready.csv"),
+        "hist":      os.path.join(data_dir, "price_history.csv"),
+        "check":     os.path.join(data_dir, "window_check_result.csv"),
+        "cache_dir": os.path.join(data_dir, "price_cache"),
+        "module_dir":  os.path.join(data_dir, "module_datasets"),
+        "results_dir": os.path.join(data_dir, "results"),
+        "artifacts_dir": os.path.join("artifacts"),
+        "master_csv":  os.path.join(data_dir, "all_stocks_master.csv"),
+        "last_seen":   os.path.join(data_dir, "last_seen.json"),
+    }
+    for key in ("module_dir", "results_dir", "artifacts_dir", "cache_dir"):
+        os.makedirs(paths[key], exist_ok=True)
+    return paths
+
+
+def _execute_notebook(nb: str, artifacts_dir: str, parameters: dict, **kwargs) -> None:
+    import papermill as pm
+
+    pm.execute_notebook(
+        input_path  = os.path.join("notebooks", nb),
+        output_path = os.path.join(artifacts_dir, nb.replace(".ipynb", ".out.ipynb")),
+        parameters  = parameters,
+        **kwargs,
+    )
 
-    Parameters
-    ----------
-    start_date     : str   – DART 조회 시작일 (YYYYMMDD)
-    end_date       : str   – DART 조회 종료일 (YYYYMMDD)
-    data_dir       : str   – 프로젝트 데이터 루트
-    max_workers    : int   – 멀티스레드 병렬 수집 워커 수
-    skip_notebooks : list  – 실행을 건너뛰고 싶은 노트북 파일명 목록 (optional)
-    """
 
-    skip_notebooks = skip_notebooks or []
+# ──────────────────────────────────────────────────────────────────────────────
+# 단계별 함수 (서브커맨드 1:1 대응)
+# ──────────────────────────────────────────────────────────────────────────────
 
-    # 0. env & dirs
-    load_dotenv(dotenv_path=".env")
-    os.makedirs(data_dir, exist_ok=True)
+def stage_collect(
+    data_dir: str,
+    start_date: str,
+    end_date: str,
+    max_workers: int = 10,
+    shard: Optional[ShardSpec] = None,
+) -> None:
+    """1. 증분 공시 수집 (shard 지정 시 shards/collect/<shard>/ 에 담당 종목분만)"""
+    from utils.dart_api import collect_dividend_filings_incremental
 
-    csv_path      = os.path.join(data_dir, "dividend_with_text.csv")
-    jsonl_path    = os.path.join(data_dir, "dividend_with_text.jsonl")
-    ml_ready_path = os.path.join(data_dir, "dividend_ml_ready.csv")
-    hist_path     = os.path.join(data_dir, "price_history.csv")
-    check_path    = os.path.join(data_dir, "window_check_result.csv")
-    cache_dir     = os.path.join(data_dir, "price_cache")
-    module_dir    = os.path.join(data_dir, "module_datasets")
-    results_dir   = os.path.join(data_dir, "results")
-    artifacts_dir = os.path.join("artifacts")
-
-    for d in [module_dir, results_dir, artifacts_dir, cache_dir]:
-        os.makedirs(d, exist_ok=True)
-
-    # ──────────────────────────────────────────────────────────────
-    # 1. 증분 공시 수집
-    # ──────────────────────────────────────────────────────────────
-    print("\n1⃣  배당공시 증분 수집")
+    p = _paths(data_dir)
+    print("\n1⃣  배당공시 증분 수집" + (f" [{shard.name}]" if shard else ""))
+    if shard is None:
+        jsonl_path, csv_path, extra = p["jsonl"], p["csv"], {"base_last_seen_path": p["last_seen"]}
+    else:
+        from utils.sharding import shard_dir
+
+        sd = shard_dir(data_dir, "collect", shard)
+        jsonl_path = os.path.join(sd, os.path.basename(p["jsonl"]))
+        csv_path = os.path.join(sd, os.path.basename(p["csv"]))
+        extra = {
+            "shard": shard,
+            "seen_paths": [p["jsonl"]],
+            "last_seen_path": os.path.join(sd, "last_seen.json"),
+            "base_last_seen_path": p["last_seen"],
+        }
     new_records = collect_dividend_filings_incremental(
         start=start_date,
         end=end_date,
@@ -157,66 +236,154 @@ def run_pipeline(
         save_jsonl=jsonl_path,
         existing_jsonl=jsonl_path,
         max_workers=max_workers,
+        **extra,
     )
     print(f"   ▶ 신규 수집 건수: {len(new_records):,}건")
 
-    # ──────────────────────────────────────────────────────────────
-    # 2. ML 데이터 정제 → dividend_ml_ready.csv
-    # ──────────────────────────────────────────────────────────────
+
+def stage_clean(data_dir: str) -> None:
+    """2. ML 데이터 정제 → dividend_ml_ready.csv"""
+    import pandas as pd
+    from utils.data_cleaning import clean_ml_data
+
+    p = _paths(data_dir)
     print("\n2⃣  ML용 데이터 정제 & 저장")
-    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    df = pd.read_csv(p["csv"], encoding="utf-8-sig")
     print(f"   원본 shape: {df.shape}")
     df = clean_ml_data(df)
     print(f"   정제 후 shape: {df.shape}")
-    df.to_csv(ml_ready_path, index=False, encoding="utf-8-sig")
-    print(f"   ✅ 저장 완료 → {ml_ready_path}")
+    df.to_csv(p["ml_ready"], index=False, encoding="utf-8-sig")
+    print(f"   ✅ 저장 완료 → {p['ml_ready']}")
 
-    # 2-1. Price fetch & window check
-    print("\n2.1 주가 수집 & 윈도우 검증")
+
+def stage_prices(data_dir: str, max_workers: int = 10, shard: Optional[ShardSpec] = None) -> None:
+    """2-1. Price fetch & window check (shard 지정 시 shards/prices/<shard>/ 에 저장, 캐시는 공유)"""
+    from utils.price_fetcher import run_price_fetching
+
+    p = _paths(data_dir)
+    print("\n2.1 주가 수집 & 윈도우 검증" + (f" [{shard.name}]" if shard else ""))
+    hist_path, check_path = p["hist"], p["check"]
+    if shard is not None:
+        from utils.sharding import shard_dir
+
+        sd = shard_dir(data_dir, "prices", shard)
+        hist_path = os.path.join(sd, os.path.basename(hist_path))
+        check_path = os.path.join(sd, os.path.basename(check_path))
     run_price_fetching(
-        div_path       = ml_ready_path,
+        div_path       = p["ml_ready"],
         hist_path      = hist_path,
         check_path     = check_path,
-        cache_dir_path = cache_dir,
+        cache_dir_path = p["cache_dir"],
         window_days    = 30,
         max_workers    = max_workers,
+        shard          = shard,
     )
 
-    # ──────────────────────────────────────────────────────────────
-    # 3. Feature Engineering (03_feature_splits.ipynb)
-    # ──────────────────────────────────────────────────────────────
-    print("\n3⃣  공통 피처 생성 & 데이터 분할 (papermill)")
-    try:
-        pm.execute_notebook(
-            input_path  = os.path.join("notebooks", "03_feature_splits.ipynb"),
-            output_path = os.path.join(artifacts_dir, "03_feature_splits.out.ipynb"),
-            parameters  = {
-                "data_dir":   data_dir,
-                "out_dir":    module_dir,
-                "clf_window":      1,
-                "reg_window":     10,
-                "cluster_window": 10,
-            },
-            kernel_name=None,
+
+def _feature_inputs(data_dir: str) -> Dict[str, str]:
+    """utils.features 입력 경로 — 일봉은 full_price_history.csv 우선, 없으면 price_history.csv"""
+    p = _paths(data_dir)
+    full_hist = os.path.join(data_dir, "full_price_history.csv")
+    return {
+        "div_path":    p["ml_ready"],
+        "price_path":  full_hist if os.path.exists(full_hist) else p["hist"],
+        "sector_path": os.path.join(data_dir, "sector_info.csv"),
+    }
+
+
+def _convert_module_stores(module_dir: str) -> None:
+    """3-1. 모듈 CSV → float32 피처 스토어 (<name>.fs) 변환"""
+    from utils.feature_store import csv_to_feature_store, is_store_fresh, store_path
+
+    for name in MODULE_DATASETS:
+        fp = os.path.join(module_dir, f"{name}.csv")
+        if os.path.exists(fp) and not is_store_fresh(store_path(module_dir, name), fp):
+            csv_to_feature_store(fp)
+            print(f"   ✅ 피처 스토어 변환 → {name}.fs")
+
+
+def stage_features(
+    data_dir: str,
+    shard: Optional[ShardSpec] = None,
+    full: bool = False,
+    verify: bool = False,
+    incremental: bool = False,
+) -> None:
+    """3. Feature Engineering + 피처 스토어 변환
+
+    기본은 03_feature_splits.ipynb (papermill).
+    incremental=True 면 utils.features 증분 빌드 — 신규·변경 이벤트만 재계산, 해당 월만
+    div_amount_rank 재랭크. 노트북과 달리 corp_name 을 이벤트 행에서 가져오고(같은 날 같은 종목
+    공시가 여러 건이어도 행이 늘지 않음) features_common.csv 도 생성한다.
+    full=True(캐시 무시 전체 재계산)·verify=True(전체 재빌드와 비교)는 증분 빌드를 뜻한다.
+    shard 지정 시 담당 종목의 이벤트별 피처만 계산 (div_amount_rank 등 횡단면 피처는 merge 단계에서 완성).
+    """
+    p = _paths(data_dir)
+    if shard is not None:
+        from utils.features import build_module_datasets
+        from utils.sharding import shard_dir
+
+        print(f"\n3⃣  공통 피처 생성 & 데이터 분할 [{shard.name}]")
+        build_module_datasets(
+            **_feature_inputs(data_dir),
+            out_dir=shard_dir(data_dir, "features", shard),
+            shard=shard,
         )
-    except Exception:
-        print("   ⚠️  03_feature_splits.ipynb 실행 실패 — 스택트레이스 출력")
-        traceback.print_exc()
-        sys.exit(1)
-
-    # ──────────────────────────────────────────────────────────────
-    # 4. Embedding & FAISS
-    # ──────────────────────────────────────────────────────────────
+        return
+
+    if not (incremental or full or verify):
+        print("\n3⃣  공통 피처 생성 & 데이터 분할 (papermill)")
+        try:
+            _execute_notebook(
+                "03_feature_splits.ipynb",
+                p["artifacts_dir"],
+                parameters = {
+                    "data_dir":   data_dir,
+                    "out_dir":    p["module_dir"],
+                    "clf_window":      1,
+                    "reg_window":     10,
+                    "cluster_window": 10,
+                },
+                kernel_name=None,
+            )
+        except Exception:
+            print("   ⚠️  03_feature_splits.ipynb 실행 실패 — 스택트레이스 출력")
+            traceback.print_exc()
+            sys.exit(1)
+    else:
+        from utils.features import update_module_datasets, verify_incremental
+
+        print(f"\n3⃣  공통 피처 생성 & 데이터 분할 ({'전체' if full else '증분'})")
+        inputs = _feature_inputs(data_dir)
+        update_module_datasets(**inputs, out_dir=p["module_dir"], full=full)
+        if verify and not verify_incremental(**inputs, out_dir=p["module_dir"]):
+            sys.exit(1)
+
+    _convert_module_stores(p["module_dir"])
+
+
+def stage_embed(data_dir: str, max_workers: int = 10) -> None:
+    """4. report_text 추출 + Embedding & FAISS"""
+    from utils import embed_utils
+    from utils.text_extract import add_report_text
+
+    p = _paths(data_dir)
+    # 공시 HTML → 정규화 report_text (프로세스 풀, rcept_no 캐시)
+    n_text = add_report_text(p["jsonl"], max_workers=max_workers)
+    print(f"   ✅ report_text 추출 → {n_text:,}건")
+
     print("\n4⃣  문서 임베딩 & FAISS 색인")
     embed_utils.jsonl_to_faiss(
-        jsonl_path=jsonl_path,
+        jsonl_path=p["jsonl"],
         faiss_path=os.path.join(data_dir, "dividend_faiss_index"),
     )
     print("   ✅ FAISS 인덱스 저장 완료")
 
-    # ──────────────────────────────────────────────────────────────
-    # 5. Notebook-based model training (04-06)
-    # ──────────────────────────────────────────────────────────────
+
+def stage_train(data_dir: str, skip_notebooks: List[str] | None = None) -> None:
+    """5. Notebook-based model training (04-06)"""
+    skip_notebooks = skip_notebooks or []
+    p = _paths(data_dir)
     nb_seq = [
         "04_classification.ipynb",
         "05_regression.ipynb",
@@ -229,12 +396,12 @@ def run_pipeline(
             continue
         print(f"\n5⃣  papermill 실행 → {nb}")
         try:
-            pm.execute_notebook(
-                input_path  = os.path.join("notebooks", nb),
-                output_path = os.path.join(artifacts_dir, nb.replace(".ipynb", ".out.ipynb")),
-                parameters  = {
+            _execute_notebook(
+                nb,
+                p["artifacts_dir"],
+                parameters = {
                     "data_dir":  data_dir,
-                    "module_dir": module_dir,
+                    "module_dir": p["module_dir"],
                 },
             )
         except FileNotFoundError:
@@ -243,18 +410,99 @@ def run_pipeline(
             print(f"   ⚠️  {nb} 실행 오류 — 계속 진행")
             traceback.print_exc()
 
-    # ──────────────────────────────────────────────────────────────
-    # 6. Ensemble & Master CSV
-    # ──────────────────────────────────────────────────────────────
-    master_csv_path = os.path.join(data_dir, "all_stocks_master.csv")
+    # 05 가 다시 쓴 regression_enriched.csv 등 → 피처 스토어 갱신 (변경된 CSV 만)
+    _convert_module_stores(p["module_dir"])
+
+
+def stage_watch(
+    data_dir: str,
+    interval: float = 5.0,
+    max_polls: Optional[int] = None,
+    max_workers: int = 4,
+    api_base: Optional[str] = None,
+) -> int:
+    """실시간 감시: dart_watcher(메인 스레드) → FilingQueue → FilingScorer(소비 스레드)
+
+    watcher 종료(max_polls 도달·Ctrl+C) 후 큐에 남은 공시까지 스코어링하고 처리 건수 반환
+    """
+    import threading
+
+    from utils.dart_watcher import consume_queue, watch_dividend_filings
+    from utils.filing_scorer import FilingScorer
+
+    p = _paths(data_dir)
+    queue_dir = os.path.join(data_dir, "filing_queue")
+    scorer = FilingScorer(data_dir)
+    stop = threading.Event()
+    handled = [0]
+
+    def _consume() -> None:
+        while not stop.is_set():
+            handled[0] += consume_queue(queue_dir, scorer, poll_interval=1.0, max_idle_polls=1)
+
+    consumer = threading.Thread(target=_consume, daemon=True)
+    consumer.start()
+    try:
+        watch_dividend_filings(
+            queue_dir=queue_dir,
+            state_path=os.path.join(data_dir, "watcher_state.json"),
+            jsonl_path=p["jsonl"],
+            csv_path=p["csv"],
+            interval=interval,
+            max_polls=max_polls,
+            max_workers=max_workers,
+            api_base=api_base,
+        )
+    except KeyboardInterrupt:
+        print("\n⏹  watcher 중지")
+    finally:
+        stop.set()
+        consumer.join()
+    # 마지막 폴링분 소비 (scorer 는 rcept_no 단위 멱등)
+    handled[0] += consume_queue(queue_dir, scorer, poll_interval=0, max_idle_polls=1)
+    print(f"   ✅ 실시간 스코어링 {handled[0]:,}건 → {scorer.out_path}")
+    return handled[0]
+
+
+def stage_ensemble(
+    data_dir: str,
+    skip_notebooks: List[str] | None = None,
+    n_clusters: int = 4,
+    refit_clusters: bool = False,
+    shard: Optional[ShardSpec] = None,
+) -> None:
+    """6. Ensemble & Master CSV + 7. 08_dividend.ipynb 후처리
+
+    shard 지정 시 노트북 없이 담당 종목만 스코어링 → shards/score/<shard>/ (merge 로 병합)
+    """
+    skip_notebooks = skip_notebooks or []
+    p = _paths(data_dir)
+    module_dir, master_csv_path = p["module_dir"], p["master_csv"]
+
+    if shard is not None:
+        from utils.sharding import shard_dir
+
+        print(f"\n6⃣  Master CSV 스코어링 [{shard.name}]")
+        _build_master_csv(
+            module_dir, data_dir,
+            os.path.join(shard_dir(data_dir, "score", shard), os.path.basename(master_csv_path)),
+            n_clusters=n_clusters, shard=shard,
+        )
+        return
+
+    def _inline() -> None:
+        _build_master_csv(
+            module_dir, data_dir, master_csv_path,
+            n_clusters=n_clusters, refit_clusters=refit_clusters,
+        )
 
     if "07_ensemble.ipynb" not in skip_notebooks and os.path.exists(os.path.join("notebooks", "07_ensemble.ipynb")):
         print("\n6⃣  papermill 실행 → 07_ensemble.ipynb")
         try:
-            pm.execute_notebook(
-                input_path  = os.path.join("notebooks", "07_ensemble.ipynb"),
-                output_path = os.path.join(artifacts_dir, "07_ensemble.out.ipynb"),
-                parameters  = {
+            _execute_notebook(
+                "07_ensemble.ipynb",
+                p["artifacts_dir"],
+                parameters = {
                     "module_dir": module_dir,
                     "data_dir":   data_dir,
                     "master_csv": master_csv_path,
@@ -263,23 +511,21 @@ def run_pipeline(
         except Exception:
             print("   ⚠️  07_ensemble.ipynb 실행 실패 — 코드 fallback 으로 전환")
             traceback.print_exc()
-            _build_master_csv(module_dir, data_dir, master_csv_path)
+            _inline()
     else:
         # 노트북 스킵 또는 없음 → inline 함수 이용
         print("\n6⃣  Ensemble 노트북 건너뜀 — inline 함수로 Master CSV 생성")
-        _build_master_csv(module_dir, data_dir, master_csv_path)
+        _inline()
 
-    # ──────────────────────────────────────────────────────────────
     # 7. Optional: 08_dividend.ipynb 후처리
-    # ──────────────────────────────────────────────────────────────
     nb08 = "08_dividend.ipynb"
     if nb08 not in skip_notebooks and os.path.exists(os.path.join("notebooks", nb08)):
         print("\n7⃣  papermill 실행 → 08_dividend.ipynb")
         try:
-            pm.execute_notebook(
-                input_path  = os.path.join("notebooks", nb08),
-                output_path = os.path.join(artifacts_dir, nb08.replace(".ipynb", ".out.ipynb")),
-                parameters  = {
+            _execute_notebook(
+                nb08,
+                p["artifacts_dir"],
+                parameters = {
                     "data_dir": data_dir,
                     "master_csv": master_csv_path,
                 },
@@ -290,26 +536,221 @@ def run_pipeline(
     else:
         print("   ⏭️  08_dividend.ipynb  건너뜀")
 
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Shard 병합 (워커 N개 완료 후 1회 — 공유 파일시스템의 완료 마커 대기)
+# ──────────────────────────────────────────────────────────────────────────────
+SHARDABLE = ("collect", "prices", "features", "ensemble")
+
+
+def merge_stage(data_dir: str, stage: str, count: int, timeout: Optional[float] = None) -> None:
+    """stage 의 shard 출력 count 개를 메인 출력으로 결정적 병합"""
+    p = _paths(data_dir)
+    if stage == "collect":
+        from utils.dart_api import merge_collect_shards
+
+        merge_collect_shards(data_dir, count, p["jsonl"], p["csv"], timeout=timeout)
+    elif stage == "prices":
+        from utils.price_fetcher import merge_price_shards
+
+        merge_price_shards(data_dir, count, p["hist"], p["check"], timeout=timeout)
+    elif stage == "features":
+        from utils.features import merge_feature_shards
+
+        merge_feature_shards(data_dir, count, p["module_dir"], timeout=timeout)
+        _convert_module_stores(p["module_dir"])
+    elif stage == "ensemble":
+        _merge_master_shards(data_dir, count, p["master_csv"], timeout=timeout)
+    else:
+        raise ValueError(f"shard 병합을 지원하지 않는 단계: {stage}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Main pipeline function
+# ──────────────────────────────────────────────────────────────────────────────
+
+def run_pipeline(
+    start_date: str = "20130101",
+    end_date:   str = datetime.today().strftime("%Y%m%d"),
+    data_dir:   str = "data",
+    max_workers: int = 10,
+    skip_notebooks: List[str] | None = None,
+) -> None:
+    """배당 공시 Agent 전체 파이프라인
+
+    Parameters
+    ----------
+    start_date     : str   – DART 조회 시작일 (YYYYMMDD)
+    end_date       : str   – DART 조회 종료일 (YYYYMMDD)
+    data_dir       : str   – 프로젝트 데이터 루트
+    max_workers    : int   – 멀티스레드 병렬 수집 워커 수
+    skip_notebooks : list  – 실행을 건너뛰고 싶은 노트북 파일명 목록 (optional)
+    """
+    from dotenv import load_dotenv
+
+    # 0. env & dirs
+    load_dotenv(dotenv_path=".env")
+    os.makedirs(data_dir, exist_ok=True)
+
+    stage_collect(data_dir, start_date, end_date, max_workers=max_workers)
+    stage_clean(data_dir)
+    stage_prices(data_dir, max_workers=max_workers)
+    stage_features(data_dir)
+    stage_embed(data_dir, max_workers=max_workers)
+    stage_train(data_dir, skip_notebooks=skip_notebooks)
+    stage_ensemble(data_dir, skip_notebooks=skip_notebooks)
+
     print("\n🎉  전체 파이프라인 완료!")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    # 예시: python run_pipeline.py 20130101 20250630 data 8 04_classification.ipynb
+# CLI
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _option_parents(suppress: bool = False) -> Dict[str, "argparse.ArgumentParser"]:
+    """공통 옵션 묶음. 서브커맨드용(suppress=True)은 기본값을 두지 않아
+    `run_pipeline.py --data x ensemble` 처럼 앞에 준 값이 덮어써지지 않게 함"""
     import argparse
 
-    parser = argparse.ArgumentParser(description="Dividend Agent End-to-End Pipeline")
-    parser.add_argument("--start",  type=str, default="20130101", help="시작일 (YYYYMMDD)")
-    parser.add_argument("--end",    type=str, default=datetime.today().strftime("%Y%m%d"), help="종료일 (YYYYMMDD)")
-    parser.add_argument("--data",   type=str, default="data", help="데이터 디렉토리")
-    parser.add_argument("--workers",type=int, default=10, help="max_workers")
-    parser.add_argument("--skip",   nargs="*", default=[], help="건너뛸 노트북 파일명 목록")
-    args = parser.parse_args()
-
-    run_pipeline(
-        start_date=args.start,
-        end_date=args.end,
-        data_dir=args.data,
-        max_workers=args.workers,
-        skip_notebooks=args.skip,
-    )
\ No newline at end of file
+    def dflt(value):
+        return argparse.SUPPRESS if suppress else value
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data",   type=str, default=dflt("data"), help="데이터 디렉토리")
+
+    workers = argparse.ArgumentParser(add_help=False)
+    workers.add_argument("--workers",type=int, default=dflt(10), help="max_workers")
+
+    dates = argparse.ArgumentParser(add_help=False)
+    dates.add_argument("--start",  type=str, default=dflt("20130101"), help="시작일 (YYYYMMDD)")
+    dates.add_argument("--end",    type=str, default=dflt(datetime.today().strftime("%Y%m%d")), help="종료일 (YYYYMMDD)")
+
+    skip = argparse.ArgumentParser(add_help=False)
+    skip.add_argument("--skip",   nargs="*", default=dflt([]), help="건너뛸 노트북 파일명 목록")
+    return {"common": common, "workers": workers, "dates": dates, "skip": skip}
+
+
+def _build_parser():
+    import argparse
+
+    top = _option_parents()
+    o = _option_parents(suppress=True)
+
+    # 분할 실행: --shard i/n = 워커 1개 (다른 머신과 공유 FS), --shards n = 로컬 n 프로세스 + 병합
+    sharding = argparse.ArgumentParser(add_help=False)
+    mode = sharding.add_mutually_exclusive_group()
+    mode.add_argument("--shard",  type=str, default=None, help="이 워커가 맡을 shard 'i/n' (stock_code 해시)")
+    mode.add_argument("--shards", type=int, default=None, help="로컬 워커 n개 실행 후 병합")
+
+    # 서브커맨드 없이 실행하면 기존처럼 전체 파이프라인
+    parser = argparse.ArgumentParser(
+        description="Dividend Agent End-to-End Pipeline",
+        parents=[top["common"], top["workers"], top["dates"], top["skip"]],
+    )
+    sub = parser.add_subparsers(dest="cmd", metavar="{collect,clean,prices,features,embed,train,ensemble,merge,watch}")
+    sub.add_parser("collect",  parents=[o["common"], o["workers"], o["dates"], sharding], help="1. DART 배당 공시 증분 수집")
+    sub.add_parser("clean",    parents=[o["common"]], help="2. ML 학습용 정제")
+    sub.add_parser("prices",   parents=[o["common"], o["workers"], sharding], help="2-1. 주가 수집 & 윈도우 검증")
+    feat = sub.add_parser("features", parents=[o["common"], sharding], help="3. 피처 생성·분할(증분) + 피처 스토어 변환")
+    feat.add_argument("--incremental", action="store_true", help="노트북 대신 utils.features 증분 빌드")
+    feat.add_argument("--full",        action="store_true", help="증분 빌드, 캐시 무시하고 전체 이벤트 재계산")
+    feat.add_argument("--verify",      action="store_true", help="증분 빌드 후 전체 재빌드와 비교 (다르면 종료코드 1)")
+    sub.add_parser("embed",    parents=[o["common"], o["workers"]], help="4. report_text 추출 + FAISS 색인")
+    sub.add_parser("train",    parents=[o["common"], o["skip"]], help="5. 04~06 노트북 학습")
+    ens = sub.add_parser("ensemble", parents=[o["common"], o["skip"], sharding], help="6~7. 앙상블 Master CSV + 08 후처리")
+    ens.add_argument("--clusters", type=int, default=4, help="K-Means 클러스터 수")
+    ens.add_argument("--refit",    action="store_true", help="저장된 클러스터 모델 무시하고 재학습")
+    mrg = sub.add_parser("merge", parents=[o["common"]], help="shard 출력 병합 (모든 워커 완료 대기)")
+    mrg.add_argument("stage",     choices=SHARDABLE)
+    mrg.add_argument("--shards",  type=int, required=True, help="shard 개수")
+    mrg.add_argument("--timeout", type=float, default=None, help="완료 마커 대기 시간(초), 기본: 즉시 확인")
+    wch = sub.add_parser("watch", parents=[o["common"]], help="실시간 배당 공시 감시 + 스코어링")
+    wch.add_argument("--interval", type=float, default=5.0, help="list.json 폴링 주기 (초)")
+    wch.add_argument("--polls",    type=int, default=None, help="폴링 횟수 제한 (기본: 무한)")
+    wch.add_argument("--api",      type=str, default=None, help="DART API 주소 (stub 테스트용)")
+    return parser
+
+
+def _without_option(argv: List[str], flag: str) -> List[str]:
+    """argv 에서 '--flag v' / '--flag=v' 제거 (로컬 워커 재실행용)"""
+    out, skip_next = [], False
+    for a in argv:
+        if skip_next:
+            skip_next = False
+        elif a == flag:
+            skip_next = True
+        elif not a.startswith(flag + "="):
+            out.append(a)
+    return out
+
+
+def main(argv: List[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    args = _build_parser().parse_args(argv)
+
+    if args.cmd is None:
+        run_pipeline(
+            start_date=args.start,
+            end_date=args.end,
+            data_dir=args.data,
+            max_workers=args.workers,
+            skip_notebooks=args.skip,
+        )
+        return
+
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=".env")
+    os.makedirs(args.data, exist_ok=True)
+    t0 = time.perf_counter()
+
+    if args.cmd == "merge":
+        merge_stage(args.data, args.stage, args.shards, timeout=args.timeout)
+        print(f"\n⏱  merge {args.stage} 완료 ({time.perf_counter() - t0:.1f}s)")
+        return
+
+    if getattr(args, "shards", None):
+        from utils.sharding import run_local_shards
+
+        run_local_shards([os.path.abspath(__file__), *_without_option(argv, "--shards")], args.shards)
+        merge_stage(args.data, args.cmd, args.shards)
+        print(f"\n⏱  {args.cmd} (shard {args.shards}개) 완료 ({time.perf_counter() - t0:.1f}s)")
+        return
+
+    shard = None
+    if getattr(args, "shard", None):
+        from utils.sharding import ShardSpec
+
+        shard = ShardSpec.parse(args.shard)
+
+    if args.cmd == "collect":
+        stage_collect(args.data, args.start, args.end, max_workers=args.workers, shard=shard)
+    elif args.cmd == "clean":
+        stage_clean(args.data)
+    elif args.cmd == "prices":
+        stage_prices(args.data, max_workers=args.workers, shard=shard)
+    elif args.cmd == "features":
+        stage_features(
+            args.data, shard=shard, full=args.full, verify=args.verify, incremental=args.incremental,
+        )
+    elif args.cmd == "embed":
+        stage_embed(args.data, max_workers=args.workers)
+    elif args.cmd == "train":
+        stage_train(args.data, skip_notebooks=args.skip)
+    elif args.cmd == "ensemble":
+        stage_ensemble(
+            args.data, skip_notebooks=args.skip, n_clusters=args.clusters,
+            refit_clusters=args.refit, shard=shard,
+        )
+    elif args.cmd == "watch":
+        stage_watch(args.data, interval=args.interval, max_polls=args.polls, api_base=args.api)
+
+    print(f"\n⏱  {args.cmd} 완료 ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    # 예시: python run_pipeline.py --start 20130101 --end 20250630 --data data --workers 8
+    #       python run_pipeline.py ensemble --skip 07_ensemble.ipynb 08_dividend.ipynb
+    #       python run_pipeline.py features --shards 4              # 로컬 4 프로세스 + 병합
+    #       python run_pipeline.py prices --shard 0/4  (머신별)  →  python run_pipeline.py merge prices --shards 4
+    main()
@@ -0,0 +1,5 @@
+# tests/conftest.py — 저장소 루트를 import 경로에 추가 (utils 패키지)
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,99 @@
+# tests/test_backtest.py
+import numpy as np
+import pandas as pd
+
+from utils.backtest import LABEL_HORIZON, _run_period, candidate_window, run_backtest_grid
+
+
+def _prices(codes, n_days=30, jump_code=None, jump_from=None):
+    dates = pd.bdate_range("2024-01-01", periods=n_days)
+    rows = []
+    for code in codes:
+        close = np.full(n_days, 100.0)
+        if code == jump_code:
+            close[jump_from:] = 150.0  # jump_from 일부터 +50%
+        rows += [{"stock_code": code, "date": d, "close": c} for d, c in zip(dates, close)]
+    return pd.DataFrame(rows), dates
+
+
+def test_candidate_label_never_uses_prices_after_entry():
+    """후보 이벤트의 라벨(공시 후 첫 거래일 + ret_1d) 종가가 진입일(t) 이후면 실패"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-01", periods=60).to_numpy(dtype="datetime64[D]")
+    ev_dt = np.sort(dates[0] + rng.integers(0, 90, size=200).astype("timedelta64[D]"))
+    pos = np.searchsorted(dates, ev_dt, side="left")
+    known_at = pos + LABEL_HORIZON
+
+    for t in range(len(dates)):
+        lo, hi = candidate_window(ev_dt, known_at, dates, t, lookback_days=30)
+        if hi > lo:
+            assert (pos[lo:hi] + LABEL_HORIZON <= t).all()
+            assert (ev_dt[lo:hi] < dates[t]).all()
+
+
+def test_same_day_filing_not_traded_on_its_own_return():
+    """리밸런싱 당일 공시 종목이 다음 날 급등해도 그 구간 포트폴리오에 들어가면 안 됨"""
+    prices, dates = _prices(["000001"], jump_code="000001", jump_from=6)
+    events = pd.DataFrame({
+        "stock_code": ["000001"],
+        "rcept_dt":   [dates[5]],
+        "y_pred":     [0.05],
+        "p_up":       [0.99],
+        "cluster":    [2],
+    })
+    summary, curves = run_backtest_grid(
+        events, prices, weights=[(1.0, 0.0, 0.0)], sizes=[1],
+        rebalance_days=3, lookback_days=30, n_jobs=1, return_curves=True,
+    )
+    # 첫 리밸런싱(공시일 = 5일차)은 후보 없음 → 6~8일차 급등 구간은 현금
+    first_period = curves.loc[dates[6]:dates[8]]
+    assert np.allclose(first_period.to_numpy(), 1.0)
+    assert summary["total_return"].iloc[0] == 0.0
+
+
+def test_candidate_window_boundaries():
+    """known_at == t 는 포함, t+1 은 제외 / 리밸런싱 당일 공시 제외 / lookback 경계일 제외"""
+    dates = pd.bdate_range("2024-01-01", periods=20).to_numpy(dtype="datetime64[D]")
+    t = 10
+    ev_dt = np.array([dates[t] - np.timedelta64(7, "D"), dates[t - 2], dates[t - 1], dates[t]])
+    known_at = np.searchsorted(dates, ev_dt, side="left") + LABEL_HORIZON
+
+    # 7일 전 공시 = lookback 경계 → 제외, t-2 공시(known_at = t-1) 포함,
+    # t-1 공시는 known_at == t → 포함, t 당일 공시 제외
+    assert candidate_window(ev_dt, known_at, dates, t, lookback_days=7) == (1, 3)
+    assert candidate_window(ev_dt, known_at, dates, t, lookback_days=8) == (0, 3)
+    # 라벨 구간이 1일 길면 t-1 공시는 known_at = t+1 → 제외
+    assert candidate_window(ev_dt, known_at + 1, dates, t, lookback_days=7) == (1, 2)
+    # 토요일(2024-01-13) 공시: 라벨은 다음 거래일 t(월) 부터 → t 리밸런싱 후보 아님
+    sat = np.array(["2024-01-13"], dtype="datetime64[D]")
+    known = np.searchsorted(dates, sat, side="left") + LABEL_HORIZON
+    assert known[0] == t + LABEL_HORIZON
+    assert candidate_window(sat, known, dates, t, lookback_days=7) == (0, 0)
+
+
+def _period(y_pred, p_up, long_only):
+    close = np.full((3, len(y_pred)), 100.0)
+    cand = {
+        "col": np.arange(len(y_pred)),
+        "y_pred": np.asarray(y_pred, dtype=np.float64),
+        "p_up": np.asarray(p_up, dtype=np.float64),
+        "cluster": np.zeros(len(y_pred), dtype=np.int64),
+    }
+    res = _run_period(close, 0, 2, cand, np.array([[0.0, 1.0, 0.0]]), [len(y_pred)], {0: 0}, long_only)
+    return res["w_start"][:, 0]
+
+
+def test_weights_match_notebook_score_over_sum():
+    # β=1 → score = p_up - 0.5
+    p_up = np.array([0.9, 0.7, 0.6])
+    score = p_up - 0.5
+    for long_only in (True, False):
+        np.testing.assert_allclose(_period([0, 0, 0], p_up, long_only), score / score.sum())
+
+    # 음수 점수 포함: 07 은 score / Σscore (음수 비중), 기본값은 음수 종목 0 후 재정규화
+    p_up = np.array([0.9, 0.7, 0.4])
+    score = p_up - 0.5
+    np.testing.assert_allclose(_period([0, 0, 0], p_up, False), score / score.sum())
+    np.testing.assert_allclose(_period([0, 0, 0], p_up, True), [2 / 3, 1 / 3, 0.0])
+    # 양수 점수 없음 → 동일 비중
+    np.testing.assert_allclose(_period([0, 0, 0], [0.2, 0.3, 0.4], True), [1 / 3] * 3)
@@ -0,0 +1,69 @@
+# tests/test_cluster_model.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cluster_model import (
+    DEFAULT_CLUSTER_SCORE,
+    assign_clusters,
+    fit_cluster_model,
+    legacy_cluster_score,
+    remap_cluster_scores,
+    summarize_clusters,
+    sweep_k,
+)
+
+# (y_pred, residual) 중심 — 일부러 y_pred 순서와 다르게 나열
+CENTERS = [(0.07, -0.04), (-0.03, 0.0), (0.02, 0.03), (0.0, -0.01)]
+
+
+def _blobs(n_each=150, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [
+        (y + rng.normal(0, 0.002), r + rng.normal(0, 0.002), i)
+        for i, (y, r) in enumerate(CENTERS) for _ in range(n_each)
+    ]
+    return pd.DataFrame(rows, columns=["y_pred", "residual", "blob"]).sample(frac=1, random_state=seed)
+
+
+def test_remap_orders_by_mean_pred():
+    scores = {0: "a", 1: "b", 2: "c", 3: "d"}
+    mean_pred = {0: 0.5, 1: -0.2, 2: 0.1, 3: 0.0}
+    assert remap_cluster_scores(scores, mean_pred) == {0: "b", 1: "d", 2: "c", 3: "a"}
+
+
+def test_fitted_labels_follow_y_pred_and_legacy_scores(tmp_path):
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    df = _blobs()
+    model = fit_cluster_model(df, n_clusters=4)
+    labels = assign_clusters(df, model)
+    means = summarize_clusters(df, labels)["mean_pred"].to_numpy()
+    assert (np.diff(means) > 0).all()
+
+    # 원 KMeans 라벨 기준 점수표 + 그 실행의 요약 저장 → 재학습 모델 라벨 기준으로 재매핑
+    raw = KMeans(n_clusters=4, random_state=7, n_init=10).fit_predict(
+        StandardScaler().fit_transform(df[["y_pred", "residual"]])
+    )
+    summary = summarize_clusters(df, raw)
+    summary["score"] = [10 * b for b in pd.Series(df["blob"].to_numpy()).groupby(raw).first()]
+    fp = tmp_path / "summary.csv"
+    summary.reset_index().to_csv(fp, index=False)
+
+    score = legacy_cluster_score(str(fp))
+    # 같은 blob 은 원 라벨 점수와 새 라벨 점수가 같아야 함
+    assert all(score[lab] == 10 * b for lab, b in zip(labels, df["blob"]))
+
+
+def test_default_score_from_saved_legacy_summary():
+    assert DEFAULT_CLUSTER_SCORE == {0: -1, 1: 0, 2: 1, 3: -1}
+
+
+@pytest.mark.parametrize("mini_batch", [False, True])
+def test_sweep_k_finds_blob_count(mini_batch):
+    df = _blobs()
+    res = sweep_k(df, ks=range(2, 7), sample_size=300, mini_batch=mini_batch, n_jobs=1)
+    assert list(res["k"]) == [2, 3, 4, 5, 6]
+    assert res.loc[res["silhouette"].idxmax(), "k"] == 4
+    assert res.set_index("k")["inertia"].loc[4] < res.set_index("k")["inertia"].loc[3]
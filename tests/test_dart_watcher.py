@@ -0,0 +1,177 @@
+# tests/test_dart_watcher.py
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import run_pipeline
+from utils import dart_api, dart_watcher, data_cleaning
+from utils.dart_stub import StubDartServer, make_synthetic_filings
+from utils.dart_watcher import FilingQueue, consume_queue, watch_dividend_filings
+from utils.filing_scorer import FilingScorer
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    monkeypatch.setenv("DART_API_KEY", "test")
+
+
+def _dividends(filings):
+    return sorted(f["rcept_no"] for f in filings if "배당" in f["report_nm"])
+
+
+def _watch(tmp_path, stub, **kw):
+    kw = {"interval": 0.01, "max_polls": 1, "max_workers": 2, **kw}
+    return watch_dividend_filings(
+        queue_dir=str(tmp_path / "queue"),
+        state_path=str(tmp_path / "state.json"),
+        jsonl_path=str(tmp_path / "filings.jsonl"),
+        api_base=stub.api_base,
+        **kw,
+    )
+
+
+def _queued(tmp_path):
+    root = tmp_path / "queue"
+    return sorted(n[:-5] for s in FilingQueue.STAGES for n in os.listdir(root / s))
+
+
+def _jsonl(tmp_path):
+    with open(tmp_path / "filings.jsonl", encoding="utf-8") as f:
+        return [json.loads(line)["rcept_no"] for line in f if line.strip()]
+
+
+def test_restart_does_not_duplicate(tmp_path):
+    filings = make_synthetic_filings(6, every=0)
+    with StubDartServer(filings) as stub:
+        assert _watch(tmp_path, stub) == 3
+        consume_queue(str(tmp_path / "queue"), lambda rec: None, poll_interval=0, max_idle_polls=1)
+        # 재시작: done/ 으로 옮겨진 공시도 다시 적재·기록하지 않음
+        assert _watch(tmp_path, stub, max_polls=2) == 0
+
+    assert _queued(tmp_path) == _dividends(filings)
+    assert _jsonl(tmp_path) == _dividends(filings)
+
+
+def test_cursor_poll_stops_at_last_seen(tmp_path, monkeypatch):
+    monkeypatch.setattr(dart_watcher.time, "sleep", lambda _: None)
+    filings = make_synthetic_filings(250, every=0)
+    for i, f in enumerate(filings):  # 배당 공시는 50건 중 1건
+        if i % 50:
+            f["report_nm"] = "주요사항보고서(자기주식취득결정)"
+    with StubDartServer(filings) as stub:
+        assert _watch(tmp_path, stub, max_polls=3) == 5
+        # 시작 재조회 3페이지 + 커서 폴링 2회 × 1페이지
+        assert stub.list_calls == 5
+        assert all(q["pblntf_ty"] == "I" for q in stub.list_queries)
+        assert [q["bgn_de"] == q["end_de"] for q in stub.list_queries] == [False] * 3 + [True] * 2
+
+    with open(tmp_path / "state.json", encoding="utf-8") as f:
+        assert json.load(f)["cursor"] == max(f["rcept_no"] for f in filings)
+
+
+def test_late_lower_rcept_no_is_picked_up_by_rescan(tmp_path, monkeypatch):
+    filings = make_synthetic_filings(4, every=0)
+    late = filings[0]  # 가장 낮은 rcept_no 가 나중에 공개
+    late["publish_after"] = 1e9
+    monkeypatch.setattr(dart_watcher.time, "sleep", lambda _: late.update(publish_after=0))
+    with StubDartServer(filings) as stub:
+        # 커서 폴링은 커서 이하에서 멈추므로 보지 못함
+        assert _watch(tmp_path, stub, max_polls=2) == 1
+        # 재조회(재시작 시 · rescan_interval 경과 시)에서 보완
+        assert _watch(tmp_path, stub, max_polls=2, rescan_interval=0) == 1
+
+    assert _queued(tmp_path) == _dividends(filings)
+
+
+def test_document_rate_limit_backs_off_and_retries(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(dart_watcher.time, "sleep", sleeps.append)
+    filings = make_synthetic_filings(4, every=0)
+    with StubDartServer(filings, doc_rate_limit_first=2) as stub:
+        assert _watch(tmp_path, stub, max_polls=3, max_backoff=1.0) == 2
+
+    assert sleeps[0] > 0.01  # 첫 폴링 본문 전부 020 → 백오프
+    assert sleeps[1:] == [0.01]
+    assert _queued(tmp_path) == _dividends(filings)
+    with open(tmp_path / "state.json", encoding="utf-8") as f:
+        assert json.load(f)["retry"] == []
+
+
+def test_scorer_is_idempotent_per_rcept_no(tmp_path):
+    filings = make_synthetic_filings(4, every=0)
+    with StubDartServer(filings) as stub:
+        _watch(tmp_path, stub)
+
+    scorer = FilingScorer(str(tmp_path))
+    queue_dir = str(tmp_path / "queue")
+    assert consume_queue(queue_dir, scorer, poll_interval=0, max_idle_polls=1) == 2
+
+    # 처리 중 종료 → processing/ 재전달돼도 결과는 rcept_no 당 1줄
+    queue = FilingQueue(queue_dir)
+    for name in os.listdir(tmp_path / "queue" / "done"):
+        os.replace(tmp_path / "queue" / "done" / name, tmp_path / "queue" / "processing" / name)
+    assert queue.requeue_processing() == 2
+    consume_queue(queue_dir, scorer, poll_interval=0, max_idle_polls=1)
+
+    with open(scorer.out_path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    assert sorted(r["rcept_no"] for r in rows) == _dividends(filings)
+    assert all(r["per_share_common"] > 0 and r["p_up"] is None for r in rows)
+
+
+def test_handler_error_moves_item_to_failed(tmp_path):
+    filings = make_synthetic_filings(4, every=0)
+    with StubDartServer(filings) as stub:
+        _watch(tmp_path, stub)
+
+    bad = _dividends(filings)[0]
+
+    def handler(rec):
+        if rec["rcept_no"] == bad:
+            raise ValueError("malformed")
+
+    queue_dir = str(tmp_path / "queue")
+    assert consume_queue(queue_dir, handler, poll_interval=0, max_idle_polls=1) == 1
+    assert os.listdir(tmp_path / "queue" / "failed") == [f"{bad}.json"]
+    assert FilingQueue(queue_dir).seen(bad)
+
+
+def test_watch_then_collect_then_clean(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    filings = make_synthetic_filings(6, every=0)
+    late = filings[4]  # watcher 종료 후 공개 → 배치 수집기가 수집
+    late["publish_after"] = 1e9
+    corps = pd.DataFrame([
+        {"corp_code": f["corp_code"], "corp_name": f["corp_name"], "stock_code": f["stock_code"]}
+        for f in filings
+    ])
+    monkeypatch.setattr(dart_api, "load_corps", lambda: corps)
+    monkeypatch.setattr(data_cleaning, "_get_current_listed_codes", lambda: set(corps["stock_code"]))
+
+    data_dir = tmp_path / "data"
+    p = run_pipeline._paths(str(data_dir))
+    with StubDartServer(filings) as stub:
+        watch_dividend_filings(
+            queue_dir=str(data_dir / "filing_queue"),
+            state_path=str(data_dir / "watcher_state.json"),
+            jsonl_path=p["jsonl"], csv_path=p["csv"],
+            interval=0, max_polls=1, api_base=stub.api_base,
+        )
+        late["publish_after"] = 0
+        monkeypatch.setattr(dart_api, "API_BASE", stub.api_base)
+        new = dart_api.collect_dividend_filings_incremental(
+            existing_jsonl=p["jsonl"], start=late["rcept_dt"], end=late["rcept_dt"],
+            save_csv=p["csv"], save_jsonl=p["jsonl"], max_workers=2,
+            last_seen_path=str(data_dir / "last_seen.json"),
+        )
+    assert [r["rcept_no"] for r in new] == [late["rcept_no"]]
+
+    df_csv = pd.read_csv(p["csv"], dtype={"rcept_no": str}, encoding="utf-8-sig")
+    assert sorted(df_csv["rcept_no"]) == _dividends(filings)
+
+    run_pipeline.stage_clean(str(data_dir))
+    df_ml = pd.read_csv(p["ml_ready"], encoding="utf-8-sig")
+    expect = sorted(int(f["per_share"].replace(",", "")) for f in filings if "배당" in f["report_nm"])
+    assert sorted(df_ml["per_share_common"]) == expect
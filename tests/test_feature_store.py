@@ -0,0 +1,117 @@
+# tests/test_feature_store.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.feature_store import (
+    csv_to_feature_store,
+    is_store_fresh,
+    load_matrix,
+    read_feature_store,
+    read_module_dataset,
+    store_path,
+)
+
+
+def _frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "corp_name": [f"기업{i % 7}" for i in range(n)],
+        "stock_code": [f"{i % 13:06d}" for i in range(n)],
+        "rcept_dt": pd.Timestamp("2023-01-02") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+        "sector": rng.choice(["A", "B", "C"], n),
+        "per_share_common": rng.integers(1, 5000, n).astype(float),
+        "yield_common": rng.random(n) * 5,
+        "total_amount": rng.integers(1, 10**12, n),
+        "month": rng.integers(1, 13, n),
+        "is_year_end": rng.integers(0, 2, n),
+        "text_emb_0": rng.normal(size=n),
+        "up_1d": rng.integers(0, 2, n),
+        "ret_1d": rng.normal(0, 0.03, n),
+    })
+
+
+@pytest.fixture
+def module_dir(tmp_path):
+    _frame().to_csv(tmp_path / "classification_with_text.csv", index=False)
+    return str(tmp_path)
+
+
+def _csv(module_dir, name="classification_with_text"):
+    return pd.read_csv(os.path.join(module_dir, f"{name}.csv"), parse_dates=["rcept_dt"], dtype={"stock_code": str})
+
+
+def test_round_trip_keeps_raw_columns_exact(module_dir):
+    fs = csv_to_feature_store(os.path.join(module_dir, "classification_with_text.csv"))
+    df_csv = _csv(module_dir)
+    df = read_feature_store(fs)
+
+    assert list(df.columns) == list(df_csv.columns)
+    assert isinstance(df["stock_code"].dtype, pd.CategoricalDtype)
+    assert df["yield_common"].dtype == np.float32
+    # 타겟·라벨·금액은 float32 변환 없이 원 dtype·값 그대로
+    for c in ("total_amount", "up_1d", "ret_1d"):
+        assert df[c].dtype == df_csv[c].dtype
+        np.testing.assert_array_equal(df[c].to_numpy(), df_csv[c].to_numpy())
+    pd.testing.assert_series_equal(df["rcept_dt"], df_csv["rcept_dt"], check_dtype=False)
+
+    mat, names = load_matrix(fs, exclude=["month"])
+    assert mat.dtype == np.float32 and mat.flags.f_contiguous
+    assert "month" not in names and "total_amount" not in names
+
+    restored = read_feature_store(fs, original_dtypes=True)
+    assert restored.dtypes.to_dict() == df_csv.dtypes.to_dict()
+    pd.testing.assert_frame_equal(restored, df_csv, check_exact=False, rtol=1e-6)
+
+
+def test_store_is_reconverted_when_csv_changes(module_dir):
+    csv_fp = os.path.join(module_dir, "classification_with_text.csv")
+    fs = csv_to_feature_store(csv_fp)
+    assert is_store_fresh(fs, csv_fp)
+
+    # 05 노트북처럼 CSV 를 다시 씀 → 오래된 스토어 대신 새 값
+    df = _frame(seed=1).iloc[:150]
+    df.to_csv(csv_fp, index=False)
+    assert not is_store_fresh(fs, csv_fp)
+    out = read_module_dataset(module_dir, "classification_with_text")
+    assert len(out) == 150
+    np.testing.assert_array_equal(out["up_1d"].to_numpy(), df["up_1d"].to_numpy())
+    assert is_store_fresh(fs, csv_fp)
+
+    # 이전 스키마 버전 스토어도 재변환
+    schema_fp = os.path.join(fs, "schema.json")
+    with open(schema_fp, encoding="utf-8") as f:
+        schema = json.load(f)
+    schema["version"] = 1
+    with open(schema_fp, "w", encoding="utf-8") as fw:
+        json.dump(schema, fw)
+    assert not is_store_fresh(fs, csv_fp)
+    read_module_dataset(module_dir, "classification_with_text")
+    assert is_store_fresh(fs, csv_fp)
+
+
+def test_classifier_predictions_match_csv_path(module_dir):
+    lgb = pytest.importorskip("lightgbm")
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    drop = ["up_1d", "corp_name", "stock_code", "rcept_dt"]
+    df_csv = _csv(module_dir)
+    X = df_csv.drop(columns=drop)
+    clf = Pipeline([
+        ("pre", ColumnTransformer([("sec", OneHotEncoder(handle_unknown="ignore"), ["sector"])], remainder="passthrough")),
+        ("lgbm", lgb.LGBMClassifier(n_estimators=30, min_child_samples=5, verbose=-1)),
+    ]).fit(X, df_csv["up_1d"])
+
+    csv_to_feature_store(os.path.join(module_dir, "classification_with_text.csv"))
+    assert os.path.isdir(store_path(module_dir, "classification_with_text"))
+    df_fs = read_module_dataset(module_dir, "classification_with_text", original_dtypes=True)
+    np.testing.assert_allclose(
+        clf.predict_proba(df_fs.drop(columns=drop))[:, 1],
+        clf.predict_proba(X)[:, 1],
+        rtol=1e-6,
+    )
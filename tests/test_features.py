@@ -0,0 +1,83 @@
+# tests/test_features.py
+import filecmp
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.features import WINDOWS, build_module_datasets, update_module_datasets
+
+MODULES = ["features_common", *WINDOWS]
+CODES = [f"{100000 + i:06d}" for i in range(6)]
+
+
+def _events(months, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for m in months:
+        for day in (3, 10, 17, 24):
+            code = CODES[rng.integers(len(CODES))]
+            rows.append({
+                "corp_name": f"기업{code}",
+                "stock_code": code,
+                "rcept_no": f"{m}{day:02d}{len(rows):06d}",
+                "per_share_common": float(rng.integers(1, 50) * 100),
+                "yield_common": round(float(rng.random() * 5), 2),
+                "total_amount": float(rng.integers(1, 100) * 1e8),
+            })
+    return pd.DataFrame(rows)
+
+
+def _prices(end):
+    dates = pd.bdate_range("2022-11-01", end)  # 기간을 늘려도 기존 날짜의 종가는 그대로
+    return pd.DataFrame([
+        {"stock_code": c, "date": d, "close": 1000 + 10 * i + (i * 37 + k * 11) % 100}
+        for k, c in enumerate(CODES) for i, d in enumerate(dates)
+    ])
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    pd.DataFrame({"stock_code": CODES, "sector": ["A", "B"] * 3}).to_csv(tmp_path / "sector.csv", index=False)
+    return {
+        "div_path": str(tmp_path / "div.csv"),
+        "price_path": str(tmp_path / "prices.csv"),
+        "sector_path": str(tmp_path / "sector.csv"),
+    }
+
+
+def _assert_same_as_full(inputs, out_dir, tmp_path):
+    full_dir = str(tmp_path / "full")
+    build_module_datasets(**inputs, out_dir=full_dir)
+    for m in MODULES:
+        assert filecmp.cmp(os.path.join(full_dir, f"{m}.csv"), os.path.join(out_dir, f"{m}.csv"), shallow=False), m
+
+
+def test_incremental_matches_full_build(inputs, tmp_path):
+    out_dir = str(tmp_path / "module_datasets")
+    div = _events(["202301", "202302", "202303", "202304", "202305"])
+    div.to_csv(inputs["div_path"], index=False)
+    _prices("2023-06-30").to_csv(inputs["price_path"], index=False)
+    first = update_module_datasets(**inputs, out_dir=out_dir)
+    assert first["recomputed"] == len(div)
+
+    noop = update_module_datasets(**inputs, out_dir=out_dir)
+    assert noop["recomputed"] == noop["reranked_months"] == noop["rewritten_rows"] == 0
+
+    # 과거 이벤트 값 수정 → 그 이벤트만 재계산, 그 달만 재랭크
+    div.loc[5, "per_share_common"] = 99999.0
+    div.to_csv(inputs["div_path"], index=False)
+    edit = update_module_datasets(**inputs, out_dir=out_dir)
+    assert edit["recomputed"] == 1 and edit["reranked_months"] == 1
+    _assert_same_as_full(inputs, out_dir, tmp_path)
+
+    # 새 달 이벤트 + 일봉 추가 → 새 이벤트와 윈도우가 덜 찼던 이벤트만 재계산, 파일 끝부분만 기록
+    new = _events(["202306"], seed=2)
+    pd.concat([div, new], ignore_index=True).to_csv(inputs["div_path"], index=False)
+    _prices("2023-08-31").to_csv(inputs["price_path"], index=False)
+    grow = update_module_datasets(**inputs, out_dir=out_dir)
+    assert grow["reranked_months"] == 1
+    assert len(new) <= grow["recomputed"] < len(div)
+    assert grow["rewritten_rows"] < sum(grow[m] for m in MODULES) / 2
+    _assert_same_as_full(inputs, out_dir, tmp_path / "again")
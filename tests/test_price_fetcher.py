@@ -0,0 +1,66 @@
+# tests/test_price_fetcher.py
+import glob
+import os
+
+import pandas as pd
+
+from utils.price_fetcher import LocalPriceProvider, run_price_fetching
+
+
+def _prices(codes):
+    dates = pd.bdate_range("2023-01-02", "2023-12-29")
+    return pd.DataFrame([
+        {"stock_code": c, "date": d, "close": 100.0 + i, "volume": 1}
+        for c in codes for i, d in enumerate(dates)
+    ])
+
+
+def _run(tmp_path, events, provider, **kw):
+    div = tmp_path / "div.csv"
+    pd.DataFrame(events, columns=["stock_code", "rcept_no"]).to_csv(div, index=False)
+    return run_price_fetching(
+        str(div), str(tmp_path / "hist.csv"), str(tmp_path / "check.csv"),
+        str(tmp_path / "cache"), window_days=30, max_workers=2,
+        provider=provider, calls_per_sec=0, min_days=1, **kw,
+    )
+
+
+def test_second_run_fetches_only_missing_gap(tmp_path):
+    provider = LocalPriceProvider(_prices(["000010", "000020"]))
+    first = [("000010", "20230315000001"), ("000020", "20230315000002")]
+    _run(tmp_path, first, provider)
+    assert sorted(c for c, _, _ in provider.calls) == ["000010", "000020"]
+
+    # 기존 구간(03-15 ±30일)과 겹치는 이벤트 + 떨어진 이벤트 추가 → 겹치지 않는 부분만 수집
+    provider.calls.clear()
+    _run(tmp_path, first + [("000010", "20230401000003"), ("000010", "20230615000004")], provider)
+    assert provider.calls == [
+        ("000010", pd.Timestamp("2023-04-15"), pd.Timestamp("2023-05-01")),
+        ("000010", pd.Timestamp("2023-05-16"), pd.Timestamp("2023-07-15")),
+    ]
+
+    # 같은 입력 재실행 → 다운로드 없음
+    provider.calls.clear()
+    _run(tmp_path, first + [("000010", "20230401000003"), ("000010", "20230615000004")], provider)
+    assert provider.calls == []
+
+    cached = pd.concat(
+        pd.read_csv(fp, dtype={"stock_code": str}, parse_dates=["date"])
+        for fp in glob.glob(os.path.join(tmp_path, "cache", "*.csv"))
+    )
+    assert not cached.duplicated(["stock_code", "date"]).any()
+    a = cached[cached["stock_code"] == "000010"]
+    assert a["date"].min() == pd.Timestamp("2023-02-13")
+    assert a["date"].max() == pd.Timestamp("2023-07-14")
+
+
+def test_unlisted_codes_are_skipped(tmp_path):
+    # 000020 은 가격 이력은 있지만 현재 상장 목록에 없음 (상장폐지)
+    provider = LocalPriceProvider(_prices(["000010", "000020"]), listed={"000010"})
+    events = [("000010", "20230315000001"), ("000020", "20230315000002")]
+    hist, chk = _run(tmp_path, events, provider)
+    assert [c for c, _, _ in provider.calls] == ["000010"]
+    assert set(hist["stock_code"]) == set(chk["stock_code"]) == {"000010"}
+
+    hist, _ = _run(tmp_path, events, provider, listed_only=False)
+    assert set(hist["stock_code"]) == {"000010", "000020"}
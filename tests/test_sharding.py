@@ -0,0 +1,155 @@
+# tests/test_sharding.py
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_pipeline
+from utils.dart_api import merge_collect_shards
+from utils.features import WINDOWS, build_module_datasets, merge_feature_shards
+from utils.price_fetcher import LocalPriceProvider, merge_price_shards, run_price_fetching
+from utils.sharding import (
+    ShardSpec,
+    completed_shard_dirs,
+    mark_done,
+    run_local_shards,
+    shard_dir,
+    shard_of,
+)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CODES = [f"{100000 + 7 * i:06d}" for i in range(12)]
+
+
+def _events(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2023-02-01", "2023-06-30")
+    rows = []
+    for i in range(n):
+        code = CODES[rng.integers(len(CODES))]
+        rows.append({
+            "corp_name": f"기업{code}",
+            "stock_code": code,
+            "rcept_no": days[rng.integers(len(days))].strftime("%Y%m%d") + f"{i:06d}",
+            "per_share_common": float(rng.integers(1, 50) * 100),
+            "yield_common": round(float(rng.random() * 5), 2),
+            "total_amount": float(rng.integers(1, 100) * 1e8),
+        })
+    return pd.DataFrame(rows)
+
+
+def _prices():
+    dates = pd.bdate_range("2022-12-01", "2023-08-31")
+    return pd.DataFrame([
+        {"stock_code": c, "date": d, "close": 1000.0 + 10 * i + (i * 37 + k * 11) % 100, "volume": 1}
+        for k, c in enumerate(CODES) for i, d in enumerate(dates)
+    ])
+
+
+def _same_files(a, b, names):
+    return [n for n in names if not filecmp.cmp(os.path.join(a, n), os.path.join(b, n), shallow=False)]
+
+
+def test_shard_of_is_stable_and_disjoint():
+    codes = [f"{i:06d}" for i in range(0, 999999, 997)]
+    for n in (1, 3, 4):
+        owners = np.array([[ShardSpec(i, n).owns(c) for i in range(n)] for c in codes])
+        assert (owners.sum(axis=1) == 1).all()
+        s = pd.Series(codes)
+        parts = [ShardSpec(i, n).filter(pd.DataFrame({"stock_code": s}))["stock_code"] for i in range(n)]
+        assert sorted(pd.concat(parts)) == codes
+
+    assert shard_of("5930", 4) == shard_of("005930", 4)
+    # 다른 프로세스·해시 시드에서도 같은 배정
+    script = f"from utils.sharding import shard_of; print([shard_of(c, 4) for c in {codes!r}])"
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONHASHSEED": "123"},
+    ).stdout
+    assert json.loads(out) == [shard_of(c, 4) for c in codes]
+
+
+def test_merge_refuses_or_waits_for_incomplete_shards(tmp_path):
+    data_dir = str(tmp_path)
+    dirs = [shard_dir(data_dir, "features", ShardSpec(i, 2)) for i in range(2)]
+    mark_done(dirs[0])
+
+    with pytest.raises(RuntimeError, match="shard-001-of-002"):
+        completed_shard_dirs(data_dir, "features", 2)
+    with pytest.raises(RuntimeError):
+        merge_feature_shards(data_dir, 2, str(tmp_path / "out"), timeout=0)
+
+    timer = threading.Timer(0.2, mark_done, args=(dirs[1],))
+    timer.start()
+    assert completed_shard_dirs(data_dir, "features", 2, timeout=10, poll=0.05) == dirs
+    timer.join()
+
+
+def test_local_feature_shards_match_unsharded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    _events().to_csv(data_dir / "dividend_ml_ready.csv", index=False)
+    _prices().to_csv(data_dir / "full_price_history.csv", index=False)
+    pd.DataFrame({"stock_code": CODES, "sector": ["A", "B", "C"] * 4}).to_csv(data_dir / "sector_info.csv", index=False)
+
+    # 워커 3개 = 별도 프로세스 (공유 파일시스템만 사용)
+    run_local_shards([os.path.join(ROOT, "run_pipeline.py"), "features", "--data", str(data_dir)], 3)
+    run_pipeline.merge_stage(str(data_dir), "features", 3)
+
+    single = str(tmp_path / "single")
+    build_module_datasets(**run_pipeline._feature_inputs(str(data_dir)), out_dir=single)
+    names = [f"{m}.csv" for m in ["features_common", *WINDOWS]]
+    assert _same_files(single, str(data_dir / "module_datasets"), names) == []
+
+
+def test_price_shards_match_unsharded(tmp_path):
+    events = _events()
+    div = tmp_path / "div.csv"
+    events[["stock_code", "rcept_no"]].to_csv(div, index=False)
+    kw = {"window_days": 30, "max_workers": 2, "calls_per_sec": 0, "min_days": 1}
+
+    single = tmp_path / "single"
+    single.mkdir()
+    run_price_fetching(
+        str(div), str(single / "price_history.csv"), str(single / "window_check_result.csv"),
+        str(tmp_path / "cache_single"), provider=LocalPriceProvider(_prices()), **kw,
+    )
+
+    data_dir = str(tmp_path / "data")
+    for i in range(3):
+        sd = shard_dir(data_dir, "prices", ShardSpec(i, 3))
+        run_price_fetching(
+            str(div), os.path.join(sd, "price_history.csv"), os.path.join(sd, "window_check_result.csv"),
+            str(tmp_path / "cache_shared"), provider=LocalPriceProvider(_prices()), shard=ShardSpec(i, 3), **kw,
+        )
+    merged = tmp_path / "merged"
+    merge_price_shards(
+        data_dir, 3, str(merged / "price_history.csv"), str(merged / "window_check_result.csv"),
+    )
+    assert _same_files(str(single), str(merged), ["price_history.csv", "window_check_result.csv"]) == []
+
+
+def test_collect_merge_writes_last_seen_under_data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_dir = str(tmp_path / "other")
+    for i, (corp, day) in enumerate([("00000001", "20250101"), ("00000002", "20250301")]):
+        sd = shard_dir(data_dir, "collect", ShardSpec(i, 2))
+        with open(os.path.join(sd, "filings.jsonl"), "w", encoding="utf-8") as fw:
+            fw.write(json.dumps({"rcept_no": f"2025010100000{i}", "corp_code": corp}) + "\n")
+        with open(os.path.join(sd, "last_seen.json"), "w", encoding="utf-8") as fw:
+            json.dump({corp: day}, fw)
+        mark_done(sd)
+    with open(os.path.join(data_dir, "last_seen.json"), "w", encoding="utf-8") as fw:
+        json.dump({"00000001": "20250201"}, fw)
+
+    assert merge_collect_shards(data_dir, 2, os.path.join(data_dir, "filings.jsonl")) == 2
+    with open(os.path.join(data_dir, "last_seen.json"), encoding="utf-8") as f:
+        assert json.load(f) == {"00000001": "20250201", "00000002": "20250301"}
+    assert not os.path.exists(tmp_path / "data" / "last_seen.json")
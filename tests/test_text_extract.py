@@ -0,0 +1,36 @@
+# tests/test_text_extract.py
+import json
+
+from utils.text_extract import extract_texts
+
+
+def _records(n):
+    return [
+        {"rcept_no": f"2025010100000{i}", "corp_name": f"기업{i}", "report_nm": "현금배당결정",
+         "html": f"<html><body><p>본문 {i}</p></body></html>"}
+        for i in range(n)
+    ]
+
+
+def _cache_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_cache_keeps_only_current_config(tmp_path):
+    cache = str(tmp_path / "cache.jsonl")
+    extract_texts(_records(2), max_chars=100, max_workers=1, cache_path=cache)
+    extract_texts(_records(3), max_chars=100, max_workers=1, cache_path=cache)
+    assert len(_cache_lines(cache)) == 3  # 같은 설정 → 신규만 추가
+
+    # max_chars 변경 → 이전 설정 항목 제거 후 재작성
+    texts = extract_texts(_records(3), max_chars=5, max_workers=1, cache_path=cache)
+    lines = _cache_lines(cache)
+    assert len(lines) == 3 and {r["key"] for r in lines} == {"v1-5"}
+    assert all(len(t) <= 5 for t in texts.values())
+
+    # 전부 캐시 적중이어도 남은 이전 항목은 정리
+    with open(cache, "a", encoding="utf-8") as fw:
+        fw.write(json.dumps({"rcept_no": "x", "key": "v0-100", "report_text": "old"}) + "\n")
+    extract_texts(_records(3), max_chars=5, max_workers=1, cache_path=cache)
+    assert len(_cache_lines(cache)) == 3
@@ -0,0 +1,74 @@
+# tests/test_tuning.py
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+optuna = pytest.importorskip("optuna")
+pytest.importorskip("lightgbm")
+
+from utils.tuning import (  # noqa: E402
+    _encode_features,
+    best_params,
+    build_fold_cache,
+    fit_tuned_regressor,
+    run_study,
+)
+
+GOOD = {
+    "n_estimators": 200, "learning_rate": 0.1, "max_depth": 6, "num_leaves": 32,
+    "min_child_samples": 5, "subsample": 1.0, "colsample_bytree": 1.0,
+    "reg_alpha": 1e-8, "reg_lambda": 1e-8,
+}
+BAD = dict(GOOD, n_estimators=100, learning_rate=1e-3)
+
+
+def _frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 4)), columns=[f"f{i}" for i in range(4)])
+    df["sector"] = rng.choice(["A", "B", "C"], n)
+    df["stock_code"] = [f"{i % 20:06d}" for i in range(n)]
+    df["rcept_dt"] = pd.date_range("2020-01-01", periods=n, freq="D")
+    df["ret_1d"] = 2 * df["f0"] - df["f1"] + df["sector"].map({"A": 1.0, "B": 0.0, "C": -1.0}) \
+        + rng.normal(0, 0.1, n)
+    return df
+
+
+def test_fold_cache_encodes_once_per_thread():
+    cache = build_fold_cache(_frame(), n_splits=3)
+    assert cache.categorical == ["sector"]
+    assert "stock_code" not in cache.feature_names and "ret_1d" not in cache.feature_names
+    assert len(cache.folds) == 3
+    assert all(X.dtype == np.float32 for X, _, _, _ in cache.folds)
+    assert cache.datasets() is cache.datasets()
+
+    with pytest.raises(ValueError, match="corp_name"):
+        _encode_features(_frame().assign(corp_name="x").drop(columns=["stock_code", "rcept_dt"]), ["sector"])
+
+
+def test_study_prunes_and_returns_full_params():
+    # 좋은 파라미터 5회(MedianPruner 시작 구간) 뒤 나쁜 파라미터 → fold 중간 점수로 조기 중단
+    study = run_study(_frame(), n_trials=8, n_splits=3, core_budget=1, n_jobs=1, enqueue=[GOOD] * 5 + [BAD] * 3)
+    states = [t.state for t in study.trials]
+    assert states[:5] == [optuna.trial.TrialState.COMPLETE] * 5
+    assert states[5:] == [optuna.trial.TrialState.PRUNED] * 3
+    assert study.best_value > 0.8
+
+    params = best_params(study)
+    assert params["subsample_freq"] == 1 and "num_threads" not in params
+    assert {k: params[k] for k in GOOD} == GOOD
+
+
+def test_tuned_regressor_pickle_round_trip():
+    df = _frame()
+    model = fit_tuned_regressor(df, dict(GOOD, objective="regression", subsample_freq=1, verbose=-1), num_threads=1)
+    test = _frame(50, seed=1)
+    test.loc[0, "sector"] = "Z"  # 학습 때 없던 범주 → NaN 코드
+    pred = model.predict(test[::-1])[::-1]  # 행 순서·여분 컬럼과 무관
+    assert model.score(test) > 0.8
+
+    clone = pickle.loads(pickle.dumps(model))
+    np.testing.assert_array_equal(clone.predict(test), pred)
+    assert clone.categories == {"sector": ["A", "B", "C"]}
+    assert list(clone.feature_importance().index.sort_values()) == sorted(model.feature_names)
@@ -1,4 +1,38 @@
 # utils/__init__.py
+#   하위 모듈은 실제로 쓰일 때 로드 (import utils 만으로 DART 키 검사·langchain 로드 X)
+#   from utils import collect_dividend_filings_incremental 등 기존 사용법은 그대로 동작
 
-from .dart_api import *
-from .embed_utils import *
\ No newline at end of file
+import importlib
+
+_LAZY_EXPORTS = {
+    "dart_api": (
+        "HEADERS",
+        "API_BASE",
+        "api_key",
+        "get_session",
+        "load_corps",
+        "list_filings",
+        "fetch_report_html",
+        "parse_dividend_info",
+        "parse_dividend_soup",
+        "collect_dividend_filings_incremental",
+    ),
+    "embed_utils": ("jsonl_to_faiss",),
+}
+_NAME_TO_MODULE = {name: mod for mod, names in _LAZY_EXPORTS.items() for name in names}
+
+# from utils import * → 기존(from .dart_api import *) 과 같은 공개 이름 (해당 모듈은 이때 로드)
+__all__ = list(_NAME_TO_MODULE)
+
+
+def __getattr__(name):
+    mod = _NAME_TO_MODULE.get(name)
+    if mod is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{mod}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_NAME_TO_MODULE))
@@ -0,0 +1,326 @@
+# utils/backtest.py
+# ─────────────────────────────────────────────────────────
+# 앙상블 포트폴리오 플랜 walk-forward 백테스트 (07_ensemble.ipynb 로직 재현)
+#   • 리밸런싱 시점마다 그 이전에 공시되고 라벨(y_true=ret_1d → residual → cluster) 구간이
+#     진입일 종가까지 끝난 이벤트만으로 플랜 구성 (look-ahead 없음)
+#   • ensemble_score = α·y_pred_scl + β·(p_up-0.5) + γ·cluster_score
+#   • 클러스터당 N//k 종목 + 잔여 슬롯은 점수순, 비중 = score / Σscore
+#     (기본 long_only: 음수 점수 종목 비중 0 — 07 은 음수 비중(공매도)까지 허용, long_only=False 로 재현)
+#   • p_up 등급별 손절/익절 → 도달일 종가로 청산 후 현금 보유
+#   • (α,β,γ) × N 그리드 전체를 행렬 연산 1회로 평가, 기간별 병렬 실행
+#   • 설정별 수익률 / MDD / 회전율 요약 반환
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cluster_model import DEFAULT_CLUSTER_SCORE
+
+TRADING_DAYS = 252
+LABEL_HORIZON = 1  # cluster 라벨이 쓰는 y_true(ret_1d) 의 거래일 수
+
+# p_up 임계값 → (손절, 익절)  — 07_ensemble 의 -2/-3/-5%, +8/+7/+5% 등급
+RISK_TIERS: Tuple[Tuple[float, float, float], ...] = (
+    (0.95, -0.02, 0.08),
+    (0.90, -0.03, 0.07),
+    (-np.inf, -0.05, 0.05),
+)
+
+
+def weight_grid(step: float = 0.1) -> List[Tuple[float, float, float]]:
+    """α+β+γ=1, 각 가중치 ≥ 0 인 (α, β, γ) 격자"""
+    n = int(round(1 / step))
+    return [
+        (round(a * step, 10), round(b * step, 10), round((n - a - b) * step, 10))
+        for a in range(n + 1)
+        for b in range(n + 1 - a)
+    ]
+
+
+def build_price_matrix(prices: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(stock_code, date, close) long 테이블 → 거래일 × 종목 종가 행렬 (ffill)"""
+    wide = (
+        prices.pivot_table(index="date", columns="stock_code", values="close", aggfunc="last")
+        .sort_index()
+        .ffill()
+    )
+    dates = wide.index.to_numpy(dtype="datetime64[D]")
+    codes = wide.columns.astype(str).to_numpy()
+    return dates, codes, wide.to_numpy(dtype=np.float64)
+
+
+def candidate_window(
+    ev_dt: np.ndarray,
+    known_at: np.ndarray,
+    dates: np.ndarray,
+    t: int,
+    lookback_days: int,
+) -> Tuple[int, int]:
+    """리밸런싱 t 의 후보 이벤트 구간 [lo, hi) (ev_dt 오름차순 기준)
+
+    - 공시일 < dates[t]  (리밸런싱 당일 공시 제외)
+    - 공시일 > dates[t] - lookback_days
+    - known_at ≤ t  (라벨 계산에 쓰인 마지막 종가가 진입일 종가 이전)
+    known_at 은 ev_dt 와 같은 순서로 단조 증가해야 한다.
+    """
+    lo = np.searchsorted(ev_dt, dates[t] - np.timedelta64(lookback_days, "D"), side="right")
+    hi = min(
+        np.searchsorted(ev_dt, dates[t], side="left"),
+        np.searchsorted(known_at, t, side="right"),
+    )
+    return int(lo), int(max(hi, lo))
+
+
+def _risk_limits(p_up: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    p = np.nan_to_num(p_up, nan=0.0)
+    sl = np.select([p > t for t, _, _ in RISK_TIERS], [s for _, s, _ in RISK_TIERS])
+    tp = np.select([p > t for t, _, _ in RISK_TIERS], [x for _, _, x in RISK_TIERS])
+    return sl, tp
+
+
+# ─────────────────────────────────────────────────────
+# 기간 1개: 후보 선정 → 그리드 전체 선택/비중 → 보유 수익 경로
+# ─────────────────────────────────────────────────────
+def _select(
+    scores: np.ndarray,
+    clusters: np.ndarray,
+    sizes: Sequence[int],
+) -> np.ndarray:
+    """(후보 n × 가중치 W) 점수 → (n × W·len(sizes)) 선택 마스크, size-major 순서"""
+    labels = np.unique(clusters)
+    order = np.argsort(-scores, axis=0, kind="stable")
+    onehot = clusters[order][..., None] == labels            # (n, W, K)
+    within = (np.cumsum(onehot, axis=0) * onehot).sum(-1) - 1  # 클러스터 내 순위
+
+    picks = []
+    for N in sizes:
+        k_each = N // len(labels)
+        first = within < k_each
+        remain = N - first.sum(axis=0)
+        rest_rank = np.cumsum(~first, axis=0) - 1
+        sorted_pick = first | (~first & (rest_rank < remain))
+        pick = np.empty_like(sorted_pick)
+        np.put_along_axis(pick, order, sorted_pick, axis=0)
+        picks.append(pick)
+    return np.concatenate(picks, axis=1)
+
+
+def _run_period(
+    close: np.ndarray,
+    t0: int,
+    t1: int,
+    cand: Dict[str, np.ndarray],
+    weights: np.ndarray,
+    sizes: Sequence[int],
+    score_map: Dict[int, int],
+    long_only: bool = True,
+) -> Optional[dict]:
+    """리밸런싱 t0 → 다음 리밸런싱 t1 구간의 설정별 일간 수익률 / 시작·종료 비중"""
+    if len(cand["col"]) == 0:
+        return None
+
+    entry = close[t0, cand["col"]]
+    ok = np.isfinite(entry) & (entry > 0)
+    if not ok.any():
+        return None
+    col, y_pred = cand["col"][ok], cand["y_pred"][ok]
+    p_up, cluster = cand["p_up"][ok], cand["cluster"][ok]
+
+    # ① 앙상블 피처 (후보 풀 내 min-max → 시점별 out-of-sample 스케일)
+    span = np.nanmax(y_pred) - np.nanmin(y_pred)
+    y_scl = (y_pred - np.nanmin(y_pred)) / span if span > 0 else np.zeros_like(y_pred)
+    feats = np.column_stack([
+        np.nan_to_num(y_scl),
+        np.nan_to_num(p_up - 0.5),
+        pd.Series(cluster).map(score_map).fillna(0).to_numpy(dtype=np.float64),
+    ])
+    scores = feats @ weights.T                                # (n, W)
+
+    # ② 그리드 전체 선택 & 비중
+    pick = _select(scores, cluster, sizes)                    # (n, C)
+    s_all = np.tile(scores, (1, len(sizes)))
+    eq = pick / np.maximum(pick.sum(axis=0), 1)
+    if long_only:
+        w = np.where(pick, np.clip(s_all, 0, None), 0.0)
+        tot = w.sum(axis=0)
+        w = np.where(tot > 0, w / np.where(tot > 0, tot, 1), eq)  # 양수 점수 없으면 동일 비중
+    else:  # 07_ensemble 그대로: score / Σscore (음수 비중 = 공매도)
+        w = np.where(pick, s_all, 0.0)
+        tot = w.sum(axis=0)
+        w = np.where(tot != 0, w / np.where(tot != 0, tot, 1), eq)
+
+    # ③ 보유 경로 (손절/익절 도달 시 그날 종가로 청산, 이후 현금)
+    path = close[t0:t1 + 1, col] / entry[ok] - 1              # (H+1, n)
+    path = np.where(np.isfinite(path), path, 0.0)
+    sl, tp = _risk_limits(p_up)
+    hit = (path[1:] <= sl) | (path[1:] >= tp)
+    exited = hit.any(axis=0)
+    stop = np.where(exited, hit.argmax(axis=0) + 1, len(path) - 1)
+    rows = np.minimum(np.arange(len(path))[:, None], stop)
+    path = np.take_along_axis(path, rows, axis=0)
+
+    # ④ 설정별 가치 경로 = 비중 × (1 + 누적수익), 미투자분은 현금
+    cash = 1.0 - w.sum(axis=0)
+    value = (1.0 + path) @ w + cash                           # (H+1, C)
+    daily = value[1:] / value[:-1] - 1
+
+    end_w = w * ((1.0 + path[-1]) * ~exited)[:, None] / value[-1]
+    return {"t0": t0, "daily": daily, "col": col, "w_start": w, "w_end": end_w}
+
+
+# ─────────────────────────────────────────────────────
+# 전체 그리드 walk-forward
+# ─────────────────────────────────────────────────────
+def run_backtest_grid(
+    events: pd.DataFrame,
+    prices: pd.DataFrame,
+    weights: Optional[Sequence[Tuple[float, float, float]]] = None,
+    sizes: Sequence[int] = (10, 20, 30),
+    rebalance_days: int = 21,
+    lookback_days: int = 30,
+    label_horizon: int = LABEL_HORIZON,
+    score_map: Optional[Dict[int, int]] = None,
+    n_jobs: int = -1,
+    return_curves: bool = False,
+    long_only: bool = True,
+):
+    """(α,β,γ) × 포트폴리오 크기 그리드를 walk-forward 로 한 번에 평가
+
+    Parameters
+    ----------
+    events         : DataFrame – stock_code, rcept_dt, y_pred, p_up, cluster (Master CSV)
+    prices         : DataFrame – stock_code, date, close (full_price_history.csv)
+    weights        : list      – (α, β, γ) 목록 (None → weight_grid(0.1))
+    sizes          : list      – 포트폴리오 종목 수 N 후보
+    rebalance_days : int       – 리밸런싱 간격 (거래일)
+    lookback_days  : int       – 리밸런싱일 기준 후보로 보는 최근 공시 기간 (달력일)
+    label_horizon  : int       – cluster 라벨의 실현 수익 구간 (거래일). 공시 후 첫 거래일
+                                 + label_horizon 일 종가가 진입일 종가 이전이어야 후보
+    n_jobs         : int       – 기간별 병렬 워커 수 (joblib)
+    return_curves  : bool      – True 면 설정별 일간 자산곡선 DataFrame 도 반환
+    long_only      : bool      – True 면 음수 점수 종목 비중 0 후 재정규화 (양수 점수 없으면
+                                 동일 비중). False 면 07_ensemble 의 score / Σscore 그대로
+                                 (선택 종목 점수가 모두 양수면 두 방식 동일)
+
+    Returns
+    -------
+    summary DataFrame (설정당 1행: total_return, cagr, volatility, sharpe,
+    max_drawdown, turnover) [, 자산곡선 DataFrame]
+    """
+    from joblib import Parallel, delayed
+
+    weights = np.asarray(weights if weights is not None else weight_grid(0.1), dtype=np.float64)
+    score_map = score_map or DEFAULT_CLUSTER_SCORE
+    dates, codes, close = build_price_matrix(prices)
+    col_of = {c: i for i, c in enumerate(codes)}
+
+    ev = events.copy()
+    ev["stock_code"] = ev["stock_code"].astype(str).str.zfill(6)
+    ev["col"] = ev["stock_code"].map(col_of)
+    ev = ev.dropna(subset=["col", "rcept_dt"]).sort_values("rcept_dt")
+    ev_dt = pd.to_datetime(ev["rcept_dt"]).to_numpy(dtype="datetime64[D]")
+    # 라벨이 확정되는 거래일 인덱스 = 공시 후 첫 거래일 + label_horizon
+    known_at = np.searchsorted(dates, ev_dt, side="left") + label_horizon
+
+    first = max(int(np.searchsorted(dates, ev_dt.min())), 0) if len(ev) else len(dates)
+    rebal = list(range(first, len(dates) - 1, rebalance_days))
+
+    def candidates(t: int) -> Dict[str, np.ndarray]:
+        lo, hi = candidate_window(ev_dt, known_at, dates, t, lookback_days)
+        win = ev.iloc[lo:hi].drop_duplicates(subset="stock_code", keep="last")
+        return {
+            "col": win["col"].to_numpy(dtype=np.int64),
+            "y_pred": win["y_pred"].to_numpy(dtype=np.float64),
+            "p_up": win["p_up"].to_numpy(dtype=np.float64),
+            "cluster": win["cluster"].to_numpy(dtype=np.int64),
+        }
+
+    bounds = list(zip(rebal, rebal[1:] + [len(dates) - 1]))
+    periods = Parallel(n_jobs=n_jobs)(
+        delayed(_run_period)(close, t0, t1, candidates(t0), weights, sizes, score_map, long_only)
+        for t0, t1 in bounds
+    )
+
+    # ── 기간 결과 이어붙이기 (빈 기간은 현금) + 회전율
+    n_cfg = len(weights) * len(sizes)
+    daily_all = []
+    turnover = np.zeros(n_cfg)
+    prev = np.zeros((len(codes), n_cfg))
+    for (t0, t1), res in zip(bounds, periods):
+        cur = np.zeros((len(codes), n_cfg))
+        if res is None:
+            daily_all.append(np.zeros((t1 - t0, n_cfg)))
+        else:
+            np.add.at(cur, res["col"], res["w_start"])
+            daily_all.append(res["daily"])
+        prev_cash = 1.0 - prev.sum(axis=0)
+        cur_cash = 1.0 - cur.sum(axis=0)
+        turnover += 0.5 * (np.abs(cur - prev).sum(axis=0) + np.abs(cur_cash - prev_cash))
+        prev = np.zeros_like(cur)
+        if res is not None:
+            np.add.at(prev, res["col"], res["w_end"])
+
+    daily = np.vstack(daily_all) if daily_all else np.zeros((0, n_cfg))
+    equity = np.cumprod(1.0 + daily, axis=0)
+    n_days = max(len(daily), 1)
+    final = equity[-1] if len(equity) else np.ones(n_cfg)
+    vol = daily.std(axis=0) * np.sqrt(TRADING_DAYS) if len(daily) else np.zeros(n_cfg)
+    mean = daily.mean(axis=0) * TRADING_DAYS if len(daily) else np.zeros(n_cfg)
+    mdd = (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0) if len(equity) else np.zeros(n_cfg)
+
+    cfg = list(product(sizes, range(len(weights))))
+    summary = pd.DataFrame({
+        "alpha":        [weights[w][0] for _, w in cfg],
+        "beta":         [weights[w][1] for _, w in cfg],
+        "gamma":        [weights[w][2] for _, w in cfg],
+        "n_positions":  [n for n, _ in cfg],
+        "total_return": final - 1,
+        "cagr":         final ** (TRADING_DAYS / n_days) - 1,
+        "volatility":   vol,
+        "sharpe":       np.divide(mean, vol, out=np.zeros(n_cfg), where=vol > 0),
+        "max_drawdown": mdd,
+        "turnover":     turnover / max(len(bounds), 1),
+    })
+
+    if not return_curves:
+        return summary
+    idx = pd.DatetimeIndex(dates[rebal[0] + 1:rebal[0] + 1 + len(daily)]) if rebal else pd.DatetimeIndex([])
+    curves = pd.DataFrame(equity, index=idx)
+    return summary, curves
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="앙상블 포트폴리오 그리드 walk-forward 백테스트")
+    parser.add_argument("--master",  type=str, default="data/all_stocks_master.csv")
+    parser.add_argument("--prices",  type=str, default="data/full_price_history.csv")
+    parser.add_argument("--out",     type=str, default="data/results/backtest/grid_summary.csv")
+    parser.add_argument("--step",    type=float, default=0.1, help="(α,β,γ) 격자 간격")
+    parser.add_argument("--sizes",   type=int, nargs="*", default=[10, 20, 30])
+    parser.add_argument("--rebal",   type=int, default=21, help="리밸런싱 간격 (거래일)")
+    parser.add_argument("--workers", type=int, default=-1)
+    parser.add_argument("--allow-short", action="store_true",
+                        help="07_ensemble 처럼 score / Σscore 그대로 (음수 비중 허용)")
+    args = parser.parse_args()
+
+    df_master = pd.read_csv(args.master, parse_dates=["rcept_dt"], dtype={"stock_code": str})
+    df_price  = pd.read_csv(args.prices, parse_dates=["date"], dtype={"stock_code": str})
+    summary = run_backtest_grid(
+        df_master, df_price,
+        weights=weight_grid(args.step),
+        sizes=args.sizes,
+        rebalance_days=args.rebal,
+        n_jobs=args.workers,
+        long_only=not args.allow_short,
+    )
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    summary.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print(summary.sort_values("sharpe", ascending=False).head(10).to_string(index=False))
+    print(f"✅ 백테스트 요약 저장 → {args.out}")
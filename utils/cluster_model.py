@@ -0,0 +1,228 @@
+# utils/cluster_model.py
+# ─────────────────────────────────────────────────────────
+# 회귀 결과(y_pred, residual) 기반 K-Means 클러스터 모델
+#   • 1회 학습 후 scaler + centroid 저장 (joblib)
+#   • 라벨 의미 고정: centroid y_pred 오름차순으로 0..k-1 재정렬
+#   • assign-only: 신규 이벤트를 O(k) 거리 계산만으로 라벨링
+#   • k 탐색: 샘플링 + MiniBatchKMeans + 병렬 실행
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+CLUSTER_FEATURES: tuple[str, ...] = ("y_pred", "residual")
+LABEL_ORDER_VERSION = 1  # 라벨 정렬 규칙 변경 시 올림 → 저장 모델 재학습
+
+# 기존 06 실행(KMeans 원 라벨)의 Cluster summary + 07_ensemble 점수표 (score 컬럼)
+LEGACY_SUMMARY_FP = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "results", "clustering", "legacy_cluster_summary.csv",
+)
+
+
+def summarize_clusters(df: pd.DataFrame, labels: Iterable[int]) -> pd.DataFrame:
+    """클러스터별 count / y_pred·residual 평균·표준편차 (06_clustering 의 Cluster summary 표)"""
+    return (
+        df.assign(cluster=np.asarray(list(labels)))
+        .groupby("cluster")
+        .agg(
+            count=("cluster", "count"),
+            mean_pred=("y_pred", "mean"),
+            std_pred=("y_pred", "std"),
+            mean_residual=("residual", "mean"),
+            std_residual=("residual", "std"),
+        )
+    )
+
+
+def remap_cluster_scores(
+    scores: Dict[int, int],
+    mean_pred: Dict[int, float],
+) -> Dict[int, int]:
+    """원 라벨 기준 점수표 → y_pred 오름차순 라벨 기준 점수표
+
+    새 라벨 i = 원 라벨 중 평균 y_pred 가 i번째로 작은 클러스터.
+    """
+    order = sorted(mean_pred, key=mean_pred.get)
+    return {new: scores[old] for new, old in enumerate(order)}
+
+
+def legacy_cluster_score(path: str = LEGACY_SUMMARY_FP) -> Dict[int, int]:
+    """저장된 기존 실행 요약(cluster, mean_pred, score) → y_pred 오름차순 라벨 기준 점수표"""
+    summary = pd.read_csv(path, index_col="cluster")
+    return remap_cluster_scores(
+        {int(k): int(v) for k, v in summary["score"].items()},
+        {int(k): float(v) for k, v in summary["mean_pred"].items()},
+    )
+
+
+# 라벨은 centroid y_pred 오름차순 → {0:-1, 1:0, 2:+1, 3:-1}
+# (최상위 클러스터는 과대예측 구간이라 기존처럼 -1)
+DEFAULT_CLUSTER_SCORE: Dict[int, int] = legacy_cluster_score()
+
+
+# ─────────────────────────────────────────────────────
+# 학습 / 저장 / 로드
+# ─────────────────────────────────────────────────────
+def fit_cluster_model(
+    df: pd.DataFrame,
+    n_clusters: int = 4,
+    features: Sequence[str] = CLUSTER_FEATURES,
+    random_state: int = 42,
+    n_init: int = 10,
+) -> dict:
+    """StandardScaler + KMeans 학습 후 의미 순서로 정렬된 모델 dict 반환
+
+    반환 dict 키: features, mean, scale, centroids(스케일 공간), n_clusters, label_order
+    라벨 i 는 centroid 의 y_pred(첫 번째 피처) 기준 i번째로 작은 클러스터.
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    X = df[list(features)].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    km = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init)
+    km.fit(scaler.transform(X))
+
+    # 첫 번째 피처 오름차순, 동률이면 두 번째 피처 기준 → 재학습해도 라벨 불변
+    centroids = km.cluster_centers_
+    order = np.lexsort(centroids.T[::-1])
+
+    return {
+        "features": list(features),
+        "mean": scaler.mean_.astype(np.float64),
+        "scale": scaler.scale_.astype(np.float64),
+        "centroids": centroids[order].astype(np.float64),
+        "n_clusters": int(n_clusters),
+        "label_order": LABEL_ORDER_VERSION,
+    }
+
+
+def save_cluster_model(model: dict, path: str) -> None:
+    """클러스터 모델 dict 를 joblib 으로 저장"""
+    import joblib
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(model, path)
+
+
+def load_cluster_model(path: str) -> dict:
+    """저장된 클러스터 모델 dict 로드"""
+    import joblib
+
+    return joblib.load(path)
+
+
+def is_compatible(
+    model: dict,
+    n_clusters: int,
+    features: Sequence[str] = CLUSTER_FEATURES,
+) -> bool:
+    """저장 모델이 k · 피처 컬럼 · 라벨 정렬 버전 모두 일치하는지"""
+    return (
+        model.get("n_clusters") == n_clusters
+        and list(model.get("features", [])) == list(features)
+        and model.get("label_order") == LABEL_ORDER_VERSION
+    )
+
+
+def load_or_fit_cluster_model(
+    path: str,
+    df: pd.DataFrame,
+    n_clusters: int = 4,
+    refit: bool = False,
+    features: Sequence[str] = CLUSTER_FEATURES,
+) -> dict:
+    """저장 모델이 호환되면(is_compatible) 재사용, 아니면 학습 후 저장"""
+    if not refit and os.path.exists(path):
+        model = load_cluster_model(path)
+        if is_compatible(model, n_clusters, features):
+            return model
+    model = fit_cluster_model(df, n_clusters=n_clusters, features=features)
+    save_cluster_model(model, path)
+    return model
+
+
+# ─────────────────────────────────────────────────────
+# assign-only 라벨링
+# ─────────────────────────────────────────────────────
+def assign_clusters(df: pd.DataFrame, model: dict) -> np.ndarray:
+    """저장된 scaler/centroid 로 최근접 centroid 라벨(int8) 계산 — 이벤트당 O(k)"""
+    X = df[model["features"]].to_numpy(dtype=np.float64)
+    Z = (X - model["mean"]) / model["scale"]
+    d2 = ((Z[:, None, :] - model["centroids"][None, :, :]) ** 2).sum(axis=2)
+    return d2.argmin(axis=1).astype("int8")
+
+
+def cluster_scores(
+    labels: Iterable[int],
+    score_map: Optional[Dict[int, int]] = None,
+) -> pd.Series:
+    """의미 순서 라벨 → 앙상블용 cluster_score 매핑"""
+    score_map = score_map or DEFAULT_CLUSTER_SCORE
+    return pd.Series(labels).map(score_map)
+
+
+# ─────────────────────────────────────────────────────
+# k 탐색 (Elbow & Silhouette)
+# ─────────────────────────────────────────────────────
+def _evaluate_k(
+    Z: np.ndarray,
+    k: int,
+    sample_size: int,
+    random_state: int,
+    mini_batch: bool,
+) -> dict:
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    if mini_batch:
+        km = MiniBatchKMeans(
+            n_clusters=k, random_state=random_state, n_init=3, batch_size=4096
+        )
+    else:
+        km = KMeans(n_clusters=k, random_state=random_state, n_init=10)
+    labels = km.fit_predict(Z)
+    sil = silhouette_score(
+        Z, labels,
+        sample_size=min(sample_size, len(Z)),
+        random_state=random_state,
+    )
+    return {"k": k, "inertia": float(km.inertia_), "silhouette": float(sil)}
+
+
+def sweep_k(
+    df: pd.DataFrame,
+    ks: Iterable[int] = range(2, 11),
+    features: Sequence[str] = CLUSTER_FEATURES,
+    sample_size: int = 10_000,
+    mini_batch: Optional[bool] = None,
+    n_jobs: int = -1,
+    random_state: int = 42,
+) -> pd.DataFrame:
+    """k 후보별 inertia / silhouette 를 병렬 계산
+
+    Parameters
+    ----------
+    sample_size : int   – silhouette 계산용 샘플 수 (O(n²) → O(sample²))
+    mini_batch  : bool  – None 이면 행 수가 sample_size 초과 시 MiniBatchKMeans 사용
+    n_jobs      : int   – joblib 병렬 워커 수 (-1 = 전체 코어)
+    """
+    from joblib import Parallel, delayed
+    from sklearn.preprocessing import StandardScaler
+
+    X = df[list(features)].to_numpy(dtype=np.float64)
+    Z = StandardScaler().fit_transform(X)
+    if mini_batch is None:
+        mini_batch = len(Z) > sample_size
+
+    rows = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_k)(Z, k, sample_size, random_state, mini_batch)
+        for k in ks
+    )
+    return pd.DataFrame(rows).sort_values("k").reset_index(drop=True)
@@ -12,47 +12,79 @@ utils/dart_api.py (rev 2025-07-05b)
 
 from __future__ import annotations
 
+import io
 import os
 import json
 import time
 import zipfile
 import warnings
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-import chardet
-import pandas as pd
-import requests
-import xmltodict
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-from requests.adapters import HTTPAdapter
-from requests.exceptions import ReadTimeout
-from urllib3.util.retry import Retry
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+
+from .sharding import ShardSpec, clear_done, completed_shard_dirs, mark_done, merge_csv, merge_jsonl
+
+if TYPE_CHECKING:  # 무거운 의존성은 실제 사용 시점에 import (import utils 만으로 로드 X)
+    import pandas as pd
+    import requests
+    from bs4 import BeautifulSoup
 
 # ────────────────────────────────────────────────────────────
-# 환경 설정 & 세션
+# 환경 설정 & 세션 (API 키 검사·세션 생성은 첫 호출 시점으로 지연)
 # ────────────────────────────────────────────────────────────
 load_dotenv()
-API_KEY: str | None = os.getenv("DART_API_KEY")
-if not API_KEY:
-    raise RuntimeError("❌ 환경변수 DART_API_KEY 를 설정하세요")
 
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+API_BASE = os.getenv("DART_API_BASE", "https://opendart.fss.or.kr/api")
 DATA_DIR = "data"
-os.makedirs(DATA_DIR, exist_ok=True)
-
-session = requests.Session()
-retry_strategy = Retry(
-    total=5,
-    backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
-    allowed_methods=["GET", "POST"],
-)
-session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
-session.mount("http://", HTTPAdapter(max_retries=retry_strategy))
+
+RATE_LIMIT_STATUS = "020"   # 요청 제한 초과
+
+_session: Optional["requests.Session"] = None
+
+
+class RateLimited(Exception):
+    """DART 호출 한도 초과 응답 (status 020 / HTTP 429)"""
+
+
+def api_key() -> str:
+    """DART_API_KEY — 실제 API 호출 시점에만 검사"""
+    key = os.getenv("DART_API_KEY")
+    if not key:
+        raise RuntimeError("❌ 환경변수 DART_API_KEY 를 설정하세요")
+    return key
+
+
+def get_session() -> "requests.Session":
+    """429/5xx 재시도가 설정된 공용 requests 세션 (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry_strategy = Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+        )
+        sess = requests.Session()
+        sess.mount("https://", HTTPAdapter(max_retries=retry_strategy))
+        sess.mount("http://", HTTPAdapter(max_retries=retry_strategy))
+        _session = sess
+    return _session
+
+
+def __getattr__(name: str):
+    # 하위 호환: dart_api.session / dart_api.API_KEY
+    if name == "session":
+        return get_session()
+    if name == "API_KEY":
+        return api_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ────────────────────────────────────────────────────────────
 # corp_code.xml 로드 (30일 캐시)
@@ -67,26 +99,31 @@ def _download_corp_code(force_refresh: bool = False, max_age_days: int = 30) ->
             return
 
     print("⏳ [corp_code] 다운로드 중…", flush=True)
-    url = f"https://opendart.fss.or.kr/api/corpCode.xml?crtfc_key={API_KEY}"
-    resp = session.get(url, headers=HEADERS, timeout=30)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    url = f"{API_BASE}/corpCode.xml?crtfc_key={api_key()}"
+    resp = get_session().get(url, headers=HEADERS, timeout=30)
     resp.raise_for_status()
 
+    # shard 워커 여럿이 동시에 받아도 깨지지 않도록 프로세스별 임시 경로 → os.replace
     content = resp.content
+    tmp_xml = f"{_CORP_XML_PATH}.{os.getpid()}.tmp"
     if content.lstrip().startswith(b"<?xml"):
-        with open(_CORP_XML_PATH, "wb") as f:
+        with open(tmp_xml, "wb") as f:
             f.write(content)
     else:
-        zip_path = os.path.join(DATA_DIR, "corp_code.zip")
-        with open(zip_path, "wb") as f:
-            f.write(content)
-        with zipfile.ZipFile(zip_path) as zf:
-            zf.extractall(DATA_DIR)
-        os.replace(os.path.join(DATA_DIR, "CORPCODE.xml"), _CORP_XML_PATH)
-        os.remove(zip_path)
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            name = next(n for n in zf.namelist() if n.upper() == "CORPCODE.XML")
+            with open(tmp_xml, "wb") as f:
+                f.write(zf.read(name))
+    os.replace(tmp_xml, _CORP_XML_PATH)
     print("✅ [corp_code] 최신 파일 저장 완료", flush=True)
 
 
 def load_corps(force_refresh: bool = False) -> pd.DataFrame:
+    import chardet
+    import pandas as pd
+    import xmltodict
+
     _download_corp_code(force_refresh=force_refresh)
 
     raw = open(_CORP_XML_PATH, "rb").read()
@@ -132,11 +169,11 @@ def list_filings(corp_code: str, bgn: str, end: str, max_pages: int = 10) -> Lis
     results: List[dict] = []
     for page in range(1, max_pages + 1):
         url = (
-            f"https://opendart.fss.or.kr/api/list.json?crtfc_key={API_KEY}"
+            f"{API_BASE}/list.json?crtfc_key={api_key()}"
             f"&corp_code={corp_code}&bgn_de={bgn}&end_de={end}&page_count=100&page_no={page}"
         )
         try:
-            r = session.get(url, headers=HEADERS, timeout=15)
+            r = get_session().get(url, headers=HEADERS, timeout=15)
             r.raise_for_status()
             page_items = r.json().get("list", [])
         except Exception:
@@ -153,21 +190,44 @@ def list_filings(corp_code: str, bgn: str, end: str, max_pages: int = 10) -> Lis
 # 보고서 본문 가져오기 (document.xml 우선)
 # ────────────────────────────────────────────────────────────
 
-def fetch_report_html(rcept_no: str) -> str:
-    """document.xml 로 HTML 획득 (Selenium Fallback)"""
-    # 1) document.xml API (대부분 배당 보고서 포함)
+def fetch_document_xml(rcept_no: str, api_base: Optional[str] = None) -> str:
+    """document.xml API 만 조회 (fallback 없음)
+
+    호출 제한(status 020 / HTTP 429)은 RateLimited, 그 외 오류 응답은 예외로 올린다.
+    """
+    from requests.exceptions import RetryError
+
     url = (
-        f"https://opendart.fss.or.kr/api/document.xml?crtfc_key={API_KEY}&rcept_no={rcept_no}"
+        f"{api_base or API_BASE}/document.xml?crtfc_key={api_key()}&rcept_no={rcept_no}"
     )
     try:
-        resp = session.get(url, headers=HEADERS, timeout=20)
-        resp.raise_for_status()
-        # API 성공 but status code 내부 JSON이 아닐 때 → XML 문자열 반환
-        if resp.content.startswith(b"<?xml"):
-            return resp.text
-        # 일부 케이스는 JSON {status,message} 반환
+        resp = get_session().get(url, headers=HEADERS, timeout=20)
+    except RetryError as e:  # 세션 Retry 가 429 를 소진한 경우
+        raise RateLimited(str(e)) from None
+    if resp.status_code == 429:
+        raise RateLimited("HTTP 429")
+    resp.raise_for_status()
+    # API 성공 but status code 내부 JSON이 아닐 때 → XML 문자열 반환
+    if resp.content.startswith(b"<?xml"):
+        return resp.text
+    # 일부 케이스는 JSON {status,message} 반환
+    try:
+        body = resp.json()
+    except ValueError:
+        raise RuntimeError(f"document.xml 응답 형식 오류: {rcept_no}") from None
+    if body.get("status") == RATE_LIMIT_STATUS:
+        raise RateLimited(body.get("message", ""))
+    raise RuntimeError(f"document.xml 오류: {body.get('status')} {body.get('message')}")
+
+
+def fetch_report_html(rcept_no: str, api_base: Optional[str] = None) -> str:
+    """document.xml 로 HTML 획득 (Selenium Fallback)"""
+    # 1) document.xml API (대부분 배당 보고서 포함)
+    try:
+        return fetch_document_xml(rcept_no, api_base=api_base)
     except Exception:
         pass  # fallback
+    session = get_session()
 
     # 2) 정적 HTML (JS 미포함) – 속도 빠름
     static_url = (
@@ -214,7 +274,13 @@ _DIV_KEYS = [
 
 def parse_dividend_info(html: str) -> Dict[str, str]:
     """XFormD 테이블에서 핵심 배당 정보를 dict 로 추출"""
-    soup = BeautifulSoup(html, "html.parser")
+    from bs4 import BeautifulSoup
+
+    return parse_dividend_soup(BeautifulSoup(html, "html.parser"))
+
+
+def parse_dividend_soup(soup: BeautifulSoup) -> Dict[str, str]:
+    """이미 파싱된 soup 에서 배당 정보 추출 (본문 추출과 파싱 1회 공유)"""
     table = soup.find("table", id=lambda x: x and x.startswith("XFormD"))
     info = {k: "-" for k in _DIV_KEYS}
     if not table:
@@ -259,14 +325,17 @@ def parse_dividend_info(html: str) -> Dict[str, str]:
 
 _LAST_SEEN_PATH = os.path.join(DATA_DIR, "last_seen.json")
 
-def _load_last_seen() -> Dict[str, str]:
-    if os.path.exists(_LAST_SEEN_PATH):
-        return json.load(open(_LAST_SEEN_PATH))
+def _load_last_seen(path: str = _LAST_SEEN_PATH) -> Dict[str, str]:
+    if os.path.exists(path):
+        return json.load(open(path))
     return {}
 
-def _save_last_seen(d: Dict[str, str]):
-    with open(_LAST_SEEN_PATH, "w", encoding="utf-8") as fw:
+def _save_last_seen(d: Dict[str, str], path: str = _LAST_SEEN_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fw:
         json.dump(d, fw, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
 
 
 def collect_dividend_filings_incremental(
@@ -276,21 +345,47 @@ def collect_dividend_filings_incremental(
     save_csv: Optional[str] = None,
     save_jsonl: Optional[str] = None,
     max_workers: int = 10,
+    shard: Optional[ShardSpec] = None,
+    seen_paths: Sequence[str] = (),
+    last_seen_path: Optional[str] = None,
+    base_last_seen_path: Optional[str] = None,
 ) -> List[dict]:
-    """기존 JSONL을 참고하여 *신규* 배당 공시만 수집"""
+    """기존 JSONL을 참고하여 *신규* 배당 공시만 수집
+
+    shard 지정 시 해당 shard 종목만 조회하고, existing_jsonl 이 있는 디렉토리를
+    shard 출력 디렉토리로 보고 완료 마커를 기록한다 (merge_collect_shards 로 병합).
+    seen_paths 의 JSONL 도 이미 수집된 것으로 간주 (예: 병합된 메인 JSONL).
+    last_seen_path 가 없으면 base_last_seen_path(기본 data/last_seen.json)를 읽어 시작점으로 사용.
+    """
+    import pandas as pd
+    from tqdm import tqdm
+
+    api_key()  # 키 누락 시 목록 조회 전에 즉시 실패
     # ── 1) 이미 수집된 rcept_no 로드
+    out_dir = os.path.dirname(existing_jsonl) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    if shard is not None:
+        clear_done(out_dir)
+
     seen: set[str] = set()
-    if os.path.exists(existing_jsonl):
-        with open(existing_jsonl, "r", encoding="utf-8") as f:
-            for line in f:
-                rec = json.loads(line)
-                seen.add(rec["rcept_no"])
+    for path in [existing_jsonl, *seen_paths]:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    seen.add(rec["rcept_no"])
 
     # ── 2) last_seen(기업별 마지막 조회일) 로드
-    last_seen = _load_last_seen()
+    base_last_seen_path = base_last_seen_path or _LAST_SEEN_PATH
+    last_seen_path = last_seen_path or base_last_seen_path
+    last_seen = _load_last_seen(
+        last_seen_path if os.path.exists(last_seen_path) else base_last_seen_path
+    )
 
-    # ── 3) 전체 기업 목록
+    # ── 3) 전체 기업 목록 (shard 모드면 담당 종목만)
     corps = load_corps()
+    if shard is not None:
+        corps = shard.filter(corps).reset_index(drop=True)
 
     # ── 4) list.json 조회 & 신규 task 생성
     tasks: List[dict] = []
@@ -344,6 +439,43 @@ def collect_dividend_filings_incremental(
         print(f"✅ CSV 저장: {save_csv}")
 
     # ── 7) last_seen 업데이트
-    _save_last_seen(last_seen)
+    _save_last_seen(last_seen, last_seen_path)
+    if shard is not None:
+        mark_done(out_dir, corps=len(corps), new=len(results))
 
     return results
+
+
+def merge_collect_shards(
+    data_dir: str,
+    count: int,
+    jsonl_path: str,
+    csv_path: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> int:
+    """collect shard 출력 병합 → 메인 JSONL/CSV + <data_dir>/last_seen.json. 병합 후 전체 건수 반환
+
+    메인 파일을 먼저 읽어 rcept_no 중복 시 기존 레코드(report_text 등 후처리 포함)를 유지하고,
+    rcept_no 순으로 정렬해 shard 수·완료 순서와 무관한 결과를 만든다.
+    """
+    dirs = completed_shard_dirs(data_dir, "collect", count, timeout=timeout)
+    jsonl_name = os.path.basename(jsonl_path)
+    n = merge_jsonl([jsonl_path] + [os.path.join(d, jsonl_name) for d in dirs], jsonl_path)
+
+    if csv_path:
+        csv_name = os.path.basename(csv_path)
+        merge_csv(
+            [csv_path] + [os.path.join(d, csv_name) for d in dirs], csv_path,
+            sort_keys=["rcept_no"], dedup_keys=["rcept_no"],
+            dtype={"stock_code": str, "rcept_no": str, "rcept_dt": str},
+        )
+
+    last_seen_path = os.path.join(data_dir, "last_seen.json")
+    last_seen = _load_last_seen(last_seen_path)
+    for d in dirs:
+        for corp, day in _load_last_seen(os.path.join(d, "last_seen.json")).items():
+            last_seen[corp] = max(last_seen.get(corp, day), day)
+    _save_last_seen(last_seen, last_seen_path)
+
+    print(f"✅ collect shard {count}개 병합 → {jsonl_path} ({n:,}건)")
+    return n
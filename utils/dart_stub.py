@@ -0,0 +1,159 @@
+# utils/dart_stub.py
+# ─────────────────────────────────────────────────────────
+# dart_watcher end-to-end 검증용 로컬 DART API stub
+#   • /list.json     : publish_after(초)가 지난 공시만 최신순·페이지 단위로 노출
+#                      (corp_code 지정 시 해당 기업만, 요청 파라미터는 list_queries 에 기록)
+#   • /document.xml  : XFormD 배당 테이블이 들어간 합성 본문
+#   • rate_limit_every=N 이면 list.json N번째 호출마다 status 020 반환
+#   • doc_rate_limit_first=N 이면 document.xml 처음 N번 호출에 status 020 반환
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def make_synthetic_filings(
+    n: int = 10,
+    every: float = 1.0,
+    day: Optional[str] = None,
+    dividend_ratio: int = 2,
+) -> List[dict]:
+    """every 초 간격으로 공개되는 합성 공시 n건 (dividend_ratio 건마다 1건은 비배당)"""
+    day = day or datetime.now().strftime("%Y%m%d")
+    out = []
+    for i in range(n):
+        is_div = (i % dividend_ratio) != dividend_ratio - 1
+        out.append({
+            "corp_code":     f"{i:08d}",
+            "corp_name":     f"테스트기업{i}",
+            "stock_code":    f"{100000 + i:06d}",
+            "rcept_dt":      day,
+            "rcept_no":      f"{day}{900000 + i:06d}",
+            "report_nm":     "현금ㆍ현물배당결정" if is_div else "주요사항보고서(자기주식취득결정)",
+            "publish_after": i * every,
+            "per_share":     f"{(i + 1) * 100:,}",
+        })
+    return out
+
+
+def _document(f: dict) -> str:
+    rows = [
+        ("1. 배당구분", "결산배당"),
+        ("2. 배당종류", "현금배당"),
+        ("5. 배당금총액(원)", "1,000,000,000"),
+        ("6. 배당기준일", f["rcept_dt"]),
+    ]
+    trs = "".join(f"<tr><td>{h}</td><td>{v}</td></tr>" for h, v in rows)
+    trs += (
+        "<tr><td>3. 1주당 배당금(원)</td><td>보통주식</td>"
+        f"<td>{f['per_share']}</td></tr>"
+        "<tr><td></td><td>종류주식</td><td>-</td></tr>"
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        f'<html><body><table id="XFormD1_Form0_Table0">{trs}</table></body></html>'
+    )
+
+
+class StubDartServer:
+    """시간 경과에 따라 공시를 공개하는 로컬 DART API (with 문 지원)"""
+
+    def __init__(
+        self,
+        filings: List[dict],
+        rate_limit_every: int = 0,
+        port: int = 0,
+        doc_rate_limit_first: int = 0,
+    ):
+        self.filings = sorted(filings, key=lambda f: f["rcept_no"], reverse=True)
+        self.rate_limit_every = rate_limit_every
+        self.doc_rate_limit_first = doc_rate_limit_first
+        self.list_calls = 0
+        self.list_queries: List[dict] = []
+        self.doc_calls = 0
+        self._t0 = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def published(self) -> List[dict]:
+        elapsed = time.monotonic() - self._t0
+        return [f for f in self.filings if f["publish_after"] <= elapsed]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # 테스트 출력 억제
+                pass
+
+            def _send(self, body: str, ctype: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path.endswith("/list.json"):
+                    with stub._lock:
+                        stub.list_calls += 1
+                        stub.list_queries.append(q)
+                        limited = stub.rate_limit_every and stub.list_calls % stub.rate_limit_every == 0
+                    if limited:
+                        return self._send(json.dumps({"status": "020", "message": "요청 제한 초과"}), "application/json")
+                    items = stub.published()
+                    if "corp_code" in q:
+                        items = [f for f in items if f["corp_code"] == q["corp_code"]]
+                    size, page = int(q.get("page_count", 10)), int(q.get("page_no", 1))
+                    chunk = items[(page - 1) * size: page * size]
+                    body = {
+                        "status": "000" if items else "013",
+                        "page_no": page,
+                        "total_page": max(1, -(-len(items) // size)),
+                        "list": [{k: v for k, v in f.items() if k not in ("publish_after", "per_share")} for f in chunk],
+                    }
+                    return self._send(json.dumps(body, ensure_ascii=False), "application/json")
+                if url.path.endswith("/document.xml"):
+                    with stub._lock:
+                        stub.doc_calls += 1
+                        limited = stub.doc_calls <= stub.doc_rate_limit_first
+                    if limited:
+                        return self._send(json.dumps({"status": "020", "message": "요청 제한 초과"}), "application/json")
+                    match = [f for f in stub.published() if f["rcept_no"] == q.get("rcept_no")]
+                    if match:
+                        return self._send(_document(match[0]), "application/xml")
+                self.send_response(404)
+                self.end_headers()
+
+        return Handler
+
+    def start(self) -> "StubDartServer":
+        self._t0 = time.monotonic()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubDartServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,404 @@
+# utils/dart_watcher.py
+# ─────────────────────────────────────────────────────────
+# 실시간 배당 공시 감시 (watcher 모드)
+#   • 매 폴링: 당일 거래소공시(pblntf_ty=I) list.json 을 최신순으로 읽다가 저장된 커서
+#     (마지막 rcept_no) 이하를 만나면 중단 → 보통 폴링당 1회 호출
+#   • 시작 시 + rescan_interval 마다: 직전 영업일까지 전체 재조회 (늦게 뜬 낮은 rcept_no 보완),
+#     이미 큐에 있는 공시는 건너뜀
+#   • 신규 배당 공시만 document.xml → parse_dividend_info + report_text 추출 (Selenium 미사용)
+#   • 결과를 로컬 디렉토리 큐(incoming/ → processing/ → done | failed/)로 전달 → FilingScorer 소비
+#   • DART 호출 제한(status 020 / HTTP 429) 시 목록·본문 모두 지수 백오프 후 재시도
+#   • 배치 파이프라인 연계: 수집기 CSV 에 행 추가 + JSONL 기록(수집기가 수집 완료로 간주) 후 큐 적재
+#   • 재시작 안전: 커서·재시도 목록은 원자적 저장, CSV·JSONL 은 rcept_no 로 중복 기록 차단,
+#     큐 파일명 = rcept_no 로 중복 적재 차단
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from requests.exceptions import RetryError
+
+from . import dart_api
+from .dart_api import RATE_LIMIT_STATUS, RateLimited
+from .text_extract import html_to_text
+
+NO_DATA_STATUS = "013"      # 조회된 데이터 없음
+PBLNTF_TY = "I"             # 거래소공시 (현금ㆍ현물배당결정 포함)
+LOOKBACK_BUSINESS_DAYS = 1  # 재조회 범위: 당일 + 직전 영업일
+RESCAN_INTERVAL = 600.0     # 재조회 주기 (초)
+CSV_SKIP_COLS = ("report_text",)  # 배치 수집기 CSV 에 없는 컬럼
+
+
+# ─────────────────────────────────────────────────────
+# 로컬 파일 큐
+# ─────────────────────────────────────────────────────
+class FilingQueue:
+    """디렉토리 기반 at-least-once 큐 — 항목 1개 = <rcept_no>.json 파일 1개
+
+    incoming/   : watcher 가 넣은 신규 공시
+    processing/ : 스코어러가 가져간(claim) 공시
+    done/       : 처리 완료 (중복 판별용으로 보존)
+    failed/     : handler 오류 (재적재하지 않음, 수동 확인 후 incoming/ 으로 이동)
+    """
+
+    STAGES = ("incoming", "processing", "done", "failed")
+
+    def __init__(self, root: str):
+        self.root = root
+        for stage in self.STAGES:
+            os.makedirs(os.path.join(root, stage), exist_ok=True)
+
+    def _path(self, stage: str, rcept_no: str) -> str:
+        return os.path.join(self.root, stage, f"{rcept_no}.json")
+
+    def seen(self, rcept_no: str) -> bool:
+        return any(os.path.exists(self._path(s, rcept_no)) for s in self.STAGES)
+
+    def put(self, record: dict) -> bool:
+        """신규면 incoming/ 에 원자적으로 기록 후 True, 이미 있으면 False"""
+        rcept_no = record["rcept_no"]
+        if self.seen(rcept_no):
+            return False
+        tmp = os.path.join(self.root, f".{rcept_no}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fw:
+            json.dump(record, fw, ensure_ascii=False)
+        os.replace(tmp, self._path("incoming", rcept_no))
+        return True
+
+    def claim(self) -> Iterator[Tuple[str, dict]]:
+        """incoming/ 항목을 rcept_no 순으로 processing/ 으로 옮기며 반환"""
+        for name in sorted(os.listdir(os.path.join(self.root, "incoming"))):
+            rcept_no = name[:-5]
+            src, dst = self._path("incoming", rcept_no), self._path("processing", rcept_no)
+            try:
+                os.replace(src, dst)
+            except FileNotFoundError:
+                continue  # 다른 소비자가 먼저 가져감
+            with open(dst, encoding="utf-8") as f:
+                yield rcept_no, json.load(f)
+
+    def ack(self, rcept_no: str) -> None:
+        os.replace(self._path("processing", rcept_no), self._path("done", rcept_no))
+
+    def fail(self, rcept_no: str) -> None:
+        os.replace(self._path("processing", rcept_no), self._path("failed", rcept_no))
+
+    def requeue_processing(self) -> int:
+        """비정상 종료로 processing/ 에 남은 항목을 incoming/ 으로 되돌림"""
+        names = os.listdir(os.path.join(self.root, "processing"))
+        for name in names:
+            rcept_no = name[:-5]
+            os.replace(self._path("processing", rcept_no), self._path("incoming", rcept_no))
+        return len(names)
+
+
+def consume_queue(
+    queue_dir: str,
+    handler: Callable[[dict], None],
+    poll_interval: float = 1.0,
+    max_idle_polls: Optional[int] = None,
+) -> int:
+    """스코어러 측 소비 루프 — handler(record) 성공 시 ack, 예외 시 failed/ 로 이동. 처리 건수 반환"""
+    queue = FilingQueue(queue_dir)
+    queue.requeue_processing()
+    handled, idle = 0, 0
+    while max_idle_polls is None or idle < max_idle_polls:
+        got = False
+        for rcept_no, record in queue.claim():
+            got = True
+            try:
+                handler(record)
+            except Exception as e:  # 레코드 1건 오류로 소비 루프가 멈추지 않게
+                print(f"⚠️  {rcept_no} 처리 실패 → failed/: {type(e).__name__}: {e}", flush=True)
+                queue.fail(rcept_no)
+                continue
+            queue.ack(rcept_no)
+            handled += 1
+        idle = 0 if got else idle + 1
+        if not got:
+            time.sleep(poll_interval)
+    return handled
+
+
+# ─────────────────────────────────────────────────────
+# 상태 (커서·재시도 목록) / CSV·JSONL 기록 여부
+# ─────────────────────────────────────────────────────
+def _load_state(path: str) -> dict:
+    state = {"cursor": None, "retry": []}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            state.update(json.load(f))
+    return state
+
+
+def _save_state(path: str, state: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fw:
+        json.dump(state, fw, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _jsonl_ids(path: Optional[str]) -> Set[str]:
+    """JSONL 에 이미 기록된 rcept_no (재시작 후 중복 추가 방지)"""
+    ids: Set[str] = set()
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    ids.add(json.loads(line).get("rcept_no"))
+    return ids
+
+
+def _csv_ids(path: Optional[str]) -> Set[str]:
+    """수집기 CSV 에 이미 있는 rcept_no"""
+    if not (path and os.path.exists(path)):
+        return set()
+    import pandas as pd
+
+    df = pd.read_csv(path, usecols=["rcept_no"], dtype=str, encoding="utf-8-sig")
+    return set(df["rcept_no"].dropna())
+
+
+def _append_csv(path: str, rec: dict) -> None:
+    """수집기 CSV 컬럼 순서에 맞춰 1행 추가 (파일이 없으면 헤더와 함께 생성)"""
+    import pandas as pd
+
+    row = pd.DataFrame([{k: v for k, v in rec.items() if k not in CSV_SKIP_COLS}])
+    if os.path.exists(path):
+        cols = pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns
+        row.reindex(columns=cols).to_csv(path, mode="a", header=False, index=False, encoding="utf-8")
+    else:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        row.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def _append_jsonl(path: str, rec: dict) -> None:
+    with open(path, "a", encoding="utf-8") as fw:
+        fw.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        fw.flush()
+        os.fsync(fw.fileno())
+
+
+# ─────────────────────────────────────────────────────
+# list.json 조회
+# ─────────────────────────────────────────────────────
+def lookback_start(now: datetime, business_days: int = LOOKBACK_BUSINESS_DAYS) -> str:
+    """now 기준 business_days 영업일(주말 제외) 전 날짜 YYYYMMDD"""
+    day = now
+    for _ in range(business_days):
+        day -= timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+    return day.strftime("%Y%m%d")
+
+
+def _get_list_page(api_base: str, bgn_de: str, end_de: str, page: int) -> dict:
+    url = (
+        f"{api_base}/list.json?crtfc_key={dart_api.api_key()}"
+        f"&bgn_de={bgn_de}&end_de={end_de}&pblntf_ty={PBLNTF_TY}&sort=date&sort_mth=desc"
+        f"&page_count=100&page_no={page}"
+    )
+    try:
+        r = dart_api.get_session().get(url, headers=dart_api.HEADERS, timeout=10)
+    except RetryError as e:  # 세션 Retry 가 429 를 소진한 경우
+        raise RateLimited(str(e)) from None
+    if r.status_code == 429:
+        raise RateLimited("HTTP 429")
+    r.raise_for_status()
+    body = r.json()
+    status = body.get("status")
+    if status == RATE_LIMIT_STATUS:
+        raise RateLimited(body.get("message", ""))
+    if status not in (None, "000", NO_DATA_STATUS):
+        raise RuntimeError(f"list.json 오류: {status} {body.get('message')}")
+    return body
+
+
+def poll_filings(
+    api_base: str,
+    bgn_de: str,
+    end_de: str,
+    cursor: Optional[str] = None,
+    max_pages: int = 50,
+) -> List[dict]:
+    """[bgn_de, end_de] 공시 목록 (최신순)
+
+    cursor 지정 시 rcept_no <= cursor 인 첫 항목에서 중단 (그 뒤 페이지는 조회하지 않음),
+    None 이면 범위 전체 (재조회 — 중복은 큐에서 판별).
+    """
+    items: List[dict] = []
+    for page in range(1, max_pages + 1):
+        body = _get_list_page(api_base, bgn_de, end_de, page)
+        chunk = body.get("list", [])
+        for f in chunk:
+            if cursor is not None and f["rcept_no"] <= cursor:
+                return items
+            items.append(f)
+        if not chunk or page >= int(body.get("total_page", 1)):
+            break
+    return items
+
+
+def _fetch_and_parse(meta: dict, api_base: str) -> dict:
+    # watcher 는 document.xml 만 사용 — 호출 제한은 RateLimited 로 올려 백오프
+    html = dart_api.fetch_document_xml(meta["rcept_no"], api_base=api_base)
+    title = f"{meta.get('corp_name') or ''} {meta.get('report_nm') or ''}".strip()
+    return {
+        **meta,
+        "html": html,
+        "report_text": html_to_text(html, title=title),
+        **dart_api.parse_dividend_info(html),
+    }
+
+
+# ─────────────────────────────────────────────────────
+# 메인 루프
+# ─────────────────────────────────────────────────────
+def watch_dividend_filings(
+    queue_dir: str = "data/filing_queue",
+    state_path: str = "data/watcher_state.json",
+    jsonl_path: Optional[str] = None,
+    csv_path: Optional[str] = None,
+    interval: float = 5.0,
+    max_polls: Optional[int] = None,
+    max_workers: int = 4,
+    api_base: Optional[str] = None,
+    max_backoff: float = 60.0,
+    lookback_days: int = LOOKBACK_BUSINESS_DAYS,
+    rescan_interval: float = RESCAN_INTERVAL,
+) -> int:
+    """list.json 폴링 → 신규 배당 공시 파싱 → FilingQueue 적재. 적재 건수 반환
+
+    Parameters
+    ----------
+    queue_dir       : str   – 스코어러와 공유하는 로컬 큐 디렉토리
+    state_path      : str   – 커서·재시도 목록 저장 파일
+    jsonl_path      : str   – 지정 시 배치 수집기 JSONL 에도 추가 (수집기는 이 rcept_no 를 건너뜀)
+    csv_path        : str   – 지정 시 배치 수집기 CSV 에도 추가 (stage_clean 입력, jsonl_path 와 함께 지정)
+    interval        : float – 폴링 주기 (초)
+    max_polls       : int   – 폴링 횟수 제한 (None = 무한)
+    api_base        : str   – DART API 주소 (로컬 stub 테스트용)
+    lookback_days   : int   – 재조회할 직전 영업일 수
+    rescan_interval : float – 직전 영업일까지 전체 재조회 주기 (초, 시작 시 1회는 항상)
+    """
+    api_base = api_base or dart_api.API_BASE
+    queue = FilingQueue(queue_dir)
+    state = _load_state(state_path)
+    logged = _jsonl_ids(jsonl_path)
+    in_csv = _csv_ids(csv_path)
+    backoff, polls, queued = interval, 0, 0
+    last_rescan: Optional[float] = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            now = datetime.now()
+            today = now.strftime("%Y%m%d")
+            rescan = last_rescan is None or time.monotonic() - last_rescan >= rescan_interval
+            try:
+                if rescan:
+                    items = poll_filings(api_base, lookback_start(now, lookback_days), today)
+                    last_rescan = time.monotonic()
+                else:
+                    items = poll_filings(api_base, today, today, cursor=state["cursor"])
+            except RateLimited as e:
+                backoff = min(backoff * 2, max_backoff)
+                print(f"⏳ DART 호출 제한 ({e}) → {backoff:.0f}s 대기", flush=True)
+                time.sleep(backoff)
+                continue
+            except Exception as e:
+                print(f"⚠️  list.json 조회 실패: {e}", flush=True)
+                time.sleep(interval)
+                continue
+
+            if items:
+                state["cursor"] = max(state["cursor"] or "", *(f["rcept_no"] for f in items))
+
+            # 배당 공시 + 이전 실패분 (큐에 이미 있으면 건너뜀)
+            metas: Dict[str, dict] = {m["rcept_no"]: m for m in state["retry"]}
+            for f in items:
+                if "배당" in f.get("report_nm", ""):
+                    metas[f["rcept_no"]] = {
+                        "corp_name":  f.get("corp_name"),
+                        "stock_code": f.get("stock_code"),
+                        "rcept_dt":   f.get("rcept_dt"),
+                        "report_nm":  f.get("report_nm"),
+                        "rcept_no":   f["rcept_no"],
+                    }
+            todo = [m for no, m in sorted(metas.items()) if not queue.seen(no)]
+
+            retry: List[dict] = []
+            records: List[dict] = []
+            limited = False
+            futures = {ex.submit(_fetch_and_parse, m, api_base): m for m in todo}
+            for fut, meta in futures.items():
+                try:
+                    records.append(fut.result())
+                except RateLimited as e:
+                    limited = True
+                    retry.append(meta)
+                    print(f"⏳ {meta['rcept_no']} 본문 호출 제한 ({e}) → 재시도 예정", flush=True)
+                except Exception as e:
+                    print(f"⚠️  {meta['rcept_no']} 본문 수집 실패 → 재시도 예정: {e}", flush=True)
+                    retry.append(meta)
+
+            for rec in records:
+                # CSV → JSONL 선기록(write-ahead) → 큐 적재: 중간에 죽어도 재조회 시 큐에 다시 들어가고
+                # CSV·JSONL 은 rcept_no 로 중복 기록 차단. CSV 를 먼저 써야 JSONL 만 보고
+                # 수집 완료로 간주하는 배치 수집기가 CSV 누락을 만들지 않음
+                if csv_path and rec["rcept_no"] not in in_csv:
+                    _append_csv(csv_path, rec)
+                    in_csv.add(rec["rcept_no"])
+                if jsonl_path and rec["rcept_no"] not in logged:
+                    _append_jsonl(jsonl_path, rec)
+                    logged.add(rec["rcept_no"])
+                if queue.put(rec):
+                    queued += 1
+                    print(f"📥 {rec['rcept_no']} {rec['corp_name']} {rec['report_nm']}", flush=True)
+
+            state["retry"] = retry
+            state["last_poll"] = now.strftime("%Y-%m-%dT%H:%M:%S")
+            _save_state(state_path, state)
+
+            if limited:
+                backoff = min(backoff * 2, max_backoff)
+                print(f"⏳ document.xml 호출 제한 → {backoff:.0f}s 대기", flush=True)
+                wait = backoff
+            else:
+                backoff = wait = interval
+            if max_polls is None or polls < max_polls:
+                time.sleep(wait)
+
+    return queued
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DART 배당 공시 실시간 감시")
+    parser.add_argument("--queue",    type=str, default="data/filing_queue")
+    parser.add_argument("--state",    type=str, default="data/watcher_state.json")
+    parser.add_argument("--jsonl",    type=str, default=None)
+    parser.add_argument("--csv",      type=str, default=None)
+    parser.add_argument("--interval", type=float, default=5.0, help="폴링 주기 (초)")
+    parser.add_argument("--polls",    type=int, default=None, help="폴링 횟수 제한")
+    parser.add_argument("--api",      type=str, default=None, help="DART API 주소 (stub 테스트용)")
+    args = parser.parse_args()
+
+    n = watch_dividend_filings(
+        queue_dir=args.queue,
+        state_path=args.state,
+        jsonl_path=args.jsonl,
+        csv_path=args.csv,
+        interval=args.interval,
+        max_polls=args.polls,
+        api_base=args.api,
+    )
+    print(f"✅ 신규 배당 공시 {n:,}건 큐 적재")
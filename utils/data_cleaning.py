@@ -14,7 +14,6 @@
 
 from __future__ import annotations
 import pandas as pd
-import FinanceDataReader as fdr
 from functools import lru_cache
 
 # ─────────────────────────────────────────────────────
@@ -23,6 +22,8 @@ from functools import lru_cache
 @lru_cache(maxsize=1)
 def _get_current_listed_codes() -> set[str]:
     """KRX 상장 종목 6자리 코드 세트를 1회만 로드·캐싱"""
+    import FinanceDataReader as fdr
+
     krx = fdr.StockListing("KRX")
     return set(krx["Code"].astype(str).str.zfill(6).unique())
 
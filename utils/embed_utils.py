@@ -2,16 +2,13 @@
 
 import os
 import json
-from tqdm import tqdm
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # 반드시 환경변수로 설정
 
 def jsonl_to_faiss(
     jsonl_path="data/dividend_with_text.jsonl",
     faiss_path="data/dividend_faiss_index"
 ):
+    # langchain 은 임베딩 단계에서만 필요 → 호출 시점에 import, 키도 호출 시점에 확인
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # 반드시 환경변수로 설정
     if not OPENAI_API_KEY:
         print("❌ 환경변수 'OPENAI_API_KEY'가 설정되지 않았습니다.")
         return
@@ -24,19 +21,24 @@ def jsonl_to_faiss(
     with open(jsonl_path, "r", encoding="utf-8") as f:
         for line in f:
             rec = json.loads(line)
+            # report_text: text_extract.add_report_text 가 채운 정규화 본문 (원본 html 은 임베딩하지 않음)
             if not rec.get("report_text"): continue
             docs.append(rec["report_text"])
             metadatas.append({
                 "corp_code":  rec.get("corp_code", ""),
                 "stock_code": rec.get("stock_code", ""),
                 "rcept_dt":   rec.get("rcept_dt", ""),
-                "title":      rec.get("report_name", "")
+                "rcept_no":   rec.get("rcept_no", ""),
+                "title":      rec.get("report_nm", "")
             })
 
     if len(docs) == 0:
         print("⚠️ 유효한 본문 문서가 없어 임베딩을 건너뜁니다.")
         return
 
+    from langchain_openai import OpenAIEmbeddings
+    from langchain_community.vectorstores import FAISS
+
     print(f"🔍 {len(docs)}건 문서 임베딩 시작...")
     embedder = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
     db = FAISS.from_texts(docs, embedder, metadatas=metadatas)
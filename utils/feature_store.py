@@ -0,0 +1,318 @@
+# utils/feature_store.py
+# ─────────────────────────────────────────────────────────
+# 모듈 데이터셋용 바이너리 피처 스토어 (wide CSV 대체)
+#   • 디렉토리 1개 = 데이터셋 1개  (예: module_datasets/regression_enriched.fs/)
+#       schema.json          – 컬럼 스키마 (피처 순서, 사전, 날짜 컬럼)
+#       features.npy         – 수치 피처 float32 행렬 (column-major, mmap 가능)
+#       raw__<col>.npy       – 타겟·라벨·ID·금액 등 원 dtype 보존 컬럼 (float32 변환 제외)
+#       cat__<col>.npy       – 문자열 컬럼 사전 인코딩 코드 (int32, -1 = 결측)
+#       date__<col>.npy      – 날짜 컬럼 YYYYMMDD 정수 (int32, 0 = 결측)
+#   • 컬럼 선택 로딩: 필요한 파일/열만 읽음 (memmap)
+#   • load_matrix(): LightGBM / scikit-learn 에 복사 없이 넘길 float32 뷰
+#   • 원본 CSV 크기·mtime 을 schema 에 기록 → CSV 가 바뀌면 read_module_dataset 이 재변환
+#   • 원본 컬럼 dtype 도 기록 → original_dtypes=True 로 CSV 로 학습한 모델 입력 dtype 복원
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from .sharding import ShardSpec
+
+STORE_SUFFIX = ".fs"
+SCHEMA_VERSION = 3
+_FEATURES_FILE = "features.npy"
+
+# float32 행렬에 넣지 않고 원 dtype 그대로 두는 컬럼 (타겟·라벨·ID·금액)
+RAW_COL_PATTERN = re.compile(
+    r"^(ret_\d+d|up_\d+d|y_true|y_pred|residual|p_up|cluster|label|target"
+    r"|_row|rcept_no|corp_code|.*_amount)$"
+)
+_FLOAT32_EXACT_INT = 2 ** 24  # 이보다 큰 정수는 float32 로 정확히 표현 불가
+
+
+# ─────────────────────────────────────────────────────
+# 경로 헬퍼
+# ─────────────────────────────────────────────────────
+def store_path(module_dir: str, name: str) -> str:
+    """module_datasets/<name>.fs 경로"""
+    return os.path.join(module_dir, f"{name}{STORE_SUFFIX}")
+
+
+def _load_schema(path: str) -> dict:
+    with open(os.path.join(path, "schema.json"), encoding="utf-8") as f:
+        schema = json.load(f)
+    if schema.get("version") != SCHEMA_VERSION:
+        raise ValueError(f"지원하지 않는 피처 스토어 버전: {schema.get('version')} ({path})")
+    return schema
+
+
+def _file_stamp(path: str) -> dict:
+    st = os.stat(path)
+    return {"file": os.path.basename(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def is_store_fresh(path: str, csv_path: str) -> bool:
+    """스토어가 현재 csv_path 로부터 변환된 것인지 (버전·크기·mtime 비교)"""
+    try:
+        schema = _load_schema(path)
+    except (OSError, ValueError):
+        return False
+    return schema.get("source") == _file_stamp(csv_path)
+
+
+# ─────────────────────────────────────────────────────
+# 쓰기
+# ─────────────────────────────────────────────────────
+def _encode_dates(s: pd.Series) -> np.ndarray:
+    dt = pd.to_datetime(s, errors="coerce")
+    out = (dt.dt.year * 10000 + dt.dt.month * 100 + dt.dt.day).fillna(0)
+    return out.to_numpy(dtype=np.int32)
+
+
+def _keep_raw(s: pd.Series) -> bool:
+    """타겟·라벨·ID·금액 컬럼이거나 float32 로 정확히 담을 수 없는 정수 컬럼"""
+    if RAW_COL_PATTERN.match(str(s.name)):
+        return True
+    if pd.api.types.is_integer_dtype(s) and len(s):
+        return bool(s.abs().max() > _FLOAT32_EXACT_INT)
+    return False
+
+
+def write_feature_store(
+    df: pd.DataFrame,
+    path: str,
+    date_cols: Sequence[str] = ("rcept_dt",),
+    source: Optional[dict] = None,
+) -> dict:
+    """DataFrame → 피처 스토어 디렉토리 (기존 스토어는 원자적으로 교체)
+
+    수치/불리언 피처 컬럼 → float32 행렬, 타겟·라벨·ID·금액 컬럼 → 원 dtype,
+    날짜 컬럼 → int32 YYYYMMDD, 그 외(문자열·범주) → 사전 인코딩 int32 코드.
+    """
+    dates = [c for c in date_cols if c in df.columns]
+    dates += [
+        c for c in df.columns
+        if c not in dates and pd.api.types.is_datetime64_any_dtype(df[c])
+    ]
+    numeric = [
+        c for c in df.columns
+        if c not in dates
+        and (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c]))
+    ]
+    cats = [c for c in df.columns if c not in dates and c not in numeric]
+    raw = [c for c in numeric if _keep_raw(df[c])]
+    numeric = [c for c in numeric if c not in raw]
+
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    # float32 column-major: 열 선택 시 연속 메모리, LightGBM col-major 입력 그대로 사용
+    mat = np.asfortranarray(df[numeric].to_numpy(dtype=np.float32))
+    np.save(os.path.join(tmp, _FEATURES_FILE), mat)
+
+    dictionaries: Dict[str, List[str]] = {}
+    for c in cats:
+        cat = df[c].astype("string").astype("category")
+        dictionaries[c] = [str(v) for v in cat.cat.categories]
+        np.save(os.path.join(tmp, f"cat__{c}.npy"), cat.cat.codes.to_numpy(dtype=np.int32))
+    for c in dates:
+        np.save(os.path.join(tmp, f"date__{c}.npy"), _encode_dates(df[c]))
+    raw_dtypes: Dict[str, str] = {}
+    for c in raw:
+        arr = df[c].to_numpy()
+        raw_dtypes[c] = str(arr.dtype)
+        np.save(os.path.join(tmp, f"raw__{c}.npy"), arr)
+
+    schema = {
+        "version": SCHEMA_VERSION,
+        "n_rows": int(len(df)),
+        "columns": list(df.columns),
+        "features": numeric,
+        "categorical": dictionaries,
+        "dates": dates,
+        "raw": raw_dtypes,
+        "dtypes": {c: str(df[c].dtype) for c in df.columns},
+        "source": source,
+    }
+    with open(os.path.join(tmp, "schema.json"), "w", encoding="utf-8") as fw:
+        json.dump(schema, fw, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return schema
+
+
+def csv_to_feature_store(
+    csv_path: str,
+    path: Optional[str] = None,
+    date_cols: Sequence[str] = ("rcept_dt",),
+) -> str:
+    """기존 wide CSV 를 변환 (stock_code 는 문자열로 보존, CSV 크기·mtime 을 schema 에 기록)"""
+    path = path or os.path.splitext(csv_path)[0] + STORE_SUFFIX
+    source = _file_stamp(csv_path)  # 읽기 전 기록 → 변환 중 CSV 가 바뀌면 다음 읽기에서 재변환
+    df = pd.read_csv(
+        csv_path,
+        parse_dates=[c for c in date_cols],
+        dtype={"stock_code": str, "sector": str, "corp_name": str},
+    )
+    write_feature_store(df, path, date_cols=date_cols, source=source)
+    return path
+
+
+# ─────────────────────────────────────────────────────
+# 읽기
+# ─────────────────────────────────────────────────────
+def _decode_dates(arr: np.ndarray) -> pd.Series:
+    """int32 YYYYMMDD → datetime64 (numpy 달력 연산, 문자열 파싱 없음)"""
+    arr = np.asarray(arr, dtype=np.int64)
+    ok = arr > 0
+    safe = np.where(ok, arr, 19700101)
+    months = (safe // 10000 - 1970) * 12 + (safe // 100) % 100 - 1
+    days = months.astype("datetime64[M]").astype("datetime64[D]") + (safe % 100 - 1)
+    out = days.astype("datetime64[ns]")
+    out[~ok] = np.datetime64("NaT")
+    return pd.Series(out)
+
+
+def _feature_view(mat: np.ndarray, idx: List[int]) -> np.ndarray:
+    """연속 구간이면 memmap 슬라이스(복사 없음), 아니면 해당 열만 읽어 복사"""
+    if idx and idx == list(range(idx[0], idx[0] + len(idx))):
+        return mat[:, idx[0]:idx[0] + len(idx)]
+    return np.asfortranarray(mat[:, idx])
+
+
+def load_matrix(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    exclude: Sequence[str] = (),
+    mmap: bool = True,
+) -> Tuple[np.ndarray, List[str]]:
+    """수치 피처 float32 행렬 + 컬럼명 반환 (LightGBM / sklearn 직접 입력용)
+
+    columns 미지정 시 exclude 를 제외한 전체 수치 피처 (원 dtype 보존 컬럼은 제외).
+    """
+    schema = _load_schema(path)
+    feats = schema["features"]
+    wanted = list(columns) if columns is not None else [c for c in feats if c not in exclude]
+    pos = {c: i for i, c in enumerate(feats)}
+    missing = [c for c in wanted if c not in pos]
+    if missing:
+        raise KeyError(f"피처 스토어에 없는 컬럼: {missing}")
+
+    mat = np.load(os.path.join(path, _FEATURES_FILE), mmap_mode="r" if mmap else None)
+    return _feature_view(mat, [pos[c] for c in wanted]), wanted
+
+
+def _restore_dtypes(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """float32 피처·Categorical·날짜 → 변환 전 dtype (예: CSV 의 float64/int64/str/datetime64[us])
+
+    값은 float32 정밀도 그대로 (정수·불리언·문자열은 정확히 복원).
+    """
+    dtypes = schema["dtypes"]
+    for c in df.columns:
+        if c in schema["categorical"]:
+            codes = df[c].cat.codes.to_numpy()
+            vals = np.asarray(schema["categorical"][c], dtype=object)[np.maximum(codes, 0)]
+            vals[codes < 0] = np.nan
+            df[c] = pd.Series(vals, index=df.index).astype(dtypes[c])
+        elif c in schema["features"] and str(df[c].dtype) != dtypes[c]:
+            df[c] = df[c].astype(dtypes[c])
+        elif c in schema["dates"] and dtypes[c].startswith("datetime64") and str(df[c].dtype) != dtypes[c]:
+            df[c] = df[c].astype(dtypes[c])  # 해상도(ns/us)만 맞춤
+    return df
+
+
+def read_feature_store(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    parse_dates: bool = True,
+    rows: Optional[np.ndarray] = None,
+    original_dtypes: bool = False,
+) -> pd.DataFrame:
+    """피처 스토어 → DataFrame (요청 컬럼만 로드)
+
+    문자열 컬럼은 pd.Categorical(사전 그대로), 날짜는 parse_dates=False 면 int32 YYYYMMDD.
+    rows(정수 위치) 지정 시 해당 행만 memmap 에서 복사 (shard 워커용).
+    original_dtypes=True 면 피처·문자열 컬럼을 변환 전 dtype 으로 되돌림 (CSV 로 학습한 모델 입력용,
+    복사 발생).
+    """
+    schema = _load_schema(path)
+    wanted = list(columns) if columns is not None else schema["columns"]
+    unknown = [c for c in wanted if c not in schema["columns"]]
+    if unknown:
+        raise KeyError(f"피처 스토어에 없는 컬럼: {unknown}")
+
+    # 수치 피처는 copy-on-write memmap 1블록 그대로 → 나머지 컬럼은 제자리에 insert
+    feat_cols = [c for c in wanted if c in schema["features"]]
+    pos = {c: i for i, c in enumerate(schema["features"])}
+    mat = np.load(os.path.join(path, _FEATURES_FILE), mmap_mode="c")
+    block = _feature_view(mat, [pos[c] for c in feat_cols])
+    if rows is not None:
+        block = block[rows]
+    df = pd.DataFrame(block, columns=feat_cols, copy=False)
+
+    for loc, c in enumerate(wanted):
+        if c in schema["categorical"]:
+            codes = np.load(os.path.join(path, f"cat__{c}.npy"), mmap_mode="r")
+            codes = codes[rows] if rows is not None else np.asarray(codes)
+            col = pd.Categorical.from_codes(codes, categories=schema["categorical"][c])
+        elif c in schema["dates"]:
+            arr = np.load(os.path.join(path, f"date__{c}.npy"), mmap_mode="r")
+            arr = arr[rows] if rows is not None else np.asarray(arr)
+            col = _decode_dates(arr) if parse_dates else arr
+        elif c in schema["raw"]:
+            arr = np.load(os.path.join(path, f"raw__{c}.npy"), mmap_mode="r")
+            col = arr[rows] if rows is not None else np.asarray(arr)
+        else:
+            continue
+        df.insert(loc, c, col)
+    return _restore_dtypes(df, schema) if original_dtypes else df
+
+
+def read_module_dataset(
+    module_dir: str,
+    name: str,
+    columns: Optional[Sequence[str]] = None,
+    shard: Optional["ShardSpec"] = None,
+    original_dtypes: bool = False,
+) -> pd.DataFrame:
+    """<name>.fs 가 있으면 스토어에서, 없으면 <name>.csv 에서 로드
+
+    <name>.csv 가 스토어 변환 이후 바뀌었으면(크기·mtime 불일치) 먼저 스토어를 재변환한다
+    (예: 05_regression 이 regression_enriched.csv 를 다시 쓴 경우).
+    shard 지정 시 해당 shard 종목 행만 읽는다 (스토어: stock_code 로 행 위치 선별,
+    CSV: 청크 단위 필터) — 전체 테이블을 메모리에 올리지 않음.
+    original_dtypes=True 면 스토어에서 읽어도 CSV 와 같은 dtype (read_feature_store 참고).
+    """
+    fs_path = store_path(module_dir, name)
+    csv_path = os.path.join(module_dir, f"{name}.csv")
+    if os.path.exists(csv_path) and os.path.isdir(fs_path) and not is_store_fresh(fs_path, csv_path):
+        print(f"   ♻️  {name}.csv 변경 감지 → 피처 스토어 재변환")
+        csv_to_feature_store(csv_path, fs_path)
+    if os.path.isdir(fs_path):
+        rows = None
+        if shard is not None:
+            codes = read_feature_store(fs_path, columns=["stock_code"])["stock_code"]
+            rows = np.flatnonzero(shard.mask(codes))
+        return read_feature_store(fs_path, columns=columns, rows=rows, original_dtypes=original_dtypes)
+    parse = ["rcept_dt"] if columns is None or "rcept_dt" in columns else False
+    reader = pd.read_csv(
+        csv_path,
+        parse_dates=parse,
+        dtype={"stock_code": str},
+        usecols=columns,
+        chunksize=500_000 if shard is not None else None,
+    )
+    if shard is None:
+        return reader
+    return pd.concat([shard.filter(chunk) for chunk in reader], ignore_index=True)
@@ -0,0 +1,555 @@
+# utils/features.py
+# ─────────────────────────────────────────────────────────
+# 공통 피처 생성 & 모듈별 분할 (03_feature_splits.ipynb 로직의 모듈화)
+#   • 이벤트별 피처: month / is_year_end / sector + 모듈별 윈도우·타겟
+#   • 횡단면 피처: div_amount_rank = 월(period)별 per_share_common pct rank
+#   • shard 모드: 이벤트별 피처만 계산해 shard 디렉토리에 저장,
+#     div_amount_rank 는 merge_feature_shards() 에서 전체 이벤트 기준으로 재계산
+#   • 증분 모드: update_module_datasets() 가 신규·변경 이벤트(+ 일봉 윈도우가 바뀐 이벤트)만
+#     재계산하고 해당 월만 재랭크, 모듈 CSV 는 달라진 행부터만 다시 씀
+#     (캐시: module_datasets/_feature_cache/)
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import codecs
+import json
+import os
+from typing import Dict, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from .sharding import ShardSpec, clear_done, completed_shard_dirs, mark_done, read_shard_csvs
+
+WINDOWS = {
+    "classification": 1,
+    "regression":     10,
+    "clustering":     10,
+}
+REG_DAYS = [1, 2, 3, 4, 5, 6, 7, 10]
+REG_COLS = [f"ret_{d}d" for d in REG_DAYS]
+COMMON_COLS = [
+    "stock_code", "rcept_dt", "sector",
+    "per_share_common", "yield_common", "total_amount",
+    "div_amount_rank", "month", "is_year_end",
+]
+TARGET_COLS = {
+    "classification": ["up_1d"],
+    "regression":     REG_COLS,
+    "clustering":     [],
+}
+ROW_COL = "_row"              # dividend_ml_ready.csv 내 이벤트 순번 (병합 순서 기준)
+RANK_INPUTS = "rank_inputs"   # shard → merge 로 넘기는 횡단면 피처 입력
+
+
+# ─────────────────────────────────────────────────────
+# 입력 로드
+# ─────────────────────────────────────────────────────
+def load_dividend_events(div_path: str, shard: Optional[ShardSpec] = None) -> pd.DataFrame:
+    """dividend_ml_ready.csv → rcept_dt 파싱 + _row(원본 순번) 부여, shard 필터"""
+    df_div = pd.read_csv(div_path, dtype={"stock_code": str, "rcept_no": str})
+    df_div["stock_code"] = df_div["stock_code"].str.zfill(6)
+    df_div["rcept_dt"] = pd.to_datetime(df_div["rcept_no"].str[:8], format="%Y%m%d", errors="coerce")
+    df_div = df_div.dropna(subset=["rcept_dt"]).reset_index(drop=True)
+    df_div[ROW_COL] = np.arange(len(df_div))
+    if "corp_name" not in df_div.columns:
+        df_div["corp_name"] = np.nan
+    if shard is not None:
+        df_div = shard.filter(df_div).reset_index(drop=True)
+    return df_div
+
+
+def load_sector_map(sector_path: str) -> Dict[str, str]:
+    sec = pd.read_csv(sector_path, dtype=str)
+    sec["stock_code"] = sec["stock_code"].str.zfill(6)
+    return sec.set_index("stock_code")["sector"].to_dict()
+
+
+def load_prices(
+    price_path: str,
+    shard: Optional[ShardSpec] = None,
+    chunksize: int = 1_000_000,
+    codes: Optional[Set[str]] = None,
+) -> pd.DataFrame:
+    """종목별 일봉 (stock_code, date, close) — price_history.csv 처럼 이벤트별로
+    중복된 행이 있어도 (stock_code, date) 기준 1행. shard·codes 지정 시 청크 단위로 걸러 읽음"""
+    parts = []
+    for chunk in pd.read_csv(
+        price_path,
+        usecols=lambda c: c in ("stock_code", "date", "close"),
+        dtype={"stock_code": str},
+        parse_dates=["date"],
+        chunksize=chunksize,
+    ):
+        chunk["stock_code"] = chunk["stock_code"].str.zfill(6)
+        if shard is not None:
+            chunk = shard.filter(chunk)
+        if codes is not None:
+            chunk = chunk[chunk["stock_code"].isin(codes)]
+        parts.append(chunk)
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["stock_code", "date", "close"])
+    return (
+        df.drop_duplicates(["stock_code", "date"])
+        .sort_values(["stock_code", "date"])
+        .reset_index(drop=True)
+    )
+
+
+# ─────────────────────────────────────────────────────
+# 피처 계산
+# ─────────────────────────────────────────────────────
+def add_event_features(df_div: pd.DataFrame, sec_map: Dict[str, str]) -> pd.DataFrame:
+    """이벤트 단위 공통 피처 (다른 이벤트와 무관 → shard 내에서 계산 가능)"""
+    df = df_div.copy()
+    df["period"] = df["rcept_dt"].dt.to_period("M")
+    df["month"] = df["rcept_dt"].dt.month
+    df["is_year_end"] = (df["month"] == 12).astype(int)
+    df["sector"] = df["stock_code"].map(sec_map).fillna("")
+    return df
+
+
+def rank_div_amount(df: pd.DataFrame) -> pd.Series:
+    """월별 per_share_common pct rank — 같은 달 전체 이벤트가 모여야 정확"""
+    period = df["period"] if "period" in df.columns else df["rcept_dt"].dt.to_period("M")
+    return df.groupby(period)["per_share_common"].rank(pct=True)
+
+
+def slice_module_rows(events: pd.DataFrame, prices: pd.DataFrame, module: str) -> pd.DataFrame:
+    """이벤트 ±w 거래일 윈도우가 온전한 이벤트만 남기고 타겟 계산 (종목별 searchsorted)
+
+    노트북과 동일: 기준일 = rcept_dt 이후 첫 거래일, 윈도우 2w+1 미만이면 제외.
+    반환: events 의 부분집합(행 순서 유지) + 타겟 컬럼
+    """
+    w = WINDOWS[module]
+    keep = np.zeros(len(events), dtype=bool)
+    targets = {c: np.full(len(events), np.nan) for c in TARGET_COLS[module]}
+
+    price_groups = {c: g for c, g in prices.groupby("stock_code", sort=False)}
+    for code, idx in events.groupby("stock_code", sort=False).indices.items():
+        grp = price_groups.get(code)
+        if grp is None:
+            continue
+        dates = grp["date"].to_numpy(dtype="datetime64[ns]")
+        close = grp["close"].to_numpy(dtype=float)
+        pos = np.searchsorted(dates, events["rcept_dt"].to_numpy(dtype="datetime64[ns]")[idx], side="left")
+        ok = (pos - w >= 0) & (pos + w + 1 <= len(dates))
+        if not ok.any():
+            continue
+        sel, p = idx[ok], pos[ok]
+        keep[sel] = True
+        if module == "classification":
+            targets["up_1d"][sel] = (close[p + 1] / close[p] - 1 > 0).astype(int)
+        elif module == "regression":
+            for d, col in zip(REG_DAYS, REG_COLS):
+                targets[col][sel] = close[p + d] / close[p] - 1
+
+    out = events.loc[keep].copy()
+    for col, arr in targets.items():
+        out[col] = arr[keep]
+    if module == "classification" and len(out):
+        out["up_1d"] = out["up_1d"].astype(int)
+    return out
+
+
+def _finalize(rows: pd.DataFrame, module: str) -> pd.DataFrame:
+    """_row 순 정렬 + corp_name 선두 + 노트북 컬럼 순서"""
+    rows = rows.sort_values(ROW_COL, kind="mergesort")
+    rows = rows.assign(corp_name=rows["corp_name"].fillna("UNKNOWN"))
+    return rows[["corp_name"] + COMMON_COLS + TARGET_COLS[module]].reset_index(drop=True)
+
+
+# ─────────────────────────────────────────────────────
+# 실행 진입점
+# ─────────────────────────────────────────────────────
+def build_module_datasets(
+    div_path: str,
+    price_path: str,
+    sector_path: str,
+    out_dir: str,
+    shard: Optional[ShardSpec] = None,
+) -> Dict[str, int]:
+    """모듈 데이터셋(classification / regression / clustering + features_common) 생성
+
+    Parameters
+    ----------
+    div_path    : str – dividend_ml_ready.csv
+    price_path  : str – 종목별 일봉 CSV (full_price_history.csv 또는 price_history.csv)
+    sector_path : str – sector_info.csv (stock_code, sector)
+    out_dir     : str – module_datasets 디렉토리, shard 모드면 shard 디렉토리
+    shard       : ShardSpec – 지정 시 해당 종목만 처리하고 div_amount_rank 는 비워 둔 채
+                  _row 와 함께 저장 (merge_feature_shards 에서 완성)
+
+    Returns
+    -------
+    {module: 보존 이벤트 수}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if shard is not None:
+        clear_done(out_dir)
+    events = add_event_features(load_dividend_events(div_path, shard), load_sector_map(sector_path))
+    prices = load_prices(price_path, shard)
+    total = len(events)
+
+    if shard is None:
+        events["div_amount_rank"] = rank_div_amount(events)
+    else:
+        events["div_amount_rank"] = np.nan
+        events[[ROW_COL, "rcept_dt", "per_share_common"]].to_csv(
+            os.path.join(out_dir, f"{RANK_INPUTS}.csv"), index=False, encoding="utf-8-sig"
+        )
+
+    kept: Dict[str, int] = {}
+    for module in ["features_common", *WINDOWS]:
+        if module == "features_common":
+            rows = events
+            cols = ["corp_name"] + COMMON_COLS
+        else:
+            rows = slice_module_rows(events, prices, module)
+            cols = ["corp_name"] + COMMON_COLS + TARGET_COLS[module]
+        kept[module] = len(rows)
+
+        out_fp = os.path.join(out_dir, f"{module}.csv")
+        if shard is None:
+            _finalize(rows, module if module in WINDOWS else "clustering").to_csv(
+                out_fp, index=False, encoding="utf-8-sig"
+            )
+            pct = len(rows) / total * 100 if total else 0.0
+            print(f"✅ [{module}] 보존: {len(rows):,}/{total:,} ({pct:.1f}%) → {out_fp}")
+        else:
+            rows[[ROW_COL] + cols].to_csv(out_fp, index=False, encoding="utf-8-sig")
+
+    if shard is not None:
+        mark_done(out_dir, events=total, **kept)
+        print(f"✅ [features {shard.name}] 이벤트 {total:,}건 → {out_dir}")
+    return kept
+
+
+def merge_feature_shards(
+    data_dir: str,
+    count: int,
+    out_dir: str,
+    timeout: Optional[float] = None,
+) -> Dict[str, int]:
+    """features shard 출력 병합 → module_datasets/<module>.csv
+
+    div_amount_rank 는 모든 shard 의 rank_inputs 를 모아 월별로 다시 계산한다
+    (shard 내 rank 는 다른 종목을 모르므로 틀림). 행 순서는 _row 기준 → 비분할 결과와 동일.
+    """
+    dirs = completed_shard_dirs(data_dir, "features", count, timeout=timeout)
+    os.makedirs(out_dir, exist_ok=True)
+
+    rank_in = read_shard_csvs(
+        [os.path.join(d, f"{RANK_INPUTS}.csv") for d in dirs], parse_dates=["rcept_dt"]
+    )
+    rank_in = rank_in.sort_values(ROW_COL, kind="mergesort").reset_index(drop=True)
+    rank_map = pd.Series(rank_div_amount(rank_in).to_numpy(), index=rank_in[ROW_COL].to_numpy())
+
+    merged: Dict[str, int] = {}
+    for module in ["features_common", *WINDOWS]:
+        rows = read_shard_csvs(
+            [os.path.join(d, f"{module}.csv") for d in dirs],
+            dtype={"stock_code": str},
+            parse_dates=["rcept_dt"],
+        )
+        if len(rows):
+            rows["div_amount_rank"] = rows[ROW_COL].map(rank_map)
+        else:
+            rows = pd.DataFrame(columns=[ROW_COL, "corp_name"] + COMMON_COLS + TARGET_COLS.get(module, []))
+        out = _finalize(rows, module if module in WINDOWS else "clustering")
+        out_fp = os.path.join(out_dir, f"{module}.csv")
+        tmp = f"{out_fp}.tmp"
+        out.to_csv(tmp, index=False, encoding="utf-8-sig")
+        os.replace(tmp, out_fp)
+        merged[module] = len(out)
+        print(f"✅ [{module}] shard {count}개 병합 → {out_fp} ({len(out):,} rows)")
+    return merged
+
+
+# ─────────────────────────────────────────────────────
+# 증분 빌드 — 신규·변경 이벤트만 재계산, 영향받은 월만 재랭크
+# ─────────────────────────────────────────────────────
+CACHE_DIR = "_feature_cache"
+CACHE_VERSION = 2
+EVENT_CACHE = "events.csv"          # 이벤트별 입력·윈도우 지문 + 윈도우 결과 + rank
+META_FILE = "meta.json"             # 캐시 버전 + 일봉 파일 스탬프
+KEY_COL = "_key"                    # rcept_no (+ 중복 시 순번)
+INPUT_COLS = [
+    "stock_code", "rcept_dt", "corp_name", "sector",
+    "per_share_common", "yield_common", "total_amount",
+]
+_W_MAX = max(WINDOWS.values())
+
+
+def _event_keys(events: pd.DataFrame) -> pd.Series:
+    dup = events.groupby("rcept_no").cumcount()
+    return events["rcept_no"].astype(str) + np.where(dup > 0, ":" + dup.astype(str), "")
+
+
+def _input_hashes(events: pd.DataFrame) -> np.ndarray:
+    """피처 입력 컬럼 지문 — 값이 바뀐 이벤트 탐지용"""
+    return pd.util.hash_pandas_object(events[INPUT_COLS], index=False).to_numpy()
+
+
+def _window_hashes(events: pd.DataFrame, prices: pd.DataFrame) -> np.ndarray:
+    """이벤트별 일봉 윈도우 지문 — 기준일 ±_W_MAX 거래일의 (date, close) 만 해시
+
+    윈도우·타겟은 이 구간 일봉으로만 정해지므로, 윈도우 밖 일봉이 추가·수정돼도 재계산하지 않고
+    윈도우가 아직 덜 찬 이벤트·윈도우 안 종가가 수정된 이벤트만 잡힌다. 일봉이 없으면 0.
+    """
+    out = np.zeros(len(events), dtype=np.uint64)
+    if prices.empty or events.empty:
+        return out
+    codes = prices["stock_code"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    bounds = dict(zip(codes[starts], zip(starts, ends)))
+    dates = prices["date"].to_numpy(dtype="datetime64[ns]")
+    ev_dates = events["rcept_dt"].to_numpy(dtype="datetime64[ns]")
+    offs = np.arange(-_W_MAX, _W_MAX + 1)
+
+    rows, owner = [], []
+    for code, idx in events.groupby("stock_code", sort=False).indices.items():
+        if code not in bounds:
+            continue
+        s, e = bounds[code]
+        win = s + np.searchsorted(dates[s:e], ev_dates[idx], side="left")[:, None] + offs
+        ok = (win >= s) & (win < e)
+        rows.append(win[ok])
+        owner.append(np.broadcast_to(idx[:, None], win.shape)[ok])
+    if rows:
+        rows, owner = np.concatenate(rows), np.concatenate(owner)
+        h = pd.util.hash_pandas_object(prices[["date", "close"]].iloc[rows], index=False).to_numpy()
+        np.add.at(out, owner, h)    # uint64 합 (오버플로는 mod 2^64 로 순환)
+    return out
+
+
+def _event_results(events: pd.DataFrame, prices: pd.DataFrame) -> pd.DataFrame:
+    """이벤트별 모듈 윈도우 결과: kept_<module> + 타겟 (KEY_COL 인덱스)"""
+    res = pd.DataFrame(index=events[KEY_COL].to_numpy())
+    for module in WINDOWS:
+        rows = slice_module_rows(events, prices, module).set_index(KEY_COL)
+        res[f"kept_{module}"] = res.index.isin(rows.index)
+        for col in TARGET_COLS[module]:
+            res[col] = rows[col].reindex(res.index).astype(float)
+    return res
+
+
+def _file_stamp(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_cache(cache_dir: str):
+    """(이벤트 캐시, meta) — 없거나 버전이 다르면 (None, None)"""
+    ev_fp, meta_fp = os.path.join(cache_dir, EVENT_CACHE), os.path.join(cache_dir, META_FILE)
+    if not (os.path.exists(ev_fp) and os.path.exists(meta_fp)):
+        return None, None
+    with open(meta_fp, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION:
+        return None, None
+    cache = pd.read_csv(
+        ev_fp,
+        dtype={KEY_COL: str, "stock_code": str, "ev_hash": "uint64", "win_hash": "uint64", "period": str},
+        float_precision="round_trip",
+    ).set_index(KEY_COL)
+    return cache, meta
+
+
+def _upsert_csv(df: pd.DataFrame, path: str, index_path: str) -> int:
+    """df 를 CSV 로 기록하되 직전 기록과 같은 앞부분 행은 두고 처음 달라진 행부터만 다시 씀
+
+    index_path(.npz)에 행 지문·바이트 오프셋·컬럼 dtype 을 보관한다. 인덱스가 없거나 dtype 이
+    바뀌었거나(컬럼 단위 서식이 달라짐) 파일 크기가 맞지 않으면(중단된 기록) 전체를 다시 쓴다.
+    결과 파일은 df.to_csv(path, index=False, encoding="utf-8-sig") 와 같다. 다시 쓴 행 수 반환
+    """
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    sig = "|".join(f"{c}:{t}" for c, t in df.dtypes.items())
+
+    start = None
+    if os.path.exists(path) and os.path.exists(index_path):
+        old = np.load(index_path)
+        if str(old["sig"]) == sig and int(old["offsets"][-1]) == os.path.getsize(path):
+            n = min(len(old["hash"]), len(row_hash))
+            diff = np.flatnonzero(old["hash"][:n] != row_hash[:n])
+            start = int(diff[0]) if len(diff) else n
+            if start == len(row_hash) == len(old["hash"]):
+                return 0
+            offsets = old["offsets"][: start + 1]
+
+    if start is None:
+        data = df.to_csv(index=False).encode("utf-8")
+        lines = data.splitlines(keepends=True)
+        if len(lines) != len(df) + 1:   # 값 안 줄바꿈 → 행 오프셋 불가, 다음 실행도 전체 기록
+            sig = ""
+        head = len(codecs.BOM_UTF8) + len(lines[0])
+        offsets = np.r_[0, np.cumsum([len(x) for x in lines[1:]], dtype=np.int64)] + head
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fw:
+            fw.write(codecs.BOM_UTF8 + data)
+        os.replace(tmp, path)
+        start = 0
+    else:
+        data = df.iloc[start:].to_csv(index=False, header=False).encode("utf-8") if start < len(df) else b""
+        lines = data.splitlines(keepends=True)
+        if len(lines) != len(df) - start:
+            sig = ""
+        cut = int(offsets[-1])
+        offsets = np.r_[offsets, cut + np.cumsum([len(x) for x in lines], dtype=np.int64)]
+        with open(path, "r+b") as fw:
+            fw.seek(cut)
+            fw.truncate()
+            fw.write(data)
+
+    tmp = f"{index_path}.tmp.npz"
+    np.savez(tmp, hash=row_hash, offsets=offsets.astype(np.int64), sig=np.array(sig))
+    os.replace(tmp, index_path)
+    return len(df) - start
+
+
+def update_module_datasets(
+    div_path: str,
+    price_path: str,
+    sector_path: str,
+    out_dir: str,
+    full: bool = False,
+) -> Dict[str, int]:
+    """모듈 데이터셋 증분 갱신 (캐시: <out_dir>/_feature_cache/)
+
+    1. 신규·입력값 변경 이벤트 + 일봉 윈도우 지문이 바뀐 이벤트만 윈도우·타겟 재계산
+       (일봉 파일이 그대로면 읽지 않음, 바뀌었으면 이벤트 윈도우 구간만 해시)
+    2. div_amount_rank 는 신규·변경·삭제 이벤트가 속한 월(변경 전 월 포함)만 재랭크
+    3. 모듈 CSV·이벤트 캐시는 처음 달라진 행부터만 다시 씀 (행 순서는 dividend_ml_ready.csv 순,
+       보통 새 이벤트·최근 월이 있는 파일 끝부분)
+
+    full=True 또는 캐시가 없으면 전체 재계산 (build_module_datasets 와 동일 결과, 검증용).
+
+    Returns
+    -------
+    {module: 보존 이벤트 수, "recomputed": 재계산 이벤트 수, "reranked_months": 재랭크 월 수,
+     "rewritten_rows": 다시 쓴 모듈 CSV 행 수}
+    """
+    cache_dir = os.path.join(out_dir, CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    events = add_event_features(load_dividend_events(div_path), load_sector_map(sector_path))
+    events[KEY_COL] = _event_keys(events)
+    events["ev_hash"] = _input_hashes(events)
+    events["period"] = events["period"].astype(str)
+    keys = events[KEY_COL]
+    px_stamp = _file_stamp(price_path)
+
+    cache, meta = (None, None) if full else _load_cache(cache_dir)
+    if cache is None:
+        changed = np.ones(len(events), dtype=bool)
+        rerank = set(events["period"])
+    else:
+        # uint64 해시는 reindex(NaN → float) 시 정밀도가 깨지므로 dict 로 비교
+        cached_hash = cache["ev_hash"].to_dict()
+        changed = np.array(
+            [cached_hash.get(k) != h for k, h in zip(keys, events["ev_hash"])], dtype=bool
+        )
+        removed = cache.index.difference(keys)
+        rerank = (
+            set(events.loc[changed, "period"])
+            | set(cache["period"].reindex(keys[changed]).dropna())   # 날짜가 바뀐 이벤트의 이전 월
+            | set(cache.loc[removed, "period"])
+        )
+
+    # ── 1) 윈도우 지문: 일봉 파일이 바뀌었으면 전 이벤트, 아니면 신규·변경 이벤트만 (해당 종목 일봉만 로드)
+    px_changed = cache is None or meta.get("prices") != px_stamp
+    need = np.ones(len(events), dtype=bool) if px_changed else changed
+    prices = load_prices(price_path, codes=set(events.loc[need, "stock_code"])) if need.any() else None
+    win_hash = np.zeros(len(events), dtype=np.uint64)
+    if cache is not None:
+        cached_win = cache["win_hash"].to_dict()
+        win_hash[~need] = [cached_win[k] for k in keys[~need]]
+    if need.any():
+        win_hash[need] = _window_hashes(events.loc[need], prices)
+    events["win_hash"] = win_hash
+    if cache is None:
+        recompute = changed
+    else:
+        recompute = changed | np.array(
+            [cached_win.get(k) != h for k, h in zip(keys, win_hash)], dtype=bool
+        )
+
+    # ── 2) 윈도우·타겟: 재계산 대상 이벤트만
+    sub = events.loc[recompute].reset_index(drop=True)
+    if len(sub):
+        fresh = _event_results(sub, prices[prices["stock_code"].isin(sub["stock_code"].unique())])
+    else:
+        fresh = _event_results(sub, pd.DataFrame(columns=["stock_code", "date", "close"]))
+    result_cols = list(fresh.columns)
+    if cache is not None:
+        reuse = cache.loc[keys[~recompute], result_cols]
+        results = pd.concat([reuse, fresh]).reindex(keys)
+    else:
+        results = fresh.reindex(keys)
+
+    # ── 3) div_amount_rank: 영향받은 월만 재계산 (월 단위 groupby 이므로 정확)
+    in_rerank = events["period"].isin(rerank).to_numpy()
+    rank = pd.Series(np.nan, index=keys.to_numpy())
+    if in_rerank.any():
+        rank[in_rerank] = rank_div_amount(events.loc[in_rerank]).to_numpy()
+    if cache is not None and (~in_rerank).any():
+        rank[~in_rerank] = cache["div_amount_rank"].reindex(keys[~in_rerank]).to_numpy()
+    events["div_amount_rank"] = rank.to_numpy()
+
+    # ── 4) 모듈 CSV·캐시: 달라진 행부터만 기록
+    for col in result_cols:
+        events[col] = results[col].to_numpy()
+
+    kept: Dict[str, int] = {}
+    rewritten = 0
+    for module in ["features_common", *WINDOWS]:
+        if module == "features_common":
+            rows = events
+        else:
+            rows = events[events[f"kept_{module}"].astype(bool)].copy()
+            if module == "classification":
+                rows["up_1d"] = rows["up_1d"].astype(int)
+        kept[module] = len(rows)
+        rewritten += _upsert_csv(
+            _finalize(rows, module if module in WINDOWS else "clustering"),
+            os.path.join(out_dir, f"{module}.csv"),
+            os.path.join(cache_dir, f"{module}.idx.npz"),
+        )
+
+    _upsert_csv(
+        events[[KEY_COL, "ev_hash", "win_hash", "stock_code", "period", "div_amount_rank", *result_cols]],
+        os.path.join(cache_dir, EVENT_CACHE),
+        os.path.join(cache_dir, "events.idx.npz"),
+    )
+    with open(os.path.join(cache_dir, META_FILE), "w", encoding="utf-8") as fw:
+        json.dump({"version": CACHE_VERSION, "prices": px_stamp}, fw)
+
+    kept["recomputed"] = int(recompute.sum())
+    kept["reranked_months"] = len(rerank)
+    kept["rewritten_rows"] = rewritten
+    print(
+        f"✅ [features] 이벤트 {len(events):,}건 중 재계산 {kept['recomputed']:,}건, "
+        f"재랭크 월 {kept['reranked_months']}개, 다시 쓴 행 {rewritten:,}개 → {out_dir}"
+    )
+    return kept
+
+
+def verify_incremental(
+    div_path: str,
+    price_path: str,
+    sector_path: str,
+    out_dir: str,
+) -> bool:
+    """out_dir 의 (증분 갱신된) 모듈 CSV 가 전체 재빌드 결과와 같은지 확인"""
+    import filecmp
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_module_datasets(div_path, price_path, sector_path, tmp)
+        diff = [
+            m for m in ["features_common", *WINDOWS]
+            if not filecmp.cmp(os.path.join(tmp, f"{m}.csv"), os.path.join(out_dir, f"{m}.csv"), shallow=False)
+        ]
+    print("✅ 증분 결과 = 전체 재빌드" if not diff else f"❌ 전체 재빌드와 다른 모듈: {diff}")
+    return not diff
@@ -0,0 +1,146 @@
+# utils/filing_scorer.py
+# ─────────────────────────────────────────────────────────
+# 실시간 공시 스코어러 (dart_watcher 큐 소비 측)
+#   • 큐 레코드 1건 → 공시 시점에 알 수 있는 공통 피처(features_common 과 같은 컬럼)
+#   • div_amount_rank: dividend_ml_ready.csv + 이미 스코어링한 공시 중 같은 달 기준 pct rank
+#   • 저장된 분류 모델(lgbm_classifier.pkl)의 입력 컬럼이 모두 있으면 p_up 계산,
+#     부족하면 p_up 없이 missing_features 기록 (배치 파이프라인에서 완성)
+#   • 결과: <data_dir>/live_scores.jsonl (rcept_no 당 1줄, at-least-once 재처리에도 중복 없음)
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+from .data_cleaning import convert_numeric_columns
+from .features import COMMON_COLS, add_event_features, load_sector_map, rank_div_amount
+
+NUMERIC_FIELDS = ["per_share_common", "yield_common", "total_amount"]
+SCORES_FILE = "live_scores.jsonl"
+
+
+def _jsonable(v):
+    if pd.isna(v):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.strftime("%Y-%m-%d")
+    return v.item() if hasattr(v, "item") else v
+
+
+class FilingScorer:
+    """consume_queue(handler=FilingScorer(data_dir)) 로 쓰는 큐 레코드 스코어러"""
+
+    def __init__(
+        self,
+        data_dir: str = "data",
+        out_path: Optional[str] = None,
+        model_path: Optional[str] = None,
+    ):
+        self.data_dir = data_dir
+        self.out_path = out_path or os.path.join(data_dir, SCORES_FILE)
+        self.model_path = model_path or os.path.join(data_dir, "models", "lgbm_classifier.pkl")
+        self._lock = threading.Lock()
+        self._model = None
+        self._scored = self._load_scored()
+
+        sector_fp = os.path.join(data_dir, "sector_info.csv")
+        self._sectors = load_sector_map(sector_fp) if os.path.exists(sector_fp) else {}
+        hist_fp = os.path.join(data_dir, "dividend_ml_ready.csv")
+        self._history = (
+            pd.read_csv(hist_fp, usecols=["rcept_no", "per_share_common"], dtype={"rcept_no": str})
+            if os.path.exists(hist_fp)
+            else pd.DataFrame(columns=["rcept_no", "per_share_common"])
+        )
+
+    def _load_scored(self) -> dict:
+        scored = {}
+        if os.path.exists(self.out_path):
+            with open(self.out_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        scored[rec["rcept_no"]] = rec
+        return scored
+
+    def _load_model(self):
+        if self._model is None and os.path.exists(self.model_path):
+            import joblib
+
+            self._model = joblib.load(self.model_path)
+        return self._model
+
+    # ── 피처
+    def features(self, record: dict) -> pd.DataFrame:
+        """레코드 → 1행 DataFrame (corp_name + COMMON_COLS)"""
+        df = pd.DataFrame([{
+            "corp_name":  record.get("corp_name"),
+            "stock_code": str(record.get("stock_code") or "").zfill(6),
+            "rcept_no":   record["rcept_no"],
+            **{c: record.get(c) for c in NUMERIC_FIELDS},
+        }])
+        df = convert_numeric_columns(df, NUMERIC_FIELDS)
+        df["rcept_dt"] = pd.to_datetime(df["rcept_no"].str[:8], format="%Y%m%d")
+        df = add_event_features(df, self._sectors)
+
+        # 같은 달 이벤트(과거 + 이미 스코어링한 실시간 공시) 기준 pct rank
+        peers = pd.concat([
+            self._history,
+            pd.DataFrame(
+                [{"rcept_no": k, "per_share_common": v.get("per_share_common")} for k, v in self._scored.items()],
+                columns=["rcept_no", "per_share_common"],
+            ),
+        ], ignore_index=True)
+        peers = peers[(peers["rcept_no"].str[:6] == record["rcept_no"][:6]) & (peers["rcept_no"] != record["rcept_no"])]
+        pool = pd.concat([peers, df[["rcept_no", "per_share_common"]]], ignore_index=True)
+        pool["per_share_common"] = pd.to_numeric(pool["per_share_common"], errors="coerce")
+        pool["period"] = pool["rcept_no"].str[:6]
+        df["div_amount_rank"] = rank_div_amount(pool).iloc[-1]
+        return df[["corp_name"] + COMMON_COLS]
+
+    def _predict(self, X: pd.DataFrame) -> tuple[Optional[float], List[str]]:
+        model = self._load_model()
+        if model is None:
+            return None, ["<model>"]
+        cols = list(getattr(model, "feature_names_in_", []))
+        missing = [c for c in cols if c not in X.columns]
+        if not cols or missing:
+            return None, missing or ["<feature_names_in_>"]
+        return float(model.predict_proba(X[cols])[:, 1][0]), []
+
+    # ── 큐 핸들러
+    def __call__(self, record: dict) -> dict:
+        rcept_no = record["rcept_no"]
+        with self._lock:
+            if rcept_no in self._scored:  # 재전달(at-least-once) → 기존 결과 유지
+                return self._scored[rcept_no]
+
+        X = self.features(record)
+        try:
+            p_up, missing = self._predict(X)
+        except Exception as e:
+            p_up, missing = None, [f"<error: {e}>"]
+        row = X.iloc[0]
+        out = {
+            "rcept_no":  rcept_no,
+            "scored_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            **{k: _jsonable(v) for k, v in row.items()},
+            "p_up": p_up,
+            "missing_features": missing,
+        }
+
+        with self._lock:
+            if rcept_no in self._scored:
+                return self._scored[rcept_no]
+            os.makedirs(os.path.dirname(self.out_path) or ".", exist_ok=True)
+            with open(self.out_path, "a", encoding="utf-8") as fw:
+                fw.write(json.dumps(out, ensure_ascii=False) + "\n")
+            self._scored[rcept_no] = out
+        p_txt = "-" if p_up is None else f"{p_up:.3f}"
+        print(f"🧮 {rcept_no} {out['corp_name']} p_up={p_txt} rank={out['div_amount_rank']}", flush=True)
+        return out
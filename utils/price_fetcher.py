@@ -0,0 +1,439 @@
+# utils/price_fetcher.py
+# ─────────────────────────────────────────────────────────
+# 주가 수집 + ±N일 윈도우 검증 (02_price_fetching.ipynb 모듈화)
+#   • 이벤트 테이블 → 현재 KRX 상장 종목만 (노트북 krx_live_codes 필터) → 종목별 필요한 날짜 구간(±window_days) 정확히 계산·병합
+#   • 종목별 디스크 캐시(<code>.csv + 수집 구간 <code>.json) 확인 후 빈 구간만 다운로드
+#   • 스레드 병렬 + 전역 rate limit + 지수 백오프 재시도
+#   • price_history.csv / window_check_result.csv 생성 (벡터화 슬라이싱)
+#   • 데이터 소스 교체 가능: FdrProvider(기본) / LocalPriceProvider(테스트 fixture)
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from .sharding import ShardSpec, clear_done, completed_shard_dirs, mark_done, merge_csv
+
+PRICE_COLS = ["date", "close", "volume"]
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+# ─────────────────────────────────────────────────────
+# 데이터 소스
+# ─────────────────────────────────────────────────────
+class PriceProvider:
+    """종목 1개의 [start, end] 일봉을 date/close/volume DataFrame 으로 반환"""
+
+    def fetch(self, code: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def listed_codes(self) -> Optional[Set[str]]:
+        """현재 상장 종목 코드 집합 (None → 상장 필터 없음)"""
+        return None
+
+
+class FdrProvider(PriceProvider):
+    """FinanceDataReader (KRX:<code> 우선, 실패 시 <code>)"""
+
+    def fetch(self, code: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        import FinanceDataReader as fdr
+
+        s, e = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        try:
+            df = fdr.DataReader(f"KRX:{code}", s, e)
+        except Exception:
+            df = fdr.DataReader(code, s, e)
+        return (
+            df.reset_index()[["Date", "Close", "Volume"]]
+            .rename(columns={"Date": "date", "Close": "close", "Volume": "volume"})
+        )
+
+    def listed_codes(self) -> Optional[Set[str]]:
+        """fdr.StockListing("KRX") 기준 현재 상장 종목 (02_price_fetching 의 krx_live_codes)"""
+        import FinanceDataReader as fdr
+
+        return set(fdr.StockListing("KRX")["Code"].astype(str).str.zfill(6))
+
+
+class LocalPriceProvider(PriceProvider):
+    """로컬 long 테이블(stock_code, date, close, volume)에서 잘라 주는 fixture 용 소스
+
+    listed 지정 시 그 코드 집합을 상장 종목으로 보고 (None → 상장 필터 없음).
+    """
+
+    def __init__(self, prices: pd.DataFrame | str, listed: Optional[Set[str]] = None):
+        if isinstance(prices, str):
+            prices = pd.read_csv(prices, parse_dates=["date"], dtype={"stock_code": str})
+        prices = prices.sort_values(["stock_code", "date"])
+        self._by_code = {code: grp for code, grp in prices.groupby("stock_code")}
+        self.calls: List[Tuple[str, pd.Timestamp, pd.Timestamp]] = []
+        self._listed = set(listed) if listed is not None else None
+        self._lock = threading.Lock()
+
+    def fetch(self, code: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        with self._lock:
+            self.calls.append((code, start, end))
+        grp = self._by_code.get(code)
+        if grp is None:
+            raise KeyError(f"로컬 주가 없음: {code}")
+        mask = grp["date"].between(start, end)
+        return grp.loc[mask, PRICE_COLS].reset_index(drop=True)
+
+    def listed_codes(self) -> Optional[Set[str]]:
+        return self._listed
+
+
+class RateLimiter:
+    """스레드 공유 최소 호출 간격 제한 (calls_per_sec)"""
+
+    def __init__(self, calls_per_sec: float):
+        self._interval = 1.0 / calls_per_sec if calls_per_sec > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ─────────────────────────────────────────────────────
+# 구간 계산
+# ─────────────────────────────────────────────────────
+def _merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """정렬 후 겹치거나 하루 차이로 붙은 구간 병합"""
+    merged: List[Interval] = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def compute_required_ranges(
+    events: pd.DataFrame,
+    window_days: int = 30,
+) -> Dict[str, List[Interval]]:
+    """(stock_code, rcept_dt) → 종목별 ±window_days 병합 구간 (groupby 1회)"""
+    ev = events[["stock_code", "rcept_dt"]].drop_duplicates().sort_values(["stock_code", "rcept_dt"])
+    pad = timedelta(days=window_days)
+    return {
+        code: _merge_intervals([(dt - pad, dt + pad) for dt in grp["rcept_dt"]])
+        for code, grp in ev.groupby("stock_code")
+    }
+
+
+def missing_gaps(needed: List[Interval], covered: List[Interval]) -> List[Interval]:
+    """needed 구간 중 covered 에 포함되지 않는 부분만 반환"""
+    gaps: List[Interval] = []
+    covered = _merge_intervals(covered)
+    for s, e in needed:
+        cur = s
+        for cs, ce in covered:
+            if ce < cur or cs > e:
+                continue
+            if cs > cur:
+                gaps.append((cur, cs - timedelta(days=1)))
+            cur = max(cur, ce + timedelta(days=1))
+            if cur > e:
+                break
+        if cur <= e:
+            gaps.append((cur, e))
+    return gaps
+
+
+# ─────────────────────────────────────────────────────
+# 종목별 캐시
+# ─────────────────────────────────────────────────────
+class PriceCache:
+    """<cache_dir>/<code>.csv (일봉) + <code>.json (수집 완료 구간)"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, code: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, code)
+        return f"{base}.csv", f"{base}.json"
+
+    def load(self, code: str) -> Tuple[pd.DataFrame, List[Interval]]:
+        csv_fp, cov_fp = self._paths(code)
+        if not os.path.exists(csv_fp):
+            return pd.DataFrame(columns=PRICE_COLS), []
+        df = pd.read_csv(csv_fp, parse_dates=["date"])[PRICE_COLS]
+        if os.path.exists(cov_fp):
+            with open(cov_fp, encoding="utf-8") as f:
+                covered = [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in json.load(f)]
+        elif len(df):
+            # 구간 기록 이전(노트북) 캐시: 데이터 최소~최대일을 수집 완료로 간주
+            covered = [(df["date"].min(), df["date"].max())]
+        else:
+            covered = []
+        return df, covered
+
+    def save(self, code: str, df: pd.DataFrame, covered: List[Interval]) -> None:
+        csv_fp, cov_fp = self._paths(code)
+        out = df.assign(stock_code=code)
+        out.to_csv(f"{csv_fp}.tmp", index=False)
+        os.replace(f"{csv_fp}.tmp", csv_fp)
+        with open(f"{cov_fp}.tmp", "w", encoding="utf-8") as fw:
+            json.dump(
+                [(s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")) for s, e in _merge_intervals(covered)],
+                fw,
+            )
+        os.replace(f"{cov_fp}.tmp", cov_fp)
+
+
+def _fetch_stock(
+    code: str,
+    needed: List[Interval],
+    cache: PriceCache,
+    provider: PriceProvider,
+    limiter: RateLimiter,
+    max_retry: int,
+    backoff: float,
+) -> Tuple[pd.DataFrame, int]:
+    """캐시 확인 → 빈 구간만 다운로드 → 캐시 갱신. (일봉, 다운로드 호출 수) 반환"""
+    cached, covered = cache.load(code)
+    # 오늘 이후는 아직 확정 데이터가 없으므로 수집 완료 구간으로 기록하지 않음
+    today = pd.Timestamp.today().normalize() - timedelta(days=1)
+    gaps = missing_gaps(needed, covered)
+
+    parts = [cached]
+    for s, e in gaps:
+        delay = 1.0
+        for attempt in range(1, max_retry + 1):
+            limiter.wait()
+            try:
+                parts.append(provider.fetch(code, s, e)[PRICE_COLS])
+                break
+            except Exception:
+                if attempt == max_retry:
+                    raise
+                time.sleep(delay)
+                delay *= backoff
+        if s <= today:
+            covered.append((s, min(e, today)))
+
+    if not gaps:
+        return cached, 0
+    frames = [p for p in parts if len(p)]
+    if frames:
+        df = (
+            pd.concat(frames, ignore_index=True)
+            .assign(date=lambda d: pd.to_datetime(d["date"]))
+            .drop_duplicates(subset="date", keep="last")
+            .sort_values("date")
+            .reset_index(drop=True)
+        )
+    else:
+        df = pd.DataFrame(columns=PRICE_COLS)
+    cache.save(code, df, covered)
+    return df, len(gaps)
+
+
+# ─────────────────────────────────────────────────────
+# price_history / window_check 생성 (벡터화)
+# ─────────────────────────────────────────────────────
+def _slice_windows(
+    events: pd.DataFrame,
+    prices: pd.DataFrame,
+    window_days: int,
+    check_window: int,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """종목별 searchsorted 로 이벤트 ±window_days 행 추출 + ±check_window 거래일 수 계산"""
+    hist_parts, chk_parts = [], []
+    price_groups = {c: g for c, g in prices.sort_values(["stock_code", "date"]).groupby("stock_code")}
+    pad = np.timedelta64(window_days, "D")
+
+    for code, ev in events.groupby("stock_code"):
+        grp = price_groups.get(code)
+        if grp is None or grp.empty:
+            continue
+        dates = grp["date"].to_numpy(dtype="datetime64[ns]")
+        dts = ev["rcept_dt"].to_numpy(dtype="datetime64[ns]")
+
+        lo = np.searchsorted(dates, dts - pad, side="left")
+        hi = np.searchsorted(dates, dts + pad, side="right")
+        counts = hi - lo
+        idx = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)]) if counts.sum() else np.array([], int)
+        sub = grp.iloc[idx].reset_index(drop=True)
+        sub.insert(1, "rcept_dt", np.repeat(dts, counts))
+        hist_parts.append(sub)
+
+        # ±check_window 거래일 (window 슬라이스 내부 기준, 노트북 win_len 과 동일)
+        pos = np.searchsorted(dates, dts, side="left")
+        n_days = np.minimum(pos + check_window + 1, hi) - np.maximum(pos - check_window, lo)
+        chk_parts.append(pd.DataFrame({
+            "stock_code": code,
+            "rcept_dt": dts,
+            "n_days": np.where(counts > 0, np.maximum(n_days, 0), 0),
+        }))
+
+    df_hist = (
+        pd.concat(hist_parts, ignore_index=True)
+        .loc[:, ["stock_code", "rcept_dt", "date", "close", "volume"]]
+        .sort_values(["stock_code", "rcept_dt", "date"])
+        .reset_index(drop=True)
+    ) if hist_parts else pd.DataFrame(columns=["stock_code", "rcept_dt", "date", "close", "volume"])
+    df_chk = (
+        pd.concat(chk_parts, ignore_index=True)
+        if chk_parts else pd.DataFrame(columns=["stock_code", "rcept_dt", "n_days"])
+    )
+    return df_hist, df_chk
+
+
+def load_events(div_path: str) -> pd.DataFrame:
+    """배당 이벤트 CSV → (stock_code, rcept_dt) 유니크 테이블"""
+    df_div = pd.read_csv(div_path, dtype={"stock_code": str, "rcept_no": str})
+    if "stock_code" not in df_div.columns:
+        raise KeyError(f"{div_path} 에 stock_code 컬럼이 없습니다")
+    df_div["stock_code"] = df_div["stock_code"].str.zfill(6)
+    if "rcept_no" in df_div.columns:
+        df_div["rcept_dt"] = pd.to_datetime(df_div["rcept_no"].str[:8], format="%Y%m%d", errors="coerce")
+    else:
+        df_div["rcept_dt"] = pd.to_datetime(df_div["rcept_dt"].astype(str), format="%Y%m%d", errors="coerce")
+    return (
+        df_div[["stock_code", "rcept_dt"]]
+        .dropna()
+        .drop_duplicates()
+        .sort_values(["stock_code", "rcept_dt"])
+        .reset_index(drop=True)
+    )
+
+
+# ─────────────────────────────────────────────────────
+# 메인 함수: run_price_fetching
+# ─────────────────────────────────────────────────────
+def run_price_fetching(
+    div_path: str,
+    hist_path: str,
+    check_path: str,
+    cache_dir_path: str,
+    window_days: int = 30,
+    max_workers: int = 8,
+    provider: Optional[PriceProvider] = None,
+    calls_per_sec: float = 5.0,
+    max_retry: int = 3,
+    backoff: float = 2.5,
+    check_window: int = 10,
+    min_days: int = 21,
+    shard: Optional[ShardSpec] = None,
+    listed_only: bool = True,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """배당 이벤트별 주가 수집 → price_history.csv / window_check_result.csv 저장
+
+    Parameters
+    ----------
+    div_path       : str   – dividend_ml_ready.csv (stock_code, rcept_no 포함)
+    hist_path      : str   – 이벤트별 ±window_days 주가 저장 경로
+    check_path     : str   – ±check_window 거래일 확보 검증 결과 저장 경로
+    cache_dir_path : str   – 종목별 주가 캐시 디렉토리
+    provider       : PriceProvider – 데이터 소스 (None → FdrProvider)
+    calls_per_sec  : float – 전체 스레드 합산 다운로드 호출 상한
+    min_days       : int   – window_check_result 에 남길 최소 거래일 수
+    shard          : ShardSpec – 지정 시 해당 종목만 수집, hist_path 디렉토리에 완료 마커 기록
+                     (종목별 캐시 파일은 shard 간 겹치지 않으므로 cache_dir 공유 가능)
+    listed_only    : bool  – provider.listed_codes() 에 없는(상장폐지 등) 종목 이벤트 제외
+                     (02_price_fetching 과 동일; FdrProvider 는 KRX 상장 목록 사용)
+    """
+    provider = provider or FdrProvider()
+    cache = PriceCache(cache_dir_path)
+    limiter = RateLimiter(calls_per_sec)
+    out_dir = os.path.dirname(hist_path) or "."
+    if shard is not None:
+        clear_done(out_dir)
+
+    events = load_events(div_path)
+    listed = provider.listed_codes() if listed_only else None
+    if listed is not None:
+        n_before = len(events)
+        events = events[events["stock_code"].isin(listed)].reset_index(drop=True)
+        print(f"   ✅ 상장 종목 필터: {n_before - len(events):,}건 제외")
+    if shard is not None:
+        events = shard.filter(events).reset_index(drop=True)
+    ranges = compute_required_ranges(events, window_days)
+    print(f"   ✅ 이벤트: {len(events):,}  |  종목: {len(ranges):,}")
+
+    prices, failed, n_calls = [], [], 0
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {
+            ex.submit(_fetch_stock, code, needed, cache, provider, limiter, max_retry, backoff): code
+            for code, needed in ranges.items()
+        }
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="주가 수집"):
+            code = futures[fut]
+            try:
+                df, calls = fut.result()
+            except Exception as e:
+                failed.append(code)
+                tqdm.write(f"❌ {code} 실패: {e}")
+                continue
+            n_calls += calls
+            if len(df):
+                prices.append(df.assign(stock_code=code))
+
+    print(f"   ✅ 다운로드 호출 {n_calls:,}회  |  실패 종목: {len(failed)}")
+    if failed:
+        fail_path = os.path.join(os.path.dirname(hist_path) or ".", "failed_codes.csv")
+        pd.DataFrame({"failed_code": sorted(failed)}).to_csv(fail_path, index=False)
+
+    df_price = (
+        pd.concat(prices, ignore_index=True)
+        if prices else pd.DataFrame(columns=PRICE_COLS + ["stock_code"])
+    )
+    df_hist, df_chk = _slice_windows(events, df_price, window_days, check_window)
+    df_hist.to_csv(hist_path, index=False, encoding="utf-8-sig")
+    print(f"   📁 price_history.csv 저장 ({len(df_hist):,} rows)")
+
+    df_chk = df_chk[df_chk["n_days"] >= min_days].reset_index(drop=True)
+    df_chk.to_csv(check_path, index=False, encoding="utf-8-sig")
+    print(f"   📁 window_check_result.csv 저장 (n_days ≥ {min_days}: {len(df_chk):,}건)")
+    if shard is not None:
+        mark_done(out_dir, events=len(events), failed=len(failed))
+    return df_hist, df_chk
+
+
+def merge_price_shards(
+    data_dir: str,
+    count: int,
+    hist_path: str,
+    check_path: str,
+    timeout: Optional[float] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """prices shard 출력 병합 → price_history.csv / window_check_result.csv (+ failed_codes.csv)
+
+    정렬 키가 비분할 실행의 출력 순서와 같으므로 결과 파일도 동일하다.
+    """
+    dirs = completed_shard_dirs(data_dir, "prices", count, timeout=timeout)
+    names = (os.path.basename(hist_path), os.path.basename(check_path))
+    df_hist = merge_csv(
+        [os.path.join(d, names[0]) for d in dirs], hist_path,
+        sort_keys=["stock_code", "rcept_dt", "date"], dtype={"stock_code": str},
+    )
+    df_chk = merge_csv(
+        [os.path.join(d, names[1]) for d in dirs], check_path,
+        sort_keys=["stock_code", "rcept_dt"], dtype={"stock_code": str},
+    )
+    fail_paths = [os.path.join(d, "failed_codes.csv") for d in dirs]
+    if any(os.path.exists(p) for p in fail_paths):
+        merge_csv(
+            fail_paths, os.path.join(os.path.dirname(hist_path) or ".", "failed_codes.csv"),
+            sort_keys=["failed_code"], dtype={"failed_code": str},
+        )
+    print(f"   📁 shard {count}개 병합 → {hist_path} ({len(df_hist):,} rows), {check_path} ({len(df_chk):,}건)")
+    return df_hist, df_chk
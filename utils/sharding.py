@@ -0,0 +1,229 @@
+# utils/sharding.py
+# ─────────────────────────────────────────────────────────
+# stock_code 해시 파티셔닝 — N개 워커(프로세스/머신)가 공유 파일시스템만으로 분산 실행
+#   • shard_of(): crc32(stock_code) % N  (PYTHONHASHSEED 무관, 머신 간 동일)
+#   • 레이아웃: <data_dir>/shards/<stage>/shard-XXX-of-NNN/...  + _SUCCESS.json
+#   • merge_csv()/merge_jsonl(): 완료 마커 확인 후 키 정렬·중복 제거로 결정적 병합
+#   • run_local_shards(): 로컬에서 워커 N개를 서브프로세스로 띄워 검증
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SHARDS_DIR = "shards"
+DONE_MARKER = "_SUCCESS.json"
+
+
+def shard_of(stock_code: str, count: int) -> int:
+    """종목코드 → shard 번호 (6자리 zero-pad 후 crc32)"""
+    return zlib.crc32(str(stock_code).zfill(6).encode("ascii")) % count
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """count 개 중 index 번째 shard (0-based)"""
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"잘못된 shard 지정: {self.index}/{self.count}")
+
+    @classmethod
+    def parse(cls, text: str) -> "ShardSpec":
+        """'i/n' 형식 (예: '0/4')"""
+        try:
+            i, n = text.split("/")
+            return cls(int(i), int(n))
+        except ValueError:
+            raise ValueError(f"shard 는 'i/n' 형식이어야 합니다: {text!r}") from None
+
+    @property
+    def name(self) -> str:
+        return f"shard-{self.index:03d}-of-{self.count:03d}"
+
+    def owns(self, stock_code: str) -> bool:
+        return shard_of(stock_code, self.count) == self.index
+
+    def mask(self, codes: "pd.Series"):
+        """stock_code Series → 이 shard 소속 여부 bool 배열 (고유 코드 단위로 해시)"""
+        import numpy as np
+
+        uniq, inv = np.unique(codes.astype(str).to_numpy(), return_inverse=True)
+        own = np.fromiter((self.owns(c) for c in uniq), dtype=bool, count=len(uniq))
+        return own[inv]
+
+    def filter(self, df: "pd.DataFrame", col: str = "stock_code") -> "pd.DataFrame":
+        return df[self.mask(df[col])]
+
+
+# ─────────────────────────────────────────────────────
+# 공유 파일시스템 레이아웃 & 완료 마커
+# ─────────────────────────────────────────────────────
+def shard_dir(data_dir: str, stage: str, spec: ShardSpec) -> str:
+    path = os.path.join(data_dir, SHARDS_DIR, stage, spec.name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def mark_done(path: str, **info) -> None:
+    """shard 출력이 모두 기록된 뒤 호출 — 병합 측은 이 마커가 있는 shard 만 신뢰"""
+    tmp = os.path.join(path, f".{DONE_MARKER}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fw:
+        json.dump({"finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **info}, fw, ensure_ascii=False)
+    os.replace(tmp, os.path.join(path, DONE_MARKER))
+
+
+def clear_done(path: str) -> None:
+    """재실행 시작 시 이전 완료 마커 제거 (중간 상태 병합 방지)"""
+    try:
+        os.remove(os.path.join(path, DONE_MARKER))
+    except FileNotFoundError:
+        pass
+
+
+def completed_shard_dirs(
+    data_dir: str,
+    stage: str,
+    count: int,
+    timeout: Optional[float] = None,
+    poll: float = 5.0,
+) -> List[str]:
+    """stage 의 count 개 shard 디렉토리 (모두 완료될 때까지 대기, timeout 초과 시 오류)"""
+    dirs = [
+        os.path.join(data_dir, SHARDS_DIR, stage, ShardSpec(i, count).name)
+        for i in range(count)
+    ]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        missing = [d for d in dirs if not os.path.exists(os.path.join(d, DONE_MARKER))]
+        if not missing:
+            return dirs
+        if deadline is None or time.monotonic() > deadline:
+            raise RuntimeError(
+                f"[{stage}] 완료되지 않은 shard {len(missing)}/{count}개: "
+                + ", ".join(os.path.basename(d) for d in missing)
+            )
+        time.sleep(poll)
+
+
+# ─────────────────────────────────────────────────────
+# 결정적 병합
+# ─────────────────────────────────────────────────────
+def write_csv_atomic(df: "pd.DataFrame", out_path: str) -> None:
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    df.to_csv(tmp, index=False, encoding="utf-8-sig")
+    os.replace(tmp, out_path)
+
+
+def read_shard_csvs(
+    paths: Iterable[str],
+    dtype: Optional[dict] = None,
+    parse_dates: Optional[Sequence[str]] = None,
+) -> "pd.DataFrame":
+    """존재하는 CSV 만 읽어 concat (빈 shard 허용)"""
+    import pandas as pd
+
+    parts = [
+        pd.read_csv(
+            p, dtype=dtype, parse_dates=list(parse_dates or []),
+            encoding="utf-8-sig", float_precision="round_trip",  # 병합 전후 float 비트 동일
+        )
+        for p in paths if os.path.exists(p)
+    ]
+    parts = [p for p in parts if len(p.columns)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def merge_csv(
+    paths: Iterable[str],
+    out_path: str,
+    sort_keys: Sequence[str],
+    dedup_keys: Optional[Sequence[str]] = None,
+    dtype: Optional[dict] = None,
+    parse_dates: Optional[Sequence[str]] = None,
+) -> "pd.DataFrame":
+    """shard CSV 들을 sort_keys 로 안정 정렬(+dedup_keys 중복 제거, 앞쪽 우선) 후 원자적 저장
+
+    shard 개수·완료 순서와 무관하게 같은 입력이면 같은 파일이 나온다.
+    """
+    df = read_shard_csvs(paths, dtype=dtype, parse_dates=parse_dates)
+    if dedup_keys and len(df):
+        df = df.drop_duplicates(subset=list(dedup_keys), keep="first")
+    if len(df):
+        df = df.sort_values(list(sort_keys), kind="mergesort").reset_index(drop=True)
+    write_csv_atomic(df, out_path)
+    return df
+
+
+def merge_jsonl(paths: Iterable[str], out_path: str, key: str = "rcept_no") -> int:
+    """JSONL 들을 key 기준 중복 제거(앞쪽 파일 우선) + key 정렬 후 원자적 저장. 레코드 수 반환"""
+    records = {}
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    records.setdefault(rec[key], rec)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fw:
+        for k in sorted(records):
+            fw.write(json.dumps(records[k], ensure_ascii=False) + "\n")
+    os.replace(tmp, out_path)
+    return len(records)
+
+
+def read_csv_shard(
+    path: str,
+    shard: Optional[ShardSpec],
+    col: str = "stock_code",
+    row_col: Optional[str] = None,
+    chunksize: int = 500_000,
+    **kwargs,
+) -> "pd.DataFrame":
+    """CSV 를 청크 단위로 읽어 shard 소속 행만 반환 (shard=None 이면 전체)
+
+    row_col 지정 시 필터 전 파일 내 행 순번을 기록 → 병합 때 원래 순서 복원용.
+    """
+    import numpy as np
+    import pandas as pd
+
+    chunks, offset = [], 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
+        if row_col:
+            chunk[row_col] = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        chunks.append(chunk if shard is None else shard.filter(chunk, col))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.read_csv(path, nrows=0, **kwargs)
+
+
+# ─────────────────────────────────────────────────────
+# 로컬 다중 프로세스 실행 (검증·단일 머신 병렬화용)
+# ─────────────────────────────────────────────────────
+def run_local_shards(argv: Sequence[str], count: int, python: Optional[str] = None) -> None:
+    """`python <argv> --shard i/count` 워커 count 개를 동시에 띄우고 모두 끝날 때까지 대기"""
+    python = python or sys.executable
+    procs = [
+        subprocess.Popen([python, *argv, "--shard", f"{i}/{count}"])
+        for i in range(count)
+    ]
+    failed = [i for i, p in enumerate(procs) if p.wait() != 0]
+    if failed:
+        raise RuntimeError(f"shard 워커 실패: {failed}")
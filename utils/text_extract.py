@@ -0,0 +1,215 @@
+# utils/text_extract.py
+# ─────────────────────────────────────────────────────────
+# 공시 HTML/XML → 임베딩용 compact report_text 추출 단계
+#   • script/style 제거 → 텍스트 추출 → NFKC 정규화 · 공백 정리 · 중복 줄 제거
+#   • 핵심 배당 테이블 필드(배당구분, 1주당 배당금, 기준일 …)를 맨 앞에 배치
+#   • max_chars 로 길이 제한 (임베딩 비용 = 실제 내용 길이)
+#   • 프로세스 풀 병렬 + rcept_no 기준 JSONL 캐시 (현재 버전·max_chars 항목만 유지)
+#   • add_report_text(): dividend_with_text.jsonl 에 report_text 필드 추가
+# ─────────────────────────────────────────────────────────
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tqdm import tqdm
+
+DEFAULT_MAX_CHARS = 2000
+EXTRACT_VERSION = 1  # 추출 규칙 변경 시 올려서 캐시 무효화
+
+_FIELD_LABELS = {
+    "div_type":            "배당구분",
+    "div_kind":            "배당종류",
+    "per_share_common":    "1주당 배당금(보통주)",
+    "per_share_preferred": "1주당 배당금(종류주)",
+    "yield_common":        "시가배당률(보통주)",
+    "yield_preferred":     "시가배당률(종류주)",
+    "total_amount":        "배당금총액",
+    "record_date":         "배당기준일",
+    "payment_date":        "배당금 지급예정일",
+    "meeting_held":        "주주총회 개최여부",
+    "meeting_date":        "주주총회 예정일",
+    "board_decision_date": "이사회결의일",
+}
+
+_WS = re.compile(r"\s+")
+_NOISE = re.compile(r"^[\W_]+$")  # 구분선·기호만 있는 줄
+
+
+def _normalize_lines(text: str) -> List[str]:
+    """NFKC 정규화 + 줄 단위 공백 정리 + 빈/기호 줄 제거 + 중복 줄 제거(순서 유지)"""
+    seen, lines = set(), []
+    for raw in unicodedata.normalize("NFKC", text).splitlines():
+        line = _WS.sub(" ", raw).strip()
+        if not line or _NOISE.match(line) or line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+    return lines
+
+
+def html_to_text(
+    html: str,
+    title: str = "",
+    max_chars: int = DEFAULT_MAX_CHARS,
+) -> str:
+    """공시 본문 HTML/XML → [제목] + [핵심 배당 필드] + [정규화 본문], max_chars 제한"""
+    from bs4 import BeautifulSoup
+
+    from .dart_api import parse_dividend_soup
+
+    if not html:
+        return title[:max_chars]
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "head"]):
+        tag.decompose()
+
+    info = parse_dividend_soup(soup)
+    header = [
+        f"{label}: {info[key]}"
+        for key, label in _FIELD_LABELS.items()
+        if info.get(key, "-") not in ("-", "")
+    ]
+    # 표는 행 단위 한 줄로 ("항목 값 값") — 셀마다 줄바꿈되는 것 방지
+    for tr in soup.find_all("tr"):
+        cells = [c.get_text(" ", strip=True) for c in tr.find_all(["td", "th"])]
+        tr.replace_with(" ".join(c for c in cells if c) + "\n")
+    body = _normalize_lines(soup.get_text("\n"))
+
+    parts = ([title] if title else []) + header
+    seen = set(parts)
+    text = "\n".join(parts + [line for line in body if line not in seen])
+    return text[:max_chars]
+
+
+# ─────────────────────────────────────────────────────
+# 병렬 추출 + rcept_no 캐시
+# ─────────────────────────────────────────────────────
+def _cache_key(max_chars: int) -> str:
+    return f"v{EXTRACT_VERSION}-{max_chars}"
+
+
+def _load_cache(path: Optional[str], key: str) -> Tuple[Dict[str, str], int]:
+    """현재 key 항목 {rcept_no: report_text} + 버릴 줄 수(다른 key·중복 rcept_no)"""
+    cache: Dict[str, str] = {}
+    stale = 0
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if rec.get("key") == key and rec["rcept_no"] not in cache:
+                    cache[rec["rcept_no"]] = rec["report_text"]
+                else:
+                    stale += 1
+    return cache, stale
+
+
+def _write_cache(path: str, key: str, texts: Dict[str, str], mode: str) -> None:
+    """mode="a" 면 추가, "w" 면 texts 로 원자적 재작성(압축)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    target = f"{path}.tmp" if mode == "w" else path
+    with open(target, mode, encoding="utf-8") as fw:
+        for rcept_no, text in texts.items():
+            fw.write(json.dumps(
+                {"rcept_no": rcept_no, "key": key, "report_text": text},
+                ensure_ascii=False,
+            ) + "\n")
+    if mode == "w":
+        os.replace(target, path)
+
+
+def _extract_one(args: Tuple[str, str, int]) -> str:
+    html, title, max_chars = args
+    return html_to_text(html, title=title, max_chars=max_chars)
+
+
+def extract_texts(
+    records: Iterable[dict],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+) -> Dict[str, str]:
+    """records(rcept_no, html, corp_name, report_nm) → {rcept_no: report_text}
+
+    캐시에 없는 rcept_no 만 프로세스 풀에서 추출하고 결과를 캐시에 추가한다.
+    캐시 파일에 다른 버전·max_chars 항목이 있으면 현재 key 항목만 남기고 재작성한다.
+    """
+    key = _cache_key(max_chars)
+    cache, stale = _load_cache(cache_path, key)
+
+    todo = [
+        r for r in records
+        if r.get("rcept_no") and r["rcept_no"] not in cache
+    ]
+    # 같은 rcept_no 중복 레코드는 1회만 추출
+    todo = list({r["rcept_no"]: r for r in todo}.values())
+    if not todo:
+        if cache_path and stale:
+            _write_cache(cache_path, key, cache, mode="w")
+        return cache
+
+    jobs = [
+        (
+            r.get("html") or "",
+            " ".join(x for x in (r.get("corp_name"), r.get("report_nm")) if x),
+            max_chars,
+        )
+        for r in todo
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        texts = list(tqdm(
+            ex.map(_extract_one, jobs, chunksize=16),
+            total=len(jobs),
+            desc="본문 텍스트 추출",
+        ))
+
+    new = {r["rcept_no"]: t for r, t in zip(todo, texts)}
+    cache.update(new)
+    if cache_path:
+        if stale:
+            _write_cache(cache_path, key, cache, mode="w")
+        else:
+            _write_cache(cache_path, key, new, mode="a")
+    return cache
+
+
+def add_report_text(
+    jsonl_path: str,
+    out_path: Optional[str] = None,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+) -> int:
+    """공시 JSONL 의 각 레코드에 report_text 필드를 채워 저장. 채운 레코드 수 반환
+
+    out_path 미지정 시 jsonl_path 를 원자적으로 덮어쓴다.
+    cache_path 미지정 시 같은 디렉토리의 report_text_cache.jsonl 사용.
+    """
+    out_path = out_path or jsonl_path
+    cache_path = cache_path or os.path.join(
+        os.path.dirname(jsonl_path) or ".", "report_text_cache.jsonl"
+    )
+    with open(jsonl_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    texts = extract_texts(records, max_chars=max_chars, max_workers=max_workers, cache_path=cache_path)
+
+    tmp = f"{out_path}.tmp"
+    filled = 0
+    with open(tmp, "w", encoding="utf-8") as fw:
+        for rec in records:
+            text = texts.get(rec.get("rcept_no"))
+            if text:
+                rec["report_text"] = text
+                filled += 1
+            fw.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    os.replace(tmp, out_path)
+    return filled